@@ -1 +1,8 @@
-from .app import App
\ No newline at end of file
+from .solver import Progress, SolveResult, Solver, SolverConfig
+
+def __getattr__(name):
+    # The Tk application is only imported when it is used, so that headless solves never load tkinter.
+    if name == "App":
+        from .app import App
+        return App
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
@@ -0,0 +1,102 @@
+import numpy as np
+from .settings import ADAPTIVE_LEARNING_RATE, ADAPTIVE_MIN_PROBABILITY
+
+""" Adaptive operator selection. The operators of a pool are rewarded with the fitness improvement
+of the offspring they produce, and their selection probabilities follow their rewards online. """
+
+class ProbabilityMatching:
+    """ Probability matching credit assignment. Every operator has a quality, an exponential moving
+    average of the mean reward of its offspring, and is selected with a probability proportional
+    to its quality. A minimum probability keeps every operator in use, so an operator that becomes
+    useful later in the search is noticed again. """
+
+    def __init__(self, weight, learning_rate=ADAPTIVE_LEARNING_RATE, min_probability=ADAPTIVE_MIN_PROBABILITY):
+        """
+        Parameters:
+            - weight (list): Initial weight of every operator
+            - learning_rate (float) (optional=ADAPTIVE_LEARNING_RATE): Weight of the latest rewards in the qualities
+            - min_probability (float) (optional=ADAPTIVE_MIN_PROBABILITY): Lowest selection probability of an operator
+        """
+        weight = np.asarray(weight, dtype=float)
+        self.learning_rate = learning_rate
+        self.min_probability = min(min_probability, 1 / len(weight))
+        self.quality = weight / weight.sum()
+        # Number of offspring, total reward and number of improving offspring of every operator
+        self.uses = np.zeros(len(weight), dtype=int)
+        self.rewards = np.zeros(len(weight))
+        self.successes = np.zeros(len(weight), dtype=int)
+        # Operators chosen for the offspring since the last reward, waiting for their rewards
+        self.choices = None
+
+    def probabilities(self):
+        """ Returns the selection probability of every operator. """
+        number = len(self.quality)
+        total = self.quality.sum()
+        share = self.quality / total if total > 0 else np.full(number, 1 / number)
+        return self.min_probability + (1 - number * self.min_probability) * share
+
+    def record(self, choices):
+        """
+        Remembers the operators chosen for a batch of offspring until their rewards are known. The batches
+        recorded before the next reward are appended, an offspring mutated in several rounds has one choice per round.
+
+        Parameters:
+            - choices (array): Index of the operator of every offspring
+        """
+        self.choices = choices if self.choices is None else np.concatenate([self.choices, choices])
+
+    def reward(self, rewards):
+        """
+        Rewards the operators of the recorded batch and updates their qualities.
+
+        Parameters:
+            - rewards (array): Reward of every recorded choice, in the same order
+        """
+        if self.choices is None:
+            return
+        number = len(self.quality)
+        uses = np.bincount(self.choices, minlength=number)
+        totals = np.bincount(self.choices, weights=rewards, minlength=number)
+        self.uses += uses
+        self.rewards += totals
+        self.successes += np.bincount(self.choices[rewards > 0], minlength=number)
+
+        # Only the operators used in the batch learn from it
+        used = uses > 0
+        self.quality[used] += self.learning_rate * (totals[used] / uses[used] - self.quality[used])
+        self.choices = None
+
+    def get_state(self):
+        """ Returns the qualities and counters as a (4, K) array. """
+        return np.array([self.quality, self.uses, self.rewards, self.successes], dtype=float)
+
+    def set_state(self, state):
+        """
+        Restores a state returned by get_state.
+
+        Parameters:
+            - state (array): Qualities and counters, shape (4, K)
+        """
+        self.quality = state[0].astype(float)
+        self.uses = state[1].astype(int)
+        self.rewards = state[2].astype(float)
+        self.successes = state[3].astype(int)
+        self.choices = None
+
+    def summary(self, names):
+        """
+        Returns the statistics of every operator: its selection probability, quality, number of
+        offspring, mean reward and share of improving offspring.
+
+        Parameters:
+            - names (list): Name of every operator
+        """
+        probabilities = self.probabilities()
+        return [{
+            "operator": name,
+            "probability": round(float(probabilities[k]), 4),
+            "quality": round(float(self.quality[k]), 4),
+            "uses": int(self.uses[k]),
+            "mean_reward": round(float(self.rewards[k] / self.uses[k]), 4) if self.uses[k] else None,
+            "success_rate": round(float(self.successes[k] / self.uses[k]), 4) if self.uses[k] else None,
+        } for k, name in enumerate(names)]
@@ -0,0 +1,240 @@
+from abc import ABC, abstractmethod
+import numpy as np
+
+from .candidate import Candidate
+from .mutation import FreeCells
+from .rng import make_rng
+from .stats import ANNEALING, SolveStats
+from .topology import COLUMN_OF, ROW_OF
+from .settings import ANNEALING_CHAINS, ANNEALING_COOLING, ANNEALING_COOLING_STEPS, ANNEALING_MIN_TEMPERATURE, ANNEALING_REHEAT
+from .settings import ANNEALING_REHEAT_STALE, DIGIT_NUMBER
+
+""" Simulated annealing engine. Many independent chains are annealed as one NumPy batch: at every
+step each chain proposes one swap of two free cells of a sub-grid, the swaps of all the chains are
+scored at once from their row and column digit counts and accepted with the Metropolis criterion.
+The chains use the chromosome layout, the fitness and the tracker of the genetic algorithm, so a
+chain is a Candidate whose fitness is maximised. """
+
+class CoolingSchedule(ABC):
+    """ Base class of the cooling schedules. A schedule lowers the temperature of a chain from its start
+    temperature to the minimum temperature in a given number of steps, and keeps it there afterwards. """
+
+    @abstractmethod
+    def temperature(self, start, end, steps, length):
+        """
+        Returns the temperature of every chain.
+
+        Parameters:
+            - start (array): Start temperature of every chain
+            - end (float): Minimum temperature
+            - steps (array): Number of steps of every chain since it was last (re)heated
+            - length (int): Number of steps to cool from the start temperature to the minimum temperature
+        """
+
+class GeometricCooling(CoolingSchedule):
+    def temperature(self, start, end, steps, length):
+        """ The temperature is multiplied by a constant factor at every step. See CoolingSchedule.temperature. """
+        return start * (end / start) ** np.minimum(steps / length, 1)
+
+class LinearCooling(CoolingSchedule):
+    def temperature(self, start, end, steps, length):
+        """ The temperature decreases by a constant amount at every step. See CoolingSchedule.temperature. """
+        return start + (end - start) * np.minimum(steps / length, 1)
+
+class LogarithmicCooling(CoolingSchedule):
+    def temperature(self, start, end, steps, length):
+        """ The temperature falls quickly at first, then slowly, as start / (1 + a log(1 + steps)).
+        See CoolingSchedule.temperature. """
+        a = (start / end - 1) / np.log1p(length)
+        return np.maximum(start / (1 + a * np.log1p(steps)), end)
+
+COOLING_SCHEDULES = {
+    "geometric": GeometricCooling,
+    "linear": LinearCooling,
+    "logarithmic": LogarithmicCooling,
+}
+
+class Annealing:
+    """ A batch of simulated annealing chains. Every chain keeps its own temperature, cooling clock and best
+    fitness. A chain whose best fitness has not improved for reheat_stale steps is reheated: its cooling
+    starts again from a fraction of the initial temperature, which lets it climb out of a local optimum
+    without losing the cells it already placed. """
+
+    def __init__(self, chains=ANNEALING_CHAINS, cooling=ANNEALING_COOLING, cooling_steps=ANNEALING_COOLING_STEPS,
+            start_temperature=None, min_temperature=ANNEALING_MIN_TEMPERATURE, reheat=ANNEALING_REHEAT,
+            reheat_stale=ANNEALING_REHEAT_STALE):
+        """
+        Parameters:
+            - chains (int) (optional=ANNEALING_CHAINS): Number of independent chains
+            - cooling (str) (optional=ANNEALING_COOLING): Cooling schedule, one of COOLING_SCHEDULES
+            - cooling_steps (int) (optional=ANNEALING_COOLING_STEPS): Number of steps to cool down to the minimum temperature
+            - start_temperature (float) (optional=None): Initial temperature, None uses the standard deviation of the
+              fitness change of random swaps of the initial chains
+            - min_temperature (float) (optional=ANNEALING_MIN_TEMPERATURE): Minimum temperature
+            - reheat (float) (optional=ANNEALING_REHEAT): Start temperature of a reheated chain, relative to the initial temperature
+            - reheat_stale (int) (optional=ANNEALING_REHEAT_STALE): Number of steps without improvement before a chain is reheated
+        """
+        if cooling not in COOLING_SCHEDULES:
+            raise ValueError("Unknown cooling schedule %r, expected one of %s" % (cooling, ", ".join(COOLING_SCHEDULES)))
+        self.chains = chains
+        self.schedule = COOLING_SCHEDULES[cooling]()
+        self.cooling_steps = cooling_steps
+        self.start_temperature = start_temperature
+        self.min_temperature = min_temperature
+        self.reheat = reheat
+        self.reheat_stale = reheat_stale
+        self.reheats = 0
+        self.steps = 0
+        self.stats = SolveStats()
+        self.rng = make_rng()
+
+    def start(self, given, tracker):
+        """
+        Fills the free cells of every chain with a random permutation of the digits missing from their sub-grid
+        and evaluates the chains.
+
+        Parameters:
+            - given (array): The given chromosome of the Sudoku problem
+            - tracker (array): Bitmasks of all possible values for each cell in the chromosome
+        """
+        free_cells = FreeCells(given)
+        self.firsts, self.seconds = free_cells.pairs
+        self.tracker = tracker.reshape(-1).astype(int)
+
+        genes = np.empty((self.chains, DIGIT_NUMBER, DIGIT_NUMBER), dtype=np.uint8)
+        genes[:] = given
+        for i in range(DIGIT_NUMBER):
+            cells = free_cells.indexes[i, :free_cells.count[i]]
+            missing_values = np.setdiff1d(np.arange(1, DIGIT_NUMBER + 1), given[i])
+            order = self.rng.random((self.chains, len(cells))).argsort(axis=1)
+            genes[:, i, cells] = missing_values[order]
+        self.genes = genes.reshape(self.chains, -1)
+        self.evaluate()
+
+        start = self.start_temperature
+        if start is None:
+            start = self.initial_temperature()
+        self.initial = max(start, self.min_temperature)
+        self.temperatures = np.full(self.chains, self.initial)
+        self.clock = np.zeros(self.chains, dtype=int)
+        self.reheated = np.zeros(self.chains, dtype=bool)
+        self.best_fitness = self.fitness.copy()
+        self.best_genes = self.genes.copy()
+        self.stale = np.zeros(self.chains, dtype=int)
+        self.reheats = 0
+        self.steps = 0
+
+    def evaluate(self):
+        """ Computes the digit counts and the fitness of every chain from its gene. """
+        chain = np.arange(self.chains)[:, None] * DIGIT_NUMBER * (DIGIT_NUMBER + 1)
+        values = self.genes.astype(int)
+        size = self.chains * DIGIT_NUMBER * (DIGIT_NUMBER + 1)
+        self.row_counts = np.bincount((chain + ROW_OF * (DIGIT_NUMBER + 1) + values).reshape(-1),
+            minlength=size).reshape(self.chains, DIGIT_NUMBER, -1)
+        self.col_counts = np.bincount((chain + COLUMN_OF * (DIGIT_NUMBER + 1) + values).reshape(-1),
+            minlength=size).reshape(self.chains, DIGIT_NUMBER, -1)
+        violations = ((self.tracker >> values) & 1 == 0).sum(axis=1)
+        self.fitness = (self.row_counts[:, :, 1:] > 0).sum(axis=(1, 2)) + (self.col_counts[:, :, 1:] > 0).sum(axis=(1, 2)) \
+            - 2 * violations
+        self.stats.count_evaluations(self.chains)
+
+    def initial_temperature(self):
+        """ Returns the standard deviation of the fitness change of random swaps of the chains, a temperature
+        at which most swaps are accepted. """
+        if len(self.firsts) == 0:
+            return self.min_temperature
+        samples = [self.deltas(self.rng.integers(0, len(self.firsts), size=self.chains))[0] for _ in range(10)]
+        return float(np.std(samples))
+
+    def deltas(self, pairs):
+        """
+        Returns the fitness change of one swap per chain, the two cells and the two values of every swap.
+
+        Parameters:
+            - pairs (array): Index of the swap of every chain in the free cell pairs
+        """
+        chain = np.arange(self.chains)
+        p = self.firsts[pairs]
+        q = self.seconds[pairs]
+        x = self.genes[chain, p].astype(int)
+        y = self.genes[chain, q].astype(int)
+
+        deltas = np.zeros(self.chains, dtype=int)
+        for counts, unit in ((self.row_counts, ROW_OF), (self.col_counts, COLUMN_OF)):
+            unit_p = unit[p]
+            unit_q = unit[q]
+            delta = (counts[chain, unit_p, y] == 0).astype(int) - (counts[chain, unit_p, x] == 1) \
+                + (counts[chain, unit_q, x] == 0) - (counts[chain, unit_q, y] == 1)
+            deltas += np.where(unit_p != unit_q, delta, 0)
+
+        domain_p = self.tracker[p]
+        domain_q = self.tracker[q]
+        violation_deltas = (domain_p >> x & 1) + (domain_q >> y & 1) - (domain_p >> y & 1) - (domain_q >> x & 1)
+        return np.where(x != y, deltas - 2 * violation_deltas, 0), p, q, x, y
+
+    def run(self, steps):
+        """
+        Anneals every chain for a number of steps.
+
+        Parameters:
+            - steps (int): Number of steps
+        """
+        if len(self.firsts) == 0:
+            return
+        with self.stats.timer(ANNEALING):
+            for _ in range(steps):
+                self.step()
+        self.stats.count_evaluations(self.chains * steps)
+
+    def step(self):
+        """ Proposes one swap per chain, accepts it with the Metropolis criterion and reheats the stale chains. """
+        chain = np.arange(self.chains)
+        self.temperatures = self.schedule.temperature(self.start_temperatures(), self.min_temperature, self.clock,
+            self.cooling_steps)
+        deltas, p, q, x, y = self.deltas(self.rng.integers(0, len(self.firsts), size=self.chains))
+        accepted = (deltas >= 0) | (self.rng.random(self.chains) < np.exp(np.minimum(deltas, 0) / self.temperatures))
+        accepted &= x != y
+
+        # Apply the accepted swaps and update the digit counts of their rows and columns
+        c, p, q, x, y = chain[accepted], p[accepted], q[accepted], x[accepted], y[accepted]
+        self.genes[c, p] = y
+        self.genes[c, q] = x
+        for counts, unit in ((self.row_counts, ROW_OF), (self.col_counts, COLUMN_OF)):
+            moved = unit[p] != unit[q]
+            k, unit_p, unit_q = c[moved], unit[p[moved]], unit[q[moved]]
+            counts[k, unit_p, x[moved]] -= 1
+            counts[k, unit_p, y[moved]] += 1
+            counts[k, unit_q, y[moved]] -= 1
+            counts[k, unit_q, x[moved]] += 1
+        self.fitness += np.where(accepted, deltas, 0)
+
+        # Keep the best state of every chain and reheat the chains that stopped improving
+        improved = self.fitness > self.best_fitness
+        self.best_fitness[improved] = self.fitness[improved]
+        self.best_genes[improved] = self.genes[improved]
+        self.stale = np.where(improved, 0, self.stale + 1)
+        self.clock += 1
+        stale = self.stale > self.reheat_stale
+        if stale.any():
+            self.clock[stale] = 0
+            self.stale[stale] = 0
+            self.reheated[stale] = True
+            self.reheats += int(stale.sum())
+        self.steps += 1
+
+    def start_temperatures(self):
+        """ Returns the start temperature of every chain, lower for the chains that have been reheated. """
+        return np.where(self.reheated, self.initial * self.reheat, self.initial)
+
+    def best(self):
+        """ Returns the best state found by the chains as a Candidate. """
+        k = int(np.argmax(self.best_fitness))
+        return Candidate(self.best_genes[k].reshape(DIGIT_NUMBER, DIGIT_NUMBER).copy(), int(self.best_fitness[k]))
+
+    def worst(self):
+        """ Returns the current fitness of the least fit chain. """
+        return int(self.fitness.min())
+
+    def temperature(self):
+        """ Returns the mean temperature of the chains. """
+        return float(self.temperatures.mean())
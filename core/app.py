@@ -1,10 +1,12 @@
+from hashlib import sha1
 from os import makedirs, path as osPath
 from numpy import loadtxt, savetxt
 import threading
 
+from .candidate import Candidate
 from .given import given
 from .sudoku import Sudoku
-from .settings import DIGIT_NUMBER, GOAL, OpenButtonOption, RenderOption, SolveButtonOption, WriteButtonOption
+from .settings import DIGIT_NUMBER, ENGINE, ENGINE_NAMES, EngineButtonOption, GOAL, OpenButtonOption, RENDER_FPS, RenderOption, SolveButtonOption, WriteButtonOption
 from .ui import Ui
 
 class App:
@@ -13,6 +15,7 @@ class App:
         self.puzzlePath = None
         self.sudoku = None
         self.solveThread = None
+        self.engine = ENGINE
         self.opening = False
         self.writing = False
         self.solving = False
@@ -23,6 +26,7 @@ class App:
         self.ui.writeCmd = self.write
         self.ui.clearCmd = self.clear
         self.ui.solveCmd = self.solve
+        self.ui.engineCmd = self.switchEngine
         self.ui.clickCmd = self.click
         self.ui.pressCmd = self.press
         self.ui.loadCommamd()
@@ -32,11 +36,20 @@ class App:
         with open(path, "r") as f:
             values = loadtxt(f).reshape((DIGIT_NUMBER, DIGIT_NUMBER)).astype(int)
             given.loadValues(values)
-            self.sudoku = Sudoku(self.render)
-            self.solveThread = threading.Thread(target=self.sudoku.solve)
+            self.prepareSolve()
             self.ui.drawGivenBoard()
         return
 
+    def prepareSolve(self):
+        # Every solve runs its own Sudoku in a new thread, resuming from the checkpoint of the puzzle.
+        # Checkpoints are keyed by the given grid, so puzzles sharing a file name never share a checkpoint.
+        checkpoint = None
+        if self.puzzle:
+            digest = sha1(given.values.astype("uint8").tobytes()).hexdigest()[:12]
+            checkpoint = "./checkpoints/%s-%s.npz" % (self.puzzle, digest)
+        self.sudoku = Sudoku(checkpoint_path=checkpoint, engine=self.engine)
+        self.solveThread = threading.Thread(target=self.sudoku.solve)
+
     def save(self, path, solution):
         # Save a configuration to a file.
         dirPath = osPath.dirname(osPath.abspath(path))
@@ -45,6 +58,20 @@ class App:
             savetxt(f, solution.reshape(DIGIT_NUMBER, DIGIT_NUMBER), fmt='%d')
         return
 
+    def poll(self, sudoku):
+        # Render the latest snapshot of a running solve, called from the Tk main loop.
+        if sudoku is not self.sudoku:
+            return
+        snapshot = sudoku.latest()
+        if snapshot is not None:
+            text, option, solution, fitness = snapshot
+            if solution is not None:
+                given.bestCandidate = Candidate(solution, fitness)
+            self.render(text, option)
+            if option in [RenderOption.FOUNDED,RenderOption.NOT_FOUND]:
+                return
+        self.ui.window.after(int(1000 / RENDER_FPS), self.poll, sudoku)
+
     def render(self, text, option=RenderOption.NORMAL):
         self.ui.showStatistic(text)
         if option != RenderOption.ONLY_TEXT:
@@ -56,12 +83,11 @@ class App:
             else:
                 self.ui.drawDuplicateBg()
         if option in [RenderOption.FOUNDED,RenderOption.NOT_FOUND]:
-            self.solveThread = threading.Thread(target=self.sudoku.solve)
+            self.prepareSolve()
             self.ui.solveButtonSwitch(SolveButtonOption.READY)
             self.solving = False
         if option == RenderOption.FOUNDED:
             self.save("./solutions/" + self.puzzle, given.bestCandidate.gene)
-        self.ui.window.update()
 
     def solve(self):
         if not self.solving:
@@ -70,16 +96,27 @@ class App:
             self.solveThread.start()
             self.solving = True
             self.ui.solveButtonSwitch(SolveButtonOption.SOLVE)
+            self.ui.window.after(0, self.poll, self.sudoku)
         else:
             if not self.solveThread.is_alive():
                 return
             self.ui.solveButtonSwitch(SolveButtonOption.CANCEL)
-            self.sudoku.exitFlag = True
+            self.sudoku.cancel()
             self.solveThread.join()
-            self.solveThread = threading.Thread(target=self.sudoku.solve)
+            self.prepareSolve()
             self.solving = False
             self.ui.solveButtonSwitch(SolveButtonOption.READY)
 
+    def switchEngine(self):
+        # Switch to the next search engine, the next solve of the opened puzzle uses it.
+        if self.solving:
+            return
+        engines = list(ENGINE_NAMES)
+        self.engine = engines[(engines.index(self.engine) + 1) % len(engines)]
+        self.ui.engineButtonSwitch(EngineButtonOption.NORMAL, self.engine)
+        if self.sudoku is not None:
+            self.prepareSolve()
+
     def clear(self):
         self.ui.showStatistic("")
         self.ui.drawRemainBoard(given.values)
@@ -0,0 +1,62 @@
+import json
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .puzzles import read_puzzles
+from .solver import Solver, SolverConfig
+
+def solve_puzzle(name, values, config=None):
+    """
+    Solves one puzzle without any user interface and returns its result record.
+
+    Parameters:
+        - name (str): Name of the puzzle
+        - values (array): Grid of the puzzle, 0 for unknown cells
+        - config (SolverConfig) (optional=None): Parameters of the solve, with stats the per-phase timings
+          and counters of the solve are added to the record
+    """
+    config = config or SolverConfig()
+    result = Solver(values, config).solve()
+    record = {
+        "puzzle": name,
+        "solved": result.solved,
+        "fitness": result.fitness,
+        "generations": int(result.generations),
+        "reseeds": result.reseeds,
+        "time": round(result.time, 4),
+        "solution": "".join(str(int(value)) for value in result.solution.flat),
+    }
+    if config.stats:
+        record["stats"] = result.stats.summary()
+        if result.operators is not None:
+            record["operators"] = result.operators
+    return record
+
+def run_batch(puzzle_path, config=None, output=None, workers=None):
+    """
+    Solves every puzzle of a file or a directory in parallel and writes one JSON record
+    per puzzle as soon as it is finished. Returns the number of solved puzzles.
+
+    Parameters:
+        - puzzle_path (str): Path of a puzzle file or of a directory of puzzle files
+        - config (SolverConfig) (optional=None): Parameters of every solve, see solve_puzzle
+        - output (file) (optional=None): Stream receiving the records, stdout by default
+        - workers (int) (optional=None): Number of worker processes, the number of cores by default
+    """
+    output = output or sys.stdout
+    solved = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(solve_puzzle, name, values, config): name
+            for name, values in read_puzzles(puzzle_path)
+        }
+        for future in as_completed(futures):
+            try:
+                record = future.result()
+            except Exception as e:
+                record = {"puzzle": futures[future], "solved": False, "error": str(e)}
+            solved += record["solved"]
+            output.write(json.dumps(record) + "\n")
+            output.flush()
+
+    return solved
@@ -0,0 +1,234 @@
+import json
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from hashlib import sha1
+from os import path as osPath
+import numpy as np
+
+from .puzzles import read_puzzles
+from .settings import BENCHMARK_SEEDS, BENCHMARK_TIME_SLACK, BENCHMARK_TOLERANCE
+from .solver import Solver, SolverConfig
+
+""" Benchmark of the solver over a set of puzzles with fixed seeds, summarized per difficulty
+and compared against a saved baseline. """
+
+def difficulty_of(name):
+    """
+    Returns the difficulty of a puzzle, its label when it has one, otherwise its file name
+    without prefix, number and extension, e.g. "puzzle_very_hard_2.txt" gives "very hard".
+
+    Parameters:
+        - name (str): Name of the puzzle as given by read_puzzles
+    """
+    label = re.search(r"\((.*)\)$", name)
+    if label:
+        return label.group(1).lower()
+    stem = osPath.splitext(name.split("#")[0])[0]
+    stem = re.sub(r"^puzzle_", "", stem)
+    stem = re.sub(r"_?\d+$", "", stem)
+    return stem.replace("_", " ").lower() or "unknown"
+
+def run_once(name, values, seed, config=None):
+    """
+    Solves a puzzle with a fixed seed and returns the record of the run.
+
+    Parameters:
+        - name (str): Name of the puzzle
+        - values (array): Grid of the puzzle, 0 for unknown cells
+        - seed (int): Seed of the random number generator, replaces the seed of the config
+        - config (SolverConfig) (optional=None): Parameters of the run, the stats are always collected
+    """
+    config = (config or SolverConfig()).copy(seed=seed, stats=True)
+    result = Solver(values, config).solve()
+    return {
+        "puzzle": name,
+        "difficulty": difficulty_of(name),
+        "seed": seed,
+        "solved": result.solved,
+        "time": result.time,
+        "generations": int(result.generations),
+        "reseeds": result.reseeds,
+        "evaluations": result.stats.summary()["evaluations"],
+    }
+
+def run_benchmark(puzzle_path, config=None, seeds=BENCHMARK_SEEDS, workers=None):
+    """
+    Solves every puzzle of a file or a directory once per seed in parallel and returns the records of the runs.
+
+    Parameters:
+        - puzzle_path (str): Path of a puzzle file or of a directory of puzzle files
+        - config (SolverConfig) (optional=None): Parameters of every run, see run_once
+        - seeds (int) (optional=BENCHMARK_SEEDS): Number of runs of every puzzle, seeded 0 to seeds - 1
+        - workers (int) (optional=None): Number of worker processes, the number of cores by default
+    """
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(run_once, name, values, seed, config)
+            for name, values in read_puzzles(puzzle_path)
+            for seed in range(seeds)
+        ]
+        return [future.result() for future in futures]
+
+def summarize(records):
+    """
+    Returns the metrics of every difficulty: success rate, median and 95th percentile
+    time-to-solution of the solved runs, median generations, mean reseeds and evaluations per second.
+
+    Parameters:
+        - records (list): Records of the runs, see run_once
+    """
+    summary = {}
+    for difficulty in sorted(set(record["difficulty"] for record in records)):
+        runs = [record for record in records if record["difficulty"] == difficulty]
+        solved = [record for record in runs if record["solved"]]
+        times = [record["time"] for record in solved]
+        total_time = sum(record["time"] for record in runs)
+        summary[difficulty] = {
+            "runs": len(runs),
+            "success_rate": len(solved) / len(runs),
+            "median_time": float(np.median(times)) if times else None,
+            "p95_time": float(np.percentile(times, 95)) if times else None,
+            "median_generations": float(np.median([record["generations"] for record in runs])),
+            "mean_reseeds": float(np.mean([record["reseeds"] for record in runs])),
+            "evaluations_per_second": sum(record["evaluations"] for record in runs) / total_time if total_time else None,
+        }
+    return summary
+
+def compare(summary, baseline, tolerance=BENCHMARK_TOLERANCE):
+    """
+    Returns the list of regressions of a summary against a baseline summary. A difficulty regresses
+    when its success rate drops, or when its times grow or its evaluation rate falls by more than tolerance.
+    Time differences below BENCHMARK_TIME_SLACK seconds are ignored.
+
+    Parameters:
+        - summary (dict): Summary of the current benchmark
+        - baseline (dict): Summary of the baseline benchmark
+        - tolerance (float) (optional=BENCHMARK_TOLERANCE): Allowed relative change of the timings
+    """
+    regressions = []
+    for difficulty, metrics in summary.items():
+        base = baseline.get(difficulty)
+        if base is None:
+            continue
+
+        if metrics["success_rate"] < base["success_rate"]:
+            regressions.append("%s: success rate %.2f < %.2f" % (difficulty, metrics["success_rate"], base["success_rate"]))
+        for key in ("median_time", "p95_time"):
+            if metrics[key] is None or not base[key]:
+                continue
+            if metrics[key] > base[key] * (1 + tolerance) and metrics[key] - base[key] > BENCHMARK_TIME_SLACK:
+                regressions.append("%s: %s %.4fs > %.4fs" % (difficulty, key, metrics[key], base[key]))
+        key = "evaluations_per_second"
+        if metrics[key] is not None and base[key] and metrics[key] < base[key] * (1 - tolerance):
+            regressions.append("%s: %s %.0f < %.0f" % (difficulty, key, metrics[key], base[key]))
+    return regressions
+
+# Config parameters that do not change the outcome of a run, left out of the fingerprint of a benchmark
+UNCOMPARED_PARAMETERS = ("seed", "stats", "trace", "verbose", "checkpoint_path", "checkpoint_interval", "resume")
+
+def fingerprint(puzzle_path, config, seeds):
+    """
+    Returns what a benchmark depends on: a digest of its puzzles, its number of seeds and the
+    parameters of its config. Two benchmarks are only comparable when their fingerprints are equal.
+
+    Parameters:
+        - puzzle_path (str): Path of a puzzle file or of a directory of puzzle files
+        - config (SolverConfig): Parameters of every run
+        - seeds (int): Number of runs of every puzzle
+    """
+    digest = sha1()
+    number = 0
+    for name, values in read_puzzles(puzzle_path):
+        digest.update(name.encode("utf-8"))
+        digest.update(np.asarray(values, dtype=np.uint8).tobytes())
+        number += 1
+    parameters = {name: value for name, value in sorted(vars(config).items()) if name not in UNCOMPARED_PARAMETERS}
+    return {"puzzles": digest.hexdigest(), "puzzle_number": number, "seeds": seeds, "config": parameters}
+
+def fingerprint_differences(current, baseline):
+    """
+    Returns the list of differences between the fingerprint of a benchmark and the one of its baseline.
+
+    Parameters:
+        - current (dict): Fingerprint of the current benchmark
+        - baseline (dict): Fingerprint of the baseline, None for a baseline saved without one
+    """
+    if baseline is None:
+        return ["the baseline has no fingerprint"]
+    differences = []
+    if current["puzzles"] != baseline.get("puzzles"):
+        differences.append("puzzles: %d puzzles differ from the %s of the baseline" % (current["puzzle_number"],
+            baseline.get("puzzle_number")))
+    if current["seeds"] != baseline.get("seeds"):
+        differences.append("seeds: %s != %s" % (current["seeds"], baseline.get("seeds")))
+    base_config = baseline.get("config", {})
+    for name in sorted(set(current["config"]) | set(base_config)):
+        value = current["config"].get(name)
+        if value != base_config.get(name):
+            differences.append("config.%s: %r != %r" % (name, value, base_config.get(name)))
+    return differences
+
+def format_summary(summary):
+    """ Returns the summary as a text table. """
+    def number(value, fmt):
+        return "-" if value is None else fmt % value
+
+    lines = ["%-18s %5s %8s %9s %9s %7s %7s %10s" % ("difficulty", "runs", "success", "median s", "p95 s", "gens", "reseeds", "evals/s")]
+    for difficulty, metrics in summary.items():
+        lines.append("%-18s %5d %7.0f%% %9s %9s %7.1f %7.2f %10s" % (
+            difficulty, metrics["runs"], 100 * metrics["success_rate"],
+            number(metrics["median_time"], "%.4f"), number(metrics["p95_time"], "%.4f"),
+            metrics["median_generations"], metrics["mean_reseeds"], number(metrics["evaluations_per_second"], "%.0f")))
+    return "\n".join(lines)
+
+def benchmark(puzzle_path, config=None, seeds=BENCHMARK_SEEDS, workers=None, baseline_path=None, save_path=None,
+        tolerance=BENCHMARK_TOLERANCE, output=None):
+    """
+    Runs the benchmark, prints its summary, compares it to a baseline and saves it as a new baseline.
+    Returns the list of regressions. A baseline run on other puzzles, seeds or parameters is not compared,
+    the differences are returned as regressions instead.
+
+    Parameters:
+        - puzzle_path (str): Path of a puzzle file or of a directory of puzzle files
+        - config (SolverConfig) (optional=None): Parameters of every run, see run_once
+        - seeds (int) (optional=BENCHMARK_SEEDS): Number of runs of every puzzle
+        - workers (int) (optional=None): Number of worker processes, the number of cores by default
+        - baseline_path (str) (optional=None): Baseline file to compare with
+        - save_path (str) (optional=None): File where the summary is saved as a baseline
+        - tolerance (float) (optional=BENCHMARK_TOLERANCE): Allowed relative change of the timings
+        - output (file) (optional=None): Stream receiving the report, stdout by default
+    """
+    output = output or sys.stdout
+    config = config or SolverConfig()
+    current = fingerprint(puzzle_path, config, seeds)
+    records = run_benchmark(puzzle_path, config, seeds, workers)
+    summary = summarize(records)
+    output.write(format_summary(summary) + "\n")
+
+    regressions = []
+    if baseline_path is not None:
+        with open(baseline_path, "r") as f:
+            baseline = json.load(f)
+        differences = fingerprint_differences(current, baseline.get("fingerprint"))
+        if differences:
+            output.write("The baseline %s is not comparable:\n" % baseline_path)
+            for difference in differences:
+                output.write("BASELINE MISMATCH %s\n" % difference)
+            regressions = ["baseline mismatch, %s" % difference for difference in differences]
+        else:
+            regressions = compare(summary, baseline["summary"], tolerance)
+            for regression in regressions:
+                output.write("REGRESSION %s\n" % regression)
+            if not regressions:
+                output.write("No regression against %s\n" % baseline_path)
+
+    if save_path is not None:
+        with open(save_path, "w") as f:
+            json.dump({
+                "fingerprint": current,
+                "summary": summary,
+                "runs": records,
+            }, f, indent=2)
+
+    return regressions
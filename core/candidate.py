@@ -1,22 +1,39 @@
-import random
-from math import sqrt
 import numpy as np
 
 from .mutation import *
 from .fitness import *
-from .settings import DIGIT_NUMBER, BLOCK_NUMBER
+from .rng import make_rng
+from .settings import DIGIT_NUMBER, BLOCK_NUMBER, LOCAL_SEARCH_CHUNK
 
 class Candidate:
-    def __init__(self):
-        self.gene = np.zeros((DIGIT_NUMBER, DIGIT_NUMBER), dtype=int)
-        self.fitness = 0
+    """ A candidate solution of the Sudoku puzzle. Candidates are created by the thousand every
+    generation, so they only hold their own state in slots; the fitness and mutation
+    strategies are stateless and shared by all candidates. """
+
+    __slots__ = ("gene", "fitness", "fitness_matrix", "row_counts", "col_counts", "violations")
+
+    fitness_method = PerfectFitness()
+    mutate_method = MultiSwapMutation()
+
+    def __init__(self, gene=None, fitness=0, fitness_matrix=None):
+        """
+        Parameters:
+            - gene (array) (optional=None): Chromosome of the candidate, an empty uint8 chromosome by default
+            - fitness (int) (optional=0): Fitness of the chromosome
+            - fitness_matrix (array) (optional=None): Fitness matrix of the chromosome, None until it is evaluated
+        """
+        self.gene = np.zeros((DIGIT_NUMBER, DIGIT_NUMBER), dtype=np.uint8) if gene is None else gene
+        self.fitness = fitness
         
         # The fitness matrix stores fitness scores for each row of
         # sub-grid and each col of sub-grid in the chromosome
-        self.fitness_matrix = np.zeros((2, BLOCK_NUMBER), dtype=int)
-        self.fitness_method = PerfectFitness()
-        self.mutate_method = MultiSwapMutation()
-        self.local_search_method = SwapMutation()
+        self.fitness_matrix = fitness_matrix
+
+        # Digit counts of each grid row and column and number of invalid cells,
+        # they allow swaps to update the fitness incrementally
+        self.row_counts = None
+        self.col_counts = None
+        self.violations = 0
 
     def update_fitness(self, tracker):
         """
@@ -24,22 +41,83 @@ class Candidate:
         """
         self.fitness = self.fitness_method.cal_fitness(self, tracker)
 
-    def mutate(self, mutation_rate, given):
+    def copy(self):
+        """
+        Returns a copy of the candidate, including its fitness state.
+        """
+        candidate = Candidate(np.copy(self.gene), self.fitness,
+            None if self.fitness_matrix is None else np.copy(self.fitness_matrix))
+        if self.row_counts is not None:
+            candidate.row_counts = np.copy(self.row_counts)
+            candidate.col_counts = np.copy(self.col_counts)
+        candidate.violations = self.violations
+        return candidate
+
+    def swap(self, sub_grid, first, second, tracker=None):
+        """
+        Swaps two cells of a sub-grid. When a tracker is given and the candidate has been
+        evaluated, the fitness is updated incrementally, otherwise it has to be recomputed.
+        """
+        if tracker is not None and self.row_counts is not None:
+            self.fitness_method.swap(self, sub_grid, first, second, tracker)
+        else:
+            tmp = self.gene[sub_grid][first]
+            self.gene[sub_grid][first] = self.gene[sub_grid][second]
+            self.gene[sub_grid][second] = tmp
+            self.row_counts = None
+            self.col_counts = None
+
+    def mutate(self, mutation_rate, free_cells, tracker=None, rng=None):
         """
         Mutates a candidate with a mutation_rate.
         """
-        r = random.random()
+        rng = make_rng(rng)
+        r = rng.random()
         if r < mutation_rate:  # Mutate.
-            return self.mutate_method.mutate(self, given)
+            return self.mutate_method.mutate(self, free_cells, tracker, rng)
     
         return False
 
-    def local_search(self, coef, given):
-        candidate_list = []
-        for _ in range(coef):
-            candidate = Candidate()
-            candidate.gene = np.copy(self.gene)
-            candidate.local_search_method.mutate(self, given)
-            candidate_list.append(candidate)
-        
-        return candidate_list
+    def hill_climb(self, free_cells, tracker, budget, best_improvement=False, rng=None, chunk=LOCAL_SEARCH_CHUNK):
+        """
+        Improves the candidate in place with swaps of two free cells of a sub-grid, until no swap improves
+        its fitness or "budget" swaps have been scored. The swaps are scored in batches from the digit counts,
+        without evaluating any neighbour, and scanned cyclically from a random swap. Returns the fitness gain.
+
+        Parameters:
+            - free_cells (FreeCells): Free cells of the Sudoku puzzle
+            - tracker (array): Bitmasks of all possible values for each cell in the chromosome
+            - budget (int): Maximum number of scored swaps
+            - best_improvement (bool) (optional=False): Score the whole neighbourhood and apply its best swap at each step,
+              otherwise apply the first improving swap of the scan
+            - rng (Generator) (optional=None): Random number generator
+            - chunk (int) (optional=LOCAL_SEARCH_CHUNK): Number of swaps scored at once by the first improvement climb
+        """
+        rng = make_rng(rng)
+        if self.row_counts is None:
+            self.update_fitness(tracker)
+        start = self.fitness
+        firsts, seconds = free_cells.pairs
+        number = len(firsts)
+        if number == 0:
+            return 0
+        position = int(rng.integers(number))
+        scored = 0
+        # Number of swaps scored since the last improvement, the candidate is a local optimum once it reaches number
+        unimproved = 0
+        while scored < budget and unimproved < number:
+            size = min(number if best_improvement else chunk, budget - scored, number - unimproved)
+            pairs = (position + np.arange(size)) % number
+            deltas = self.fitness_method.swap_deltas(self, firsts[pairs], seconds[pairs], tracker)
+            scored += size
+            k = int(np.argmax(deltas)) if best_improvement else int(np.argmax(deltas > 0))
+            if deltas[k] <= 0:
+                unimproved += size
+                position = (position + size) % number
+                continue
+            pair = pairs[k]
+            sub_grid = firsts[pair] // DIGIT_NUMBER
+            self.fitness_method.swap(self, sub_grid, firsts[pair] % DIGIT_NUMBER, seconds[pair] % DIGIT_NUMBER, tracker)
+            unimproved = 0
+            position = (pair + 1) % number
+        return self.fitness - start
@@ -0,0 +1,73 @@
+import json
+import os
+import numpy as np
+
+from .candidate import Candidate
+from .settings import BLOCK_NUMBER, DIGIT_NUMBER
+
+""" Checkpoints of a solve. The search state is stored as a compressed .npz archive of arrays,
+the state of the random number generator included, so a solve can be resumed in another process. """
+
+def pack_candidates(candidates):
+    """
+    Returns the genes, fitness and fitness matrices of a list of candidates as three arrays.
+
+    Parameters:
+        - candidates (list): Evaluated candidates
+    """
+    genes = np.array([c.gene for c in candidates], dtype=np.uint8).reshape(-1, DIGIT_NUMBER, DIGIT_NUMBER)
+    fitness = np.array([c.fitness for c in candidates], dtype=int)
+    fitness_matrix = np.array([c.fitness_matrix for c in candidates], dtype=int).reshape(-1, 2, BLOCK_NUMBER)
+    return genes, fitness, fitness_matrix
+
+def unpack_candidates(genes, fitness, fitness_matrix):
+    """
+    Returns the candidates packed by pack_candidates.
+    """
+    candidates = []
+    for gene, value, matrix in zip(genes, fitness, fitness_matrix):
+        candidates.append(Candidate(gene.astype(np.uint8), int(value), np.copy(matrix)))
+    return candidates
+
+def save_checkpoint(path, arrays, rng):
+    """
+    Writes a checkpoint. The file is replaced atomically, so an interrupted write never
+    destroys the previous checkpoint.
+
+    Parameters:
+        - path (str): Path of the checkpoint file
+        - arrays (dict): Arrays of the search state
+        - rng (Generator): Random number generator of the solve
+    """
+    arrays = dict(arrays)
+    arrays["rng_state"] = np.array(json.dumps(rng.bit_generator.state))
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez_compressed(f, **arrays)
+    os.replace(tmp_path, path)
+
+def load_checkpoint(path, rng=None):
+    """
+    Reads a checkpoint and returns the arrays of the search state. Without a random number generator,
+    its saved state stays in the arrays, so the checkpoint can be checked before it is restored with restore_rng.
+
+    Parameters:
+        - path (str): Path of the checkpoint file
+        - rng (Generator) (optional=None): Random number generator receiving the saved state
+    """
+    with np.load(path) as data:
+        arrays = {key: data[key] for key in data.files}
+    if rng is not None:
+        restore_rng(arrays, rng)
+    return arrays
+
+def restore_rng(arrays, rng):
+    """
+    Restores the state of the random number generator saved in the arrays of a checkpoint.
+
+    Parameters:
+        - arrays (dict): Arrays returned by load_checkpoint without a random number generator
+        - rng (Generator): Random number generator receiving the saved state
+    """
+    rng.bit_generator.state = json.loads(str(arrays.pop("rng_state")))
@@ -1,19 +1,106 @@
+from abc import ABC, abstractmethod
+from .adaptive import ProbabilityMatching
 from .candidate import Candidate
+from .rng import make_rng
 from .settings import DIGIT_NUMBER
-import random
 import numpy as np
 
+class BlockCrossover(ABC):
+    """ Base class of the crossover operators that build each child sub-block by sub-block
+    from its two parents, which lets a whole generation be crossed over at once. """
+
+    def crossover_batch(self, genes, fitness_matrix, parents1, parents2, crossover_rate, rng, out=None):
+        """ Create two children for every parent pair in one vectorized operation.
+        
+        Parameters:
+            - genes (array): Chromosomes of the population, shape (P, 9, 9)
+            - fitness_matrix (array): Fitness matrices of the population, shape (P, 2, 3)
+            - parents1 (array): Indexes of the first parent of each pair
+            - parents2 (array): Indexes of the second parent of each pair
+            - crossover_rate (float): Ratio defines if these parents are crossover or not
+            - rng (Generator): Random number generator
+            - out (array) (optional=None): Preallocated array of shape (2 * len(parents1), 9, 9) receiving the children
+        
+        Return:
+            Array of 2 * len(parents1) child chromosomes, first children then second children
+        """
+        mask1, mask2 = self.block_masks(fitness_matrix, parents1, parents2, rng)
+        return combine_blocks(genes, parents1, parents2, mask1, mask2, crossover_rate, rng, out)
+
+    @abstractmethod
+    def block_masks(self, fitness_matrix, parents1, parents2, rng):
+        """ Returns two (n, 9) boolean masks telling, for every pair, which sub-blocks
+        of the first and the second child are inherited from the first parent. """
+
+def combine_blocks(genes, parents1, parents2, mask1, mask2, crossover_rate, rng, out=None):
+    """ Builds the children of every parent pair from per-pair block masks.
+    Pairs that are not crossed over keep copies of their parents.
+    Every sub-block is gathered straight from its parent into out, without intermediate gene arrays. """
+    number = len(parents1)
+    skip = rng.random(number) >= crossover_rate
+    mask1[skip] = True
+    mask2[skip] = False
+
+    if out is None:
+        out = np.empty((2 * number, DIGIT_NUMBER, DIGIT_NUMBER), dtype=genes.dtype)
+    blocks = np.ascontiguousarray(genes).reshape(-1, DIGIT_NUMBER)
+    offsets = np.arange(DIGIT_NUMBER)
+    for k, mask in enumerate((mask1, mask2)):
+        # Row of the (P * 9, 9) block array holding every sub-block of the children
+        source = np.where(mask, parents1[:, None], parents2[:, None]) * DIGIT_NUMBER + offsets
+        np.take(blocks, source, axis=0, out=out[k * number:(k + 1) * number])
+
+    return out
+
 class RandomCrossover:
-    def __init__(self):
-        self.method = [Crossover(), RowColCrossover(), UniformCrossover(), TwoPointCrossover()]
-        self.weight = [0.3, 0.4, 0.2, 0.1]
+    def __init__(self, method=None, weight=None, adaptive=False):
+        """
+        Parameters:
+            - method (list) (optional=None): Crossover operators of the pool
+            - weight (list) (optional=None): Selection weight of every operator, equal weights for a custom pool
+            - adaptive (bool) (optional=False): Adapt the weights online to the fitness improvement of
+              the offspring of every operator, see ProbabilityMatching. The population gives the rewards.
+        """
+        if method is None:
+            method = [Crossover(), RowColCrossover(), UniformCrossover(), TwoPointCrossover()]
+            weight = weight or [0.3, 0.4, 0.2, 0.1]
+        self.method = method
+        self.weight = weight or [1] * len(method)
+        self.credit = ProbabilityMatching(self.weight) if adaptive else None
+
+    def probabilities(self):
+        """ Returns the selection probability of every operator. """
+        if self.credit is not None:
+            return self.credit.probabilities()
+        return np.array(self.weight) / np.sum(self.weight)
+
+    def summary(self):
+        """ Returns the statistics of every operator of an adaptive pool. """
+        return self.credit.summary([type(method).__name__ for method in self.method])
     
-    def crossover(self, parent1, parent2, crossover_rate):
-        method = random.choices(self.method, weights=self.weight, k=1)[0]
-        return method.crossover(parent1, parent2, crossover_rate)
-
-class Crossover:
-    def crossover(self, parent1, parent2, crossover_rate):
+    def crossover(self, parent1, parent2, crossover_rate, rng=None):
+        rng = make_rng(rng)
+        method = self.method[rng.choice(len(self.method), p=self.probabilities())]
+        return method.crossover(parent1, parent2, crossover_rate, rng)
+
+    def crossover_batch(self, genes, fitness_matrix, parents1, parents2, crossover_rate, rng, out=None):
+        """ Assign an operator to every parent pair and cross over the whole generation at once.
+        See BlockCrossover.crossover_batch for the parameters. """
+        methods = rng.choice(len(self.method), size=len(parents1), p=self.probabilities())
+        if self.credit is not None:
+            self.credit.record(methods)
+
+        mask1 = np.empty((len(parents1), DIGIT_NUMBER), dtype=bool)
+        mask2 = np.empty((len(parents1), DIGIT_NUMBER), dtype=bool)
+        for k, method in enumerate(self.method):
+            pairs = methods == k
+            if pairs.any():
+                mask1[pairs], mask2[pairs] = method.block_masks(fitness_matrix, parents1[pairs], parents2[pairs], rng)
+
+        return combine_blocks(genes, parents1, parents2, mask1, mask2, crossover_rate, rng, out)
+
+class Crossover(BlockCrossover):
+    def crossover(self, parent1, parent2, crossover_rate, rng=None):
         """ Create two new child candidates by crossing over parent genes.
         Parent genes are splitted by one point and then concatenate to generate child genes
         
@@ -21,34 +108,39 @@ class Crossover:
             - parent1 (Candidate): First parent to crossover
             - parent2 (Candidate): Second parent to crossover
             - crossover_rate (float): Ratio defines if these parents are crossover or not
+            - rng (Generator) (optional=None): Random number generator
         
         Return:
             Tuple of two child generate from the crossover process
         """
+        rng = make_rng(rng)
 
-        child1 = Candidate()
-        child2 = Candidate()
-
-        # Make a copy of the parent genes.
-        grid1 = np.copy(parent1.gene)
-        grid2 = np.copy(parent2.gene)
+        grid1 = parent1.gene
+        grid2 = parent2.gene
 
         grid_size = len(parent1.gene)
 
-        r = random.random()
+        r = rng.random()
         if r < crossover_rate:
             # Get a ranom crossover point to split parent genes
-            cross_point = random.randint(1, grid_size - 2)
-            child1.gene = np.concatenate((grid1[:cross_point], grid2[cross_point:]), axis=0)
-            child2.gene = np.concatenate((grid2[:cross_point], grid1[cross_point:]), axis=0)
+            cross_point = rng.integers(1, grid_size - 1)
+            child1 = Candidate(np.concatenate((grid1[:cross_point], grid2[cross_point:]), axis=0))
+            child2 = Candidate(np.concatenate((grid2[:cross_point], grid1[cross_point:]), axis=0))
         else:
-            child1.gene = grid1
-            child2.gene = grid2
+            # Make a copy of the parent genes.
+            child1 = Candidate(np.copy(grid1))
+            child2 = Candidate(np.copy(grid2))
 
         return child1, child2
 
-class RowColCrossover:
-    def crossover(self, parent1, parent2, crossover_rate):
+    def block_masks(self, fitness_matrix, parents1, parents2, rng):
+        # The first child takes every sub-block before the crossover point from the first parent
+        cross_point = rng.integers(1, DIGIT_NUMBER - 1, size=(len(parents1), 1))
+        mask1 = np.arange(DIGIT_NUMBER) < cross_point
+        return mask1, ~mask1
+
+class RowColCrossover(BlockCrossover):
+    def crossover(self, parent1, parent2, crossover_rate, rng=None):
         """ Create two new child candidates by crossing over parent genes.
             When two child individuals are generated from two parents, scores are obtained 
             for each of the three rows that constitute the sub-blocks of the parents, 
@@ -59,87 +151,83 @@ class RowColCrossover:
             - parent1 (Candidate): First parent to crossover
             - parent2 (Candidate): Second parent to crossover
             - crossover_rate (float): Ratio defines if these parents are crossover or not
+            - rng (Generator) (optional=None): Random number generator
         
         Return:
             Tuple of two child generate from the crossover process
         """
+        rng = make_rng(rng)
 
-        child1 = Candidate()
-        child2 = Candidate()
-
-        # Make a copy of the parent genes.
         grid1 = parent1.gene
         grid2 = parent2.gene
 
-        r = random.random()
+        r = rng.random()
         if r < crossover_rate:
-            row_score1 = parent1.fitness_matrix[0]
-            row_score2 = parent2.fitness_matrix[0]
-
-            col_score1 = parent1.fitness_matrix[1]
-            col_score2 = parent2.fitness_matrix[1]
-
-            for i in range(3):
-                # For each row of sub-block, the first child will inherit the row
-                # with the highest fitness score between two parents
-                if row_score1[i] > row_score2[i]:
-                    child1.gene[3*i:3*(i+1)] = np.copy(grid1[3*i:3*(i+1)])
-                else:
-                    child1.gene[3*i:3*(i+1)] = np.copy(grid2[3*i:3*(i+1)])
-                
-                # For each col of sub-block, the first child will inherit the col
-                # with the highest fitness score between two parents
-                if col_score1[i] > col_score2[i]:
-                    for j in range(3):
-                        child2.gene[j * 3 + i] = np.copy(grid1[j * 3 + i])
-                else:
-                    for j in range(3):
-                        child2.gene[j * 3 + i] = np.copy(grid2[j * 3 + i])
+            blocks = np.arange(DIGIT_NUMBER)
+
+            # For each row of sub-block, the first child will inherit the row
+            # with the highest fitness score between two parents
+            row_better = parent1.fitness_matrix[0] > parent2.fitness_matrix[0]
+            child1 = Candidate(np.where(row_better[blocks // 3][:, None], grid1, grid2))
+
+            # For each col of sub-block, the second child will inherit the col
+            # with the highest fitness score between two parents
+            col_better = parent1.fitness_matrix[1] > parent2.fitness_matrix[1]
+            child2 = Candidate(np.where(col_better[blocks % 3][:, None], grid1, grid2))
         else:
-            child1.gene = np.copy(grid1)
-            child2.gene = np.copy(grid2)
+            child1 = Candidate(np.copy(grid1))
+            child2 = Candidate(np.copy(grid2))
 
         return child1, child2
 
-class UniformCrossover:
-    def crossover(self, parent1, parent2, crossover_rate):
+    def block_masks(self, fitness_matrix, parents1, parents2, rng):
+        blocks = np.arange(DIGIT_NUMBER)
+        # The first child inherits each row of sub-blocks from the parent with the higher row score,
+        # the second child each column of sub-blocks from the parent with the higher column score
+        row_better = fitness_matrix[parents1, 0] > fitness_matrix[parents2, 0]
+        col_better = fitness_matrix[parents1, 1] > fitness_matrix[parents2, 1]
+        return row_better[:, blocks // 3], col_better[:, blocks % 3]
+
+class UniformCrossover(BlockCrossover):
+    def crossover(self, parent1, parent2, crossover_rate, rng=None):
         """ Create two new child candidates by crossing over parent genes. 
-        Parent genes will swap 2 consecutive sub-blocks to generate child genes
+        Parent genes will swap one random sub-block to generate child genes
         
         Parameters:
             - parent1 (Candidate): First parent to crossover
             - parent2 (Candidate): Second parent to crossover
             - crossover_rate (float): Ratio defines if these parents are crossover or not
+            - rng (Generator) (optional=None): Random number generator
         
         Return:
             Tuple of two child generate from the crossover process
         """
-
-        child1 = Candidate()
-        child2 = Candidate()
+        rng = make_rng(rng)
 
         # Make a copy of the parent genes.
         grid1 = np.copy(parent1.gene)
         grid2 = np.copy(parent2.gene)
 
         grid_size = len(parent1.gene)
-        r = random.random()
+        r = rng.random()
         if r < crossover_rate:
-            # Select a sub-block and swap them between two parents
-            cross_point = random.randint(0, grid_size - 1)
-            tmp = grid1[cross_point]
+            # Select a sub-block and swap them between two parents. The block is copied before the swap,
+            # swapping through a view would leave the second child a copy of the second parent
+            cross_point = rng.integers(0, grid_size)
+            tmp = np.copy(grid1[cross_point])
             grid1[cross_point] = grid2[cross_point]
             grid2[cross_point] = tmp
-            child1.gene = grid1
-            child2.gene = grid2
-        else:
-            child1.gene = grid1
-            child2.gene = grid2
 
-        return child1, child2
+        return Candidate(grid1), Candidate(grid2)
 
-class TwoPointCrossover:
-    def crossover(self, parent1, parent2, crossover_rate):
+    def block_masks(self, fitness_matrix, parents1, parents2, rng):
+        # Swap a single sub-block between the two parents
+        cross_point = rng.integers(0, DIGIT_NUMBER, size=(len(parents1), 1))
+        mask1 = np.arange(DIGIT_NUMBER) != cross_point
+        return mask1, ~mask1
+
+class TwoPointCrossover(BlockCrossover):
+    def crossover(self, parent1, parent2, crossover_rate, rng=None):
         """ Create two new child candidates by crossing over parent genes.
         Parent genes are splitted by two point and then concatenate to generate child genes 
         
@@ -147,35 +235,42 @@ class TwoPointCrossover:
             - parent1 (Candidate): First parent to crossover
             - parent2 (Candidate): Second parent to crossover
             - crossover_rate (float): Ratio defines if these parents are crossover or not
+            - rng (Generator) (optional=None): Random number generator
         
         Return:
             Tuple of two child generate from the crossover process
         """
+        rng = make_rng(rng)
 
-        child1 = Candidate()
-        child2 = Candidate()
-
-        # Make a copy of the parent genes.
-        grid1 = np.copy(parent1.gene)
-        grid2 = np.copy(parent2.gene)
+        grid1 = parent1.gene
+        grid2 = parent2.gene
 
         grid_size = len(parent1.gene)
-        r = random.random()
+        r = rng.random()
         if r < crossover_rate:
             # Select two crossover point
-            cross_point1 = random.randint(1, grid_size - 2)
-            cross_point2 = random.randint(cross_point1 + 1, grid_size - 1)
+            cross_point1 = rng.integers(1, grid_size - 1)
+            cross_point2 = rng.integers(cross_point1 + 1, grid_size)
             # Swap all sub-blocks between two crossover points to generate new child
-            child1.gene = np.concatenate((grid1[:cross_point1], grid2[cross_point1:cross_point2], grid1[cross_point2:]), axis=0)
-            child2.gene = np.concatenate((grid2[:cross_point1], grid1[cross_point1:cross_point2], grid2[cross_point2:]), axis=0)
+            child1 = Candidate(np.concatenate((grid1[:cross_point1], grid2[cross_point1:cross_point2], grid1[cross_point2:]), axis=0))
+            child2 = Candidate(np.concatenate((grid2[:cross_point1], grid1[cross_point1:cross_point2], grid2[cross_point2:]), axis=0))
         else:
-            child1.gene = grid1
-            child2.gene = grid2
+            # Make a copy of the parent genes.
+            child1 = Candidate(np.copy(grid1))
+            child2 = Candidate(np.copy(grid2))
 
         return child1, child2
 
-class ChoiceCrossover:
-    def crossover(self, parent1, parent2, crossover_rate):
+    def block_masks(self, fitness_matrix, parents1, parents2, rng):
+        # Swap all sub-blocks between two crossover points
+        cross_point1 = rng.integers(1, DIGIT_NUMBER - 1, size=(len(parents1), 1))
+        cross_point2 = rng.integers(cross_point1 + 1, DIGIT_NUMBER)
+        blocks = np.arange(DIGIT_NUMBER)
+        mask1 = (blocks < cross_point1) | (blocks >= cross_point2)
+        return mask1, ~mask1
+
+class ChoiceCrossover(BlockCrossover):
+    def crossover(self, parent1, parent2, crossover_rate, rng=None):
         """ Create two new child candidates by crossing over parent genes.
         The child will randomly choose each sub grid from first parent or second parent 
         
@@ -183,34 +278,37 @@ class ChoiceCrossover:
             - parent1 (Candidate): First parent to crossover
             - parent2 (Candidate): Second parent to crossover
             - crossover_rate (float): Ratio defines if these parents are crossover or not
+            - rng (Generator) (optional=None): Random number generator
         
         Return:
             Tuple of two child generate from the crossover process
         """
+        rng = make_rng(rng)
 
-        child1 = Candidate()
-        child2 = Candidate()
-
-        # Make a copy of the parent genes.
         grid1 = parent1.gene
         grid2 = parent2.gene
 
         grid_size = len(parent1.gene)
-        r = random.random()
+        r = rng.random()
         if r < crossover_rate:
-            for i in range(grid_size):
-                # Randomly select sub-block from two parents to generate new child
-                blocks = [grid1[i], grid2[i]]
-                child1.gene[i] = np.copy(random.choice(blocks))
-                child2.gene[i] = np.copy(random.choice(blocks))
+            # Randomly select sub-block from two parents to generate new child
+            choices = rng.random((2, grid_size)) < 0.5
+            child1 = Candidate(np.where(choices[0][:, None], grid1, grid2))
+            child2 = Candidate(np.where(choices[1][:, None], grid1, grid2))
         else:
-            child1.gene = np.copy(grid1)
-            child2.gene = np.copy(grid2)
+            # Make a copy of the parent genes.
+            child1 = Candidate(np.copy(grid1))
+            child2 = Candidate(np.copy(grid2))
 
         return child1, child2
 
-class HalfCrossover:
-    def crossover(self, parent1, parent2, crossover_rate):
+    def block_masks(self, fitness_matrix, parents1, parents2, rng):
+        # Both children pick every sub-block independently from either parent
+        size = (len(parents1), DIGIT_NUMBER)
+        return rng.random(size) < 0.5, rng.random(size) < 0.5
+
+class HalfCrossover(BlockCrossover):
+    def crossover(self, parent1, parent2, crossover_rate, rng=None):
         """ Create two new child candidates by crossing over parent genes. 
         The first child will randomly choose each sub grid from first parent or second parent
         and the seond child will get all unchoosen sub grid
@@ -219,31 +317,31 @@ class HalfCrossover:
             - parent1 (Candidate): First parent to crossover
             - parent2 (Candidate): Second parent to crossover
             - crossover_rate (float): Ratio defines if these parents are crossover or not
+            - rng (Generator) (optional=None): Random number generator
         
         Return:
             Tuple of two child generate from the crossover process
         """
+        rng = make_rng(rng)
 
-        child1 = Candidate()
-        child2 = Candidate()
-
-        # Make a copy of the parent genes.
         grid1 = parent1.gene
         grid2 = parent2.gene
 
         grid_size = len(parent1.gene)
-        r = random.random()
+        r = rng.random()
         if r < crossover_rate:
-            for i in range(grid_size):
-                # Randomly select sub-block from two parents to generate new child
-                if random.random() < 0.5:
-                    child1.gene[i] = np.copy(grid1[i])
-                    child2.gene[i] = np.copy(grid2[i])
-                else:
-                    child1.gene[i] = np.copy(grid2[i])
-                    child2.gene[i] = np.copy(grid1[i])
+            # Randomly select sub-block from two parents to generate new child
+            choices = (rng.random(grid_size) < 0.5)[:, None]
+            child1 = Candidate(np.where(choices, grid1, grid2))
+            child2 = Candidate(np.where(choices, grid2, grid1))
         else:
-            child1.gene = np.copy(grid1)
-            child2.gene = np.copy(grid2)
+            # Make a copy of the parent genes.
+            child1 = Candidate(np.copy(grid1))
+            child2 = Candidate(np.copy(grid2))
+
+        return child1, child2
 
-        return child1, child2
\ No newline at end of file
+    def block_masks(self, fitness_matrix, parents1, parents2, rng):
+        # The second child gets every sub-block the first child did not choose
+        mask1 = rng.random((len(parents1), DIGIT_NUMBER)) < 0.5
+        return mask1, ~mask1
@@ -0,0 +1,80 @@
+import numpy as np
+from .settings import DIVERSITY_HIGH, DIVERSITY_LOW, MAX_MUTATION_STRENGTH, MIN_POPULATION_RATIO, POPULATION_GROWTH, POPULATION_SHRINK
+
+""" Diversity of a population and the control of the mutation strength and of the population size it drives. """
+
+def hamming_diversity(genes, given):
+    """
+    Returns the mean Hamming distance of the chromosomes to the first (fittest) one, as the share
+    of the free cells holding another value: 0 when every chromosome is a copy of the best one.
+
+    Parameters:
+        - genes (array): Chromosomes of the population sorted by decreasing fitness, shape (P, 9, 9)
+        - given (array): The given chromosome of the Sudoku problem
+    """
+    free = given == 0
+    free_number = free.sum()
+    if len(genes) < 2 or free_number == 0:
+        return 0.0
+    different = (genes[1:, free] != genes[0, free]).sum()
+    return float(different) / ((len(genes) - 1) * free_number)
+
+class DiversityControl:
+    """ Adapts the mutation of a population and its size to its diversity. While the search improves
+    and the population stays diverse, the population shrinks and the mutation eases, so fewer
+    evaluations are spent. When the diversity collapses, every child is mutated, with more swaps,
+    and the population grows back, which disrupts the population before it goes stale. """
+
+    def __init__(self, population_size, mutation_rate, elite_number=0, low=DIVERSITY_LOW, high=DIVERSITY_HIGH,
+            min_ratio=MIN_POPULATION_RATIO, shrink=POPULATION_SHRINK, growth=POPULATION_GROWTH,
+            max_strength=MAX_MUTATION_STRENGTH):
+        """
+        Parameters:
+            - population_size (int): Largest population size, the size of the initial population
+            - mutation_rate (float): Mutation rate of a diverse population
+            - elite_number (int) (optional=0): Number of elites of the population
+            - low (float) (optional=DIVERSITY_LOW): Diversity under which the population is disrupted
+            - high (float) (optional=DIVERSITY_HIGH): Diversity over which the mutation eases
+            - min_ratio (float) (optional=MIN_POPULATION_RATIO): Smallest population size, relative to population_size
+            - shrink (float) (optional=POPULATION_SHRINK): Factor of the population size after an improving generation
+            - growth (float) (optional=POPULATION_GROWTH): Factor of the population size after a collapse of the diversity
+            - max_strength (int) (optional=MAX_MUTATION_STRENGTH): Largest number of mutations of a child
+        """
+        self.max_size = population_size
+        self.min_size = max(int(population_size * min_ratio), elite_number + 2)
+        self.base_rate = mutation_rate
+        self.low = low
+        self.high = high
+        self.shrink = shrink
+        self.growth = growth
+        self.max_strength = max_strength
+        self.diversity = None
+
+    def reset(self, population):
+        """ Gives a new population the initial size and mutation. """
+        population.population_size = self.max_size
+        population.mutation_rate = self.base_rate
+        population.mutation_strength = 1
+
+    def update(self, population, given, improved):
+        """
+        Measures the diversity of a population after a generation and adapts its mutation and its size.
+        Returns the diversity.
+
+        Parameters:
+            - population (Population): The population, sorted by decreasing fitness
+            - given (array): The given chromosome of the Sudoku problem
+            - improved (bool): Whether the best fitness improved during the generation
+        """
+        self.diversity = population.diversity(given)
+        if self.diversity < self.low:
+            population.mutation_rate = 1
+            population.mutation_strength = min(population.mutation_strength + 1, self.max_strength)
+            population.population_size = min(int(population.population_size * self.growth), self.max_size)
+        else:
+            if self.diversity > self.high:
+                population.mutation_rate = self.base_rate
+                population.mutation_strength = max(population.mutation_strength - 1, 1)
+            if improved:
+                population.population_size = max(int(population.population_size * self.shrink), self.min_size)
+        return self.diversity
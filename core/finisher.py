@@ -0,0 +1,119 @@
+import time
+import numpy as np
+from .topology import CELL_NUMBER, COLUMN_OF, PEERS, ROW_OF, SUB_GRID_OF
+from .tracker import LOWEST_DIGIT, POPCOUNT, allowed, value_bits
+from .settings import DIGIT_NUMBER, FINISHER_NODE_LIMIT
+
+# Row, column and sub-grid of every cell, as indexes into the 27 unit masks of the search
+UNITS_OF = np.stack((ROW_OF, DIGIT_NUMBER + COLUMN_OF, 2 * DIGIT_NUMBER + SUB_GRID_OF), axis=1).tolist()
+POPCOUNT_LIST = POPCOUNT.tolist()
+LOWEST_DIGIT_LIST = LOWEST_DIGIT.tolist()
+
+# Number of search nodes between two checks of the deadline
+DEADLINE_INTERVAL = 64
+
+class ExactFinisher:
+    """ Completes a nearly solved candidate with a bounded backtracking search. The conflict-free
+    cells of the candidate are kept and the remaining cells are searched within their pencil marks.
+    The digits already placed in every row, column and sub-grid are kept as bitmasks, so the
+    candidates of a cell are its tracker mask minus the masks of its three units. """
+
+    def __init__(self, node_limit=FINISHER_NODE_LIMIT):
+        """
+        Parameters:
+            - node_limit (int): Maximum number of search nodes before giving up
+        """
+        self.node_limit = node_limit
+        self.nodes = 0
+        self.deadline = None
+
+    def conflicts(self, gene, tracker):
+        """
+        Returns a boolean (9, 9) array marking the cells of a chromosome that share their value
+        with a peer or hold a value outside of their pencil marks.
+
+        Parameters:
+            - gene (array): Chromosome of the candidate
+            - tracker (array): Bitmask tracker of the puzzle
+        """
+        bits = value_bits(gene).reshape(CELL_NUMBER)
+        taken = np.bitwise_or.reduce(bits[PEERS], axis=1)
+        duplicated = (taken & bits) != 0
+        return duplicated.reshape(gene.shape) | ~allowed(tracker, gene)
+
+    def finish(self, gene, given, tracker, deadline=None):
+        """
+        Returns the solved chromosome or None when no solution is found within the node limit or the deadline.
+        The search first frees the conflicting cells only, then the conflicting cells and their peers.
+
+        Parameters:
+            - gene (array): Chromosome of the candidate to complete
+            - given (array): The given chromosome of the Sudoku problem
+            - tracker (array): Bitmask tracker of the puzzle
+            - deadline (float) (optional=None): time.perf_counter() value at which the search gives up
+        """
+        conflicts = self.conflicts(gene, tracker).reshape(CELL_NUMBER)
+        neighbours = np.zeros(CELL_NUMBER, dtype=bool)
+        neighbours[PEERS[conflicts]] = True
+        domains = tracker.reshape(CELL_NUMBER).astype(int).tolist()
+
+        self.nodes = 0
+        self.deadline = deadline
+        for cleared in (conflicts, conflicts | neighbours):
+            keep = (given.reshape(CELL_NUMBER) != 0) | ~cleared
+            values = np.where(keep, gene.reshape(CELL_NUMBER), 0).astype(int).tolist()
+            # The kept cells are conflict-free, so every digit appears at most once in the mask of a unit
+            used = [0] * (3 * DIGIT_NUMBER)
+            for k in range(CELL_NUMBER):
+                if values[k]:
+                    for unit in UNITS_OF[k]:
+                        used[unit] |= 1 << values[k]
+            if self.search(values, domains, used, [k for k in range(CELL_NUMBER) if values[k] == 0]):
+                return np.array(values, dtype=gene.dtype).reshape(gene.shape)
+
+        return None
+
+    def search(self, values, domains, used, empty):
+        """ Depth first search filling the most constrained empty cell first. """
+        self.nodes += 1
+        if self.nodes > self.node_limit:
+            return False
+        if self.deadline is not None and self.nodes % DEADLINE_INTERVAL == 0 and time.perf_counter() > self.deadline:
+            self.nodes = self.node_limit + 1
+            return False
+        if not empty:
+            return True
+
+        best = None
+        best_mask = 0
+        best_count = CELL_NUMBER
+        for k in empty:
+            row, column, sub_grid = UNITS_OF[k]
+            mask = domains[k] & ~(used[row] | used[column] | used[sub_grid])
+            count = POPCOUNT_LIST[mask]
+            if count < best_count:
+                if count == 0:
+                    return False
+                best, best_mask, best_count = k, mask, count
+
+        rest = [k for k in empty if k != best]
+        row, column, sub_grid = UNITS_OF[best]
+        while best_mask:
+            value = LOWEST_DIGIT_LIST[best_mask]
+            bit = 1 << value
+            best_mask &= ~bit
+            values[best] = value
+            used[row] |= bit
+            used[column] |= bit
+            used[sub_grid] |= bit
+            if self.search(values, domains, used, rest):
+                return True
+            used[row] &= ~bit
+            used[column] &= ~bit
+            used[sub_grid] &= ~bit
+            if self.nodes > self.node_limit:
+                # Out of nodes or out of time, unwind without trying the other digits
+                break
+        values[best] = 0
+
+        return False
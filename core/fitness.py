@@ -1,7 +1,28 @@
 import numpy as np
-from .helper import same_column_indexes, same_row_indexes, get_cells_from_indexes
+from .topology import COLUMN_OF, ROW_OF, grid_view
+from .tracker import POPCOUNT, allowed
 from .settings import DIGIT_NUMBER, BLOCK_NUMBER, GOAL
 
+def unit_counts(gene):
+    """ Returns how many times each digit appears in each grid row and each grid column of a chromosome,
+    as two (9, 10) arrays indexed by [row or column, digit].
+
+    Parameters:
+        - gene (array): Chromosome of a candidate
+    """
+    values = gene.reshape(-1).astype(int)
+    row_counts = np.bincount(ROW_OF * (DIGIT_NUMBER + 1) + values, minlength=DIGIT_NUMBER * (DIGIT_NUMBER + 1))
+    col_counts = np.bincount(COLUMN_OF * (DIGIT_NUMBER + 1) + values, minlength=DIGIT_NUMBER * (DIGIT_NUMBER + 1))
+
+    return row_counts.reshape(DIGIT_NUMBER, -1), col_counts.reshape(DIGIT_NUMBER, -1)
+
+def band_fitness(row_counts, col_counts):
+    """ Returns the fitness matrix of a chromosome from its digit counts. """
+    return np.array([
+        (row_counts > 0).sum(axis=1).reshape(BLOCK_NUMBER, BLOCK_NUMBER).sum(axis=1),
+        (col_counts > 0).sum(axis=1).reshape(BLOCK_NUMBER, BLOCK_NUMBER).sum(axis=1)
+    ])
+
 class DifferentFitness():
     def cal_fitness(self, candidate, tracker):
         """  The fitness of a candidate solution is determined by
@@ -9,69 +30,162 @@ class DifferentFitness():
         
         Parameters:
             - candidate (Candidate): The candidate to evaluate
-            - tracker (array): Helper array that determines all possible values for each cell in the chromosome
+            - tracker (array): Bitmasks of all possible values for each cell in the chromosome
         """
-        row_fitness = 0
-        col_fitness = 0
-        candidate.fitness_matrix = np.zeros((2, BLOCK_NUMBER), dtype=int)
-
-        # calculate rows duplicates
-        for a, b in same_column_indexes(0, 0):
-            row = set()
-            for x, y in same_row_indexes(a, b):
-                value = candidate.gene[x][y]
-                row.add(value)
-
-            row_fitness += len(row)
-            candidate.fitness_matrix[0][a // BLOCK_NUMBER] += len(row)
-        
-        for a, b in same_row_indexes(0, 0):
-            col = set()
-            for x, y in same_column_indexes(a, b):
-                value = candidate.gene[x][y]
-                col.add(value)
+        candidate.fitness_matrix = band_fitness(*unit_counts(candidate.gene))
 
-            col_fitness += len(col)
-            candidate.fitness_matrix[1][a] += len(col)
-
-        return row_fitness + col_fitness
+        return candidate.fitness_matrix.sum()
 
 class PerfectFitness:
     def cal_fitness(self, candidate, tracker=None):
         """  The fitness of a candidate solution is determined by
         sum of number of different numberals in each row and column
-        minus total number of cell that contains invalid value
+        minus total number of cell that contains invalid value.
+        The row and column digit counts are kept on the candidate so that
+        later swaps can update the fitness incrementally.
         
         Parameters:
             - candidate (Candidate): The candidate to evaluate
-            - tracker (array): Helper array that determines all possible values for each cell in the chromosome
+            - tracker (array): Bitmasks of all possible values for each cell in the chromosome
         """
-        row_fitness = 0
-        col_fitness = 0
-        duplicates_count = 0
-        candidate.fitness_matrix = np.zeros((2, BLOCK_NUMBER), dtype=int)
-
-        # calculate rows duplicates
-        for a, b in same_column_indexes(0, 0):
-            row = set()
-            for x, y in same_row_indexes(a, b):
-                value = candidate.gene[x][y]
-                row.add(value)
-                if value not in tracker[x][y]:
-                    duplicates_count += 1
-
-            row_fitness += len(row)
-            candidate.fitness_matrix[0][a // BLOCK_NUMBER] += len(row)
+        candidate.row_counts, candidate.col_counts = unit_counts(candidate.gene)
+        candidate.fitness_matrix = band_fitness(candidate.row_counts, candidate.col_counts)
+        candidate.violations = int((~allowed(tracker, candidate.gene)).sum())
+
+        # Every invalid cell is visited once by its row and once by its column
+        return candidate.fitness_matrix.sum() - 2 * candidate.violations
+
+    def swap_delta(self, candidate, sub_grid, first, second, tracker):
+        """  Returns the changes of row fitness, column fitness and number of invalid cells caused by
+        swapping two cells of a sub-grid, without applying the swap. Only the two rows and two
+        columns containing the cells can change, so this runs in constant time.
         
-        for a, b in same_row_indexes(0, 0):
-            col = set()
-            for x, y in same_column_indexes(a, b):
-                value = candidate.gene[x][y]
-                col.add(value)
-                if value not in tracker[x][y]:
-                    duplicates_count += 1
-
-            col_fitness += len(col)
-            candidate.fitness_matrix[1][a] += len(col)
-
-        return row_fitness + col_fitness - duplicates_count
\ No newline at end of file
+        Parameters:
+            - candidate (Candidate): An evaluated candidate
+            - sub_grid (int): Index of the sub-grid
+            - first (int): Index of the first cell inside the sub-grid
+            - second (int): Index of the second cell inside the sub-grid
+            - tracker (array): Bitmasks of all possible values for each cell in the chromosome
+        """
+        x = int(candidate.gene[sub_grid][first])
+        y = int(candidate.gene[sub_grid][second])
+        if x == y:
+            return 0, 0, 0
+
+        p = sub_grid * DIGIT_NUMBER + first
+        q = sub_grid * DIGIT_NUMBER + second
+
+        row_delta = 0
+        if ROW_OF[p] != ROW_OF[q]:
+            counts = candidate.row_counts
+            row_delta = int(counts[ROW_OF[p]][y] == 0) - int(counts[ROW_OF[p]][x] == 1) \
+                + int(counts[ROW_OF[q]][x] == 0) - int(counts[ROW_OF[q]][y] == 1)
+
+        col_delta = 0
+        if COLUMN_OF[p] != COLUMN_OF[q]:
+            counts = candidate.col_counts
+            col_delta = int(counts[COLUMN_OF[p]][y] == 0) - int(counts[COLUMN_OF[p]][x] == 1) \
+                + int(counts[COLUMN_OF[q]][x] == 0) - int(counts[COLUMN_OF[q]][y] == 1)
+
+        domain_p = int(tracker.flat[p])
+        domain_q = int(tracker.flat[q])
+        violation_delta = (domain_p >> x & 1) + (domain_q >> y & 1) - (domain_p >> y & 1) - (domain_q >> x & 1)
+
+        return row_delta, col_delta, violation_delta
+
+    def swap_deltas(self, candidate, firsts, seconds, tracker):
+        """  Returns the fitness change of every given swap of two cells of a sub-grid, without applying
+        the swaps. Vectorized version of swap_delta, used to score a whole swap neighbourhood at once.
+
+        Parameters:
+            - candidate (Candidate): An evaluated candidate
+            - firsts (array): Flat chromosome index of the first cell of every swap
+            - seconds (array): Flat chromosome index of the second cell of every swap, in the same sub-grid
+            - tracker (array): Bitmasks of all possible values for each cell in the chromosome
+        """
+        gene = candidate.gene.reshape(-1)
+        x = gene[firsts].astype(int)
+        y = gene[seconds].astype(int)
+
+        deltas = np.zeros(len(firsts), dtype=int)
+        for counts, unit in ((candidate.row_counts, ROW_OF), (candidate.col_counts, COLUMN_OF)):
+            unit_p = unit[firsts]
+            unit_q = unit[seconds]
+            delta = (counts[unit_p, y] == 0).astype(int) - (counts[unit_p, x] == 1) \
+                + (counts[unit_q, x] == 0) - (counts[unit_q, y] == 1)
+            deltas += np.where(unit_p != unit_q, delta, 0)
+
+        domain_p = tracker.reshape(-1)[firsts].astype(int)
+        domain_q = tracker.reshape(-1)[seconds].astype(int)
+        violation_deltas = (domain_p >> x & 1) + (domain_q >> y & 1) - (domain_p >> y & 1) - (domain_q >> x & 1)
+
+        return np.where(x != y, deltas - 2 * violation_deltas, 0)
+
+    def swap(self, candidate, sub_grid, first, second, tracker):
+        """  Swaps two cells of a sub-grid and updates the fitness, the fitness matrix and
+        the digit counts of the candidate incrementally. Returns the fitness change.
+        
+        Parameters:
+            - candidate (Candidate): An evaluated candidate
+            - sub_grid (int): Index of the sub-grid
+            - first (int): Index of the first cell inside the sub-grid
+            - second (int): Index of the second cell inside the sub-grid
+            - tracker (array): Bitmasks of all possible values for each cell in the chromosome
+        """
+        row_delta, col_delta, violation_delta = self.swap_delta(candidate, sub_grid, first, second, tracker)
+        x = candidate.gene[sub_grid][first]
+        y = candidate.gene[sub_grid][second]
+        p = sub_grid * DIGIT_NUMBER + first
+        q = sub_grid * DIGIT_NUMBER + second
+
+        # Move x from the lines of p to the lines of q and y the other way around
+        candidate.row_counts[ROW_OF[p]][x] -= 1
+        candidate.row_counts[ROW_OF[p]][y] += 1
+        candidate.row_counts[ROW_OF[q]][y] -= 1
+        candidate.row_counts[ROW_OF[q]][x] += 1
+        candidate.col_counts[COLUMN_OF[p]][x] -= 1
+        candidate.col_counts[COLUMN_OF[p]][y] += 1
+        candidate.col_counts[COLUMN_OF[q]][y] -= 1
+        candidate.col_counts[COLUMN_OF[q]][x] += 1
+        candidate.gene[sub_grid][first] = y
+        candidate.gene[sub_grid][second] = x
+
+        # Both cells share the row and the column of sub-grids of their sub-grid
+        candidate.fitness_matrix[0][sub_grid // BLOCK_NUMBER] += row_delta
+        candidate.fitness_matrix[1][sub_grid % BLOCK_NUMBER] += col_delta
+        candidate.violations += violation_delta
+
+        delta = row_delta + col_delta - 2 * violation_delta
+        candidate.fitness += delta
+
+        return delta
+
+class PopulationFitness:
+    def cal_fitness(self, genes, tracker):
+        """  Batched version of PerfectFitness. Evaluates every chromosome of a
+        (P, 9, 9) gene array in one pass and returns the same scores.
+
+        Parameters:
+            - genes (array): Chromosomes of the population, shape (P, 9, 9)
+            - tracker (array): Bitmasks of all possible values for each cell in the chromosome
+
+        Return:
+            Tuple of the fitness vector (P,) and the fitness matrices (P, 2, 3)
+        """
+        size = len(genes)
+        bits = np.left_shift(np.uint16(1), genes.astype(np.uint16))
+
+        # Grid rows are reduced over the two last axes of the grid view, grid columns over the two first
+        grid = grid_view(bits)
+        row_fitness = POPCOUNT[np.bitwise_or.reduce(grid, axis=(3, 4))]
+        col_fitness = POPCOUNT[np.bitwise_or.reduce(grid, axis=(1, 2))]
+
+        fitness_matrix = np.empty((size, 2, BLOCK_NUMBER), dtype=int)
+        fitness_matrix[:, 0] = row_fitness.sum(axis=2)
+        fitness_matrix[:, 1] = col_fitness.sum(axis=2)
+
+        # Every invalid cell is visited once by its row and once by its column
+        invalid = (bits & tracker) == 0
+        duplicates_count = 2 * invalid.reshape(size, -1).sum(axis=1)
+
+        return fitness_matrix.sum(axis=(1, 2)) - duplicates_count, fitness_matrix
@@ -0,0 +1,243 @@
+import multiprocessing
+import queue
+import numpy as np
+
+from .crossover import ChoiceCrossover, HalfCrossover, RandomCrossover, RowColCrossover
+from .finisher import ExactFinisher
+from .mutation import AllSwapMutation, MultiSwapMutation, RandomMutation
+from .population import ArrayPopulation
+from .rng import make_rng
+from .selection import RankingSelection, Tournament, TopSelection
+from .settings import CROSSOVER_RATE, DEDUPLICATE, ELITE_NUMBER, FINISHER_DISTANCE, FINISHER_NODE_LIMIT, FINISHER_STALE, GOAL, MAX_STALE_COUNT
+from .settings import MIGRATION_INTERVAL, MIGRATION_SIZE, MIGRATION_TOPOLOGY, MUTATION_RATE, POPULATION_SIZE
+
+class Island:
+    """ Configuration of the population evolved by one island. """
+
+    def __init__(self, select_method=None, crossover_method=None, mutate_method=None, mutation_rate=MUTATION_RATE,
+            population_size=POPULATION_SIZE, elite_number=ELITE_NUMBER, crossover_rate=CROSSOVER_RATE,
+            max_stale_count=MAX_STALE_COUNT, finisher_distance=FINISHER_DISTANCE, finisher_node_limit=FINISHER_NODE_LIMIT,
+            finisher_stale=FINISHER_STALE, deduplicate=DEDUPLICATE):
+        """
+        Parameters:
+            - select_method (SelectionMethod) (optional=None): Selection method, None uses TopSelection
+            - crossover_method (CrossoverMethod) (optional=None): Crossover method, None uses HalfCrossover
+            - mutate_method (MutationMethod) (optional=None): Mutation method, None uses MultiSwapMutation
+            - mutation_rate (float) (optional=MUTATION_RATE): Mutation rate
+            - population_size (int) (optional=POPULATION_SIZE): Number of candidates of the island
+            - elite_number (int) (optional=ELITE_NUMBER): Number of candidates kept unchanged at every generation
+            - crossover_rate (float) (optional=CROSSOVER_RATE): Crossover rate
+            - max_stale_count (int) (optional=MAX_STALE_COUNT): Number of generations without improvement before the island is re-seeded
+            - finisher_distance (int) (optional=FINISHER_DISTANCE): Fitness distance to the goal at which the exact finisher
+              is tried on the best candidate, 0 disables it
+            - finisher_node_limit (int) (optional=FINISHER_NODE_LIMIT): Maximum number of search nodes of the exact finisher
+            - finisher_stale (int) (optional=FINISHER_STALE): Number of generations without improvement after which the finisher is tried
+            - deduplicate (bool) (optional=DEDUPLICATE): Replace the children that duplicate another chromosome
+        """
+        self.select_method = select_method or TopSelection()
+        self.crossover_method = crossover_method or HalfCrossover()
+        self.mutate_method = mutate_method or MultiSwapMutation()
+        self.mutation_rate = mutation_rate
+        self.population_size = population_size
+        self.elite_number = elite_number
+        self.crossover_rate = crossover_rate
+        self.max_stale_count = max_stale_count
+        self.finisher_distance = finisher_distance
+        self.finisher_node_limit = finisher_node_limit
+        self.finisher_stale = finisher_stale
+        self.deduplicate = deduplicate
+
+    def population(self):
+        """ Returns a new population configured for this island. """
+        population = ArrayPopulation()
+        population.select_method = self.select_method
+        population.crossover_method = self.crossover_method
+        population.mutate_method = self.mutate_method
+        population.mutation_rate = self.mutation_rate
+        population.population_size = self.population_size
+        population.elitism = self.elite_number
+        population.crossover_rate = self.crossover_rate
+        population.deduplicate = self.deduplicate
+        return population
+
+def default_islands(number, members=None, **settings):
+    """
+    Returns "number" island configurations, cycling through a few operator combinations
+    so that the islands explore the search space differently.
+
+    Parameters:
+        - number (int): Number of islands
+        - members (list) (optional=None): Island parameters of every island that replace the shared settings,
+          e.g. [{"population_size": 500}, {"mutation_rate": 0.5}], missing islands use the shared settings
+        - settings (dict): Island parameters shared by every island, see Island. A mutation_rate given here
+          also replaces the mutation rate of the variants that have their own
+    """
+    variants = [
+        lambda options: Island(**options),
+        lambda options: Island(Tournament(), RandomCrossover(), RandomMutation(), **options),
+        lambda options: Island(TopSelection(), RowColCrossover(), MultiSwapMutation(), **dict({"mutation_rate": 0.8}, **options)),
+        lambda options: Island(RankingSelection(), ChoiceCrossover(), AllSwapMutation(), **options),
+    ]
+    members = members or []
+    return [variants[i % len(variants)](dict(settings, **(members[i] if i < len(members) else {}))) for i in range(number)]
+
+def evolve_island(index, island, given, tracker, max_generation, migration, inboxes, events, stop, seed):
+    """
+    Evolves the population of one island until the goal is reached, another island
+    reaches it or max_generation generations have passed. Runs in a worker process.
+
+    Parameters:
+        - index (int): Index of the island
+        - island (Island): Configuration of the island
+        - given (array): The given chromosome of the Sudoku problem
+        - tracker (array): Bitmask tracker of the puzzle
+        - max_generation (int): Maximum number of generations
+        - migration (tuple): Migration interval, migration size and topology
+        - inboxes (list): Migrant queue of every island
+        - events (Queue): Queue receiving the progress of the island
+        - stop (Event): Set when the search has to stop
+        - seed (int): Seed of the random number generator of the island
+    """
+    rng = make_rng(seed)
+    interval, size, topology = migration
+
+    population = island.population()
+    population.rng = rng
+    population.generate_initial_candidates(island.population_size, given, tracker)
+    finisher = ExactFinisher(island.finisher_node_limit)
+    tried_gene = None
+    prev_best_fitness = 0
+    stale = 0
+
+    for generation in range(max_generation):
+        if stop.is_set():
+            return
+
+        best = population.best()
+        if best.fitness != GOAL and GOAL - best.fitness <= island.finisher_distance and stale == island.finisher_stale \
+                and not np.array_equal(tried_gene, best.gene):
+            tried_gene = best.gene
+            solution = finisher.finish(best.gene, given, tracker)
+            if solution is not None:
+                best.gene, best.fitness = solution, GOAL
+
+        if best.fitness == GOAL:
+            events.put(("solved", index, generation, best.fitness, best.gene))
+            stop.set()
+            return
+
+        if generation % interval == 0:
+            events.put(("progress", index, generation, best.fitness, best.gene))
+
+            if generation > 0 and len(inboxes) > 1:
+                # Send the top candidates to a neighbour island
+                if topology == "ring":
+                    target = (index + 1) % len(inboxes)
+                else:
+                    target = (index + rng.integers(1, len(inboxes))) % len(inboxes)
+                try:
+                    inboxes[target].put_nowait(np.copy(population.genes[:size]))
+                except queue.Full:
+                    pass
+
+                # Receive migrants and let them replace the worst candidates
+                migrants = []
+                while True:
+                    try:
+                        migrants.append(inboxes[index].get_nowait())
+                    except queue.Empty:
+                        break
+                if migrants:
+                    population.replace_worst(np.concatenate(migrants), tracker)
+
+        prev_best_fitness = population.best().fitness
+        population.next_gen(given, tracker)
+
+        if population.best().fitness != prev_best_fitness:
+            stale = 0
+        else:
+            stale += 1
+
+        # Re-seed a stale island but keep its top candidates
+        if stale > island.max_stale_count:
+            elites = np.copy(population.genes[:int(island.population_size * 0.1)])
+            population.generate_initial_candidates(island.population_size, given, tracker)
+            population.replace_worst(elites, tracker)
+            stale = 0
+
+    best = population.best()
+    events.put(("done", index, max_generation, best.fitness, best.gene))
+
+class IslandModel:
+    """ Evolves several populations in separate processes. Every few generations the islands
+    send their top candidates to another island, and the first island to reach the goal stops the others. """
+
+    def __init__(self, islands, migration_interval=MIGRATION_INTERVAL, migration_size=MIGRATION_SIZE, topology=MIGRATION_TOPOLOGY):
+        """
+        Parameters:
+            - islands (list): Island configurations, one worker process each
+            - migration_interval (int): Number of generations between two migrations
+            - migration_size (int): Number of top candidates sent at each migration
+            - topology (str): "ring" or "random"
+        """
+        self.islands = islands
+        self.migration = (migration_interval, migration_size, topology)
+
+    def solve(self, given, tracker, max_generation, on_progress=None, should_stop=None, rng=None):
+        """
+        Runs the islands and returns the best result as a tuple (gene, fitness, generation, island).
+
+        Parameters:
+            - given (array): The given chromosome of the Sudoku problem
+            - tracker (array): Bitmask tracker of the puzzle
+            - max_generation (int): Maximum number of generations of every island
+            - on_progress (function) (optional=None): Called with (island, generation, fitness, gene) on every report
+            - should_stop (function) (optional=None): Polled regularly, the search is cancelled when it returns True
+            - rng (Generator) (optional=None): Random number generator drawing the seeds of the islands
+        """
+        rng = make_rng(rng)
+        context = multiprocessing.get_context("spawn")
+        inboxes = [context.Queue(maxsize=len(self.islands)) for _ in self.islands]
+        events = context.Queue()
+        stop = context.Event()
+        seeds = rng.integers(0, 2 ** 31 - 1, size=len(self.islands))
+
+        workers = [
+            context.Process(
+                target=evolve_island,
+                args=(i, island, given, tracker, max_generation, self.migration, inboxes, events, stop, int(seeds[i])),
+                daemon=True)
+            for i, island in enumerate(self.islands)
+        ]
+        for worker in workers:
+            worker.start()
+
+        best = None
+        finished = 0
+        try:
+            while finished < len(workers):
+                if should_stop is not None and should_stop():
+                    break
+                try:
+                    kind, index, generation, fitness, gene = events.get(timeout=0.1)
+                except queue.Empty:
+                    if not any(worker.is_alive() for worker in workers):
+                        break
+                    continue
+
+                if best is None or fitness > best[1]:
+                    best = (gene, fitness, generation, index)
+                if on_progress is not None:
+                    on_progress(index, generation, fitness, gene)
+                if kind == "solved":
+                    break
+                if kind == "done":
+                    finished += 1
+        finally:
+            stop.set()
+            for worker in workers:
+                worker.join(timeout=1)
+                if worker.is_alive():
+                    worker.terminate()
+
+        return best
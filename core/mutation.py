@@ -1,121 +1,276 @@
-import random
+import numpy as np
+from .adaptive import ProbabilityMatching
+from .rng import make_rng
 from .settings import DIGIT_NUMBER
 
+class FreeCells:
+    """ The non-given cell indexes of every sub-grid of a puzzle, computed once per puzzle
+    so that mutations never have to scan the given chromosome again. """
+
+    def __init__(self, given):
+        """
+        Parameters:
+            - given (array): Helper array that determines all fixed values in the statring Sudoku puzzle
+        """
+        self.given = given
+        free = given == 0
+        # Number of free cells of each sub-grid
+        self.count = free.sum(axis=1)
+        # Free cell indexes of each sub-grid, left aligned and padded with zeros
+        self.indexes = np.zeros((DIGIT_NUMBER, DIGIT_NUMBER), dtype=int)
+        for i in range(DIGIT_NUMBER):
+            self.indexes[i, :self.count[i]] = np.flatnonzero(free[i])
+        # Digits missing from each sub-grid, in ascending order
+        self.missing = [np.setdiff1d(np.arange(1, DIGIT_NUMBER + 1), given[i]) for i in range(DIGIT_NUMBER)]
+
+        # Flat chromosome indexes of the two cells of every distinct swap of free cells inside a sub-grid
+        firsts, seconds = [], []
+        for i in range(DIGIT_NUMBER):
+            cells = i * DIGIT_NUMBER + self.indexes[i, :self.count[i]]
+            for k in range(len(cells)):
+                firsts.extend(cells[k] for _ in range(k + 1, len(cells)))
+                seconds.extend(cells[k + 1:])
+        self.pairs = (np.array(firsts, dtype=int), np.array(seconds, dtype=int))
+
+    def cells(self, sub_grid):
+        """ Returns the free cell indexes of a sub-grid. """
+        return self.indexes[sub_grid, :self.count[sub_grid]]
+
+    def swap(self, genes, rows, sub_grids, rng):
+        """ Swaps two random free cells inside the given sub-grid of every given chromosome.
+        Each (row, sub-grid) pair must appear at most once. Sub-grids with less than two
+        free cells are left unchanged.
+
+        Parameters:
+            - genes (array): Chromosomes of the population, shape (P, 9, 9)
+            - rows (array): Indexes of the chromosomes to mutate
+            - sub_grids (array): Sub-grid to mutate for each chromosome
+            - rng (Generator): Random number generator
+        """
+        count = self.count[sub_grids]
+        swappable = count > 1
+        rows, sub_grids, count = rows[swappable], sub_grids[swappable], count[swappable]
+
+        # Two indexes are chosen with replacement, like in the per candidate operators
+        picks = (rng.random((2, len(rows))) * count).astype(int)
+        first = self.indexes[sub_grids, picks[0]]
+        second = self.indexes[sub_grids, picks[1]]
+
+        tmp = genes[rows, sub_grids, first]
+        genes[rows, sub_grids, first] = genes[rows, sub_grids, second]
+        genes[rows, sub_grids, second] = tmp
+
 class RandomMutation:
-    def __init__(self):
-        self.method = [SwapMutation(), RandomResetting()]
-        self.weight = [0.8, 0.2]
+    def __init__(self, method=None, weight=None, adaptive=False):
+        """
+        Parameters:
+            - method (list) (optional=None): Mutation operators of the pool
+            - weight (list) (optional=None): Selection weight of every operator, equal weights for a custom pool
+            - adaptive (bool) (optional=False): Adapt the weights online to the fitness improvement of
+              the offspring of every operator, see ProbabilityMatching. The population gives the rewards.
+        """
+        if method is None:
+            method = [SwapMutation(), RandomResetting()]
+            weight = weight or [0.8, 0.2]
+        self.method = method
+        self.weight = weight or [1] * len(method)
+        self.credit = ProbabilityMatching(self.weight) if adaptive else None
+
+    def probabilities(self):
+        """ Returns the selection probability of every operator. """
+        if self.credit is not None:
+            return self.credit.probabilities()
+        return np.array(self.weight) / np.sum(self.weight)
+
+    def summary(self):
+        """ Returns the statistics of every operator of an adaptive pool. """
+        return self.credit.summary([type(method).__name__ for method in self.method])
 
-    def mutate(self, candidate, given):
-        method = random.choices(self.method, weights=self.weight)[0]
-        return method.mutate(candidate, given)
+    def mutate(self, candidate, free_cells, tracker=None, rng=None):
+        rng = make_rng(rng)
+        method = self.method[rng.choice(len(self.method), p=self.probabilities())]
+        return method.mutate(candidate, free_cells, tracker, rng)
+
+    def mutate_batch(self, genes, free_cells, rows, rng):
+        """  Assign a mutation operator to every chromosome and mutate them in place.
+
+        Parameters:
+            - genes (array): Chromosomes of the population, shape (P, 9, 9)
+            - free_cells (FreeCells): Free cells of the Sudoku puzzle
+            - rows (array): Indexes of the chromosomes to mutate
+            - rng (Generator): Random number generator
+        """
+        methods = rng.choice(len(self.method), size=len(rows), p=self.probabilities())
+        if self.credit is not None:
+            self.credit.record(methods)
+        for k, method in enumerate(self.method):
+            method.mutate_batch(genes, free_cells, rows[methods == k], rng)
 
 class SwapMutation:
-    def mutate(self, candidate, given):
+    def mutate(self, candidate, free_cells, tracker=None, rng=None):
         """  Mutate a candidate gene. Two numerals within a
         sub-block that are not given in the starting point are 
         selected randomly and their positions are swapped.
         
         Parameters:
             - candidate (Candidate): The candidate to mutate
-            - given (array): Helper array that determines all fixed values in the statring Sudoku puzzle
+            - free_cells (FreeCells): Free cells of the Sudoku puzzle
+            - tracker (array) (optional=None): When given, the fitness of an evaluated candidate is updated incrementally
+            - rng (Generator) (optional=None): Random number generator
         """
-        random_sub_grid = random.randint(0, DIGIT_NUMBER - 1)
-        possible_swaps = []
+        rng = make_rng(rng)
+        random_sub_grid = rng.integers(DIGIT_NUMBER)
+        possible_swaps = free_cells.cells(random_sub_grid)
         success = False
 
-        # Get all unknown cells index
-        for grid_element_index in range(DIGIT_NUMBER):
-            if given[random_sub_grid][grid_element_index] == 0:
-                possible_swaps.append(grid_element_index)
-
         # Select two indexes and swap their values
         if len(possible_swaps) > 1:
             success = True
-            random.shuffle(possible_swaps)
-            first_index, second_index = random.choices(possible_swaps, k=2)
-            tmp = candidate.gene[random_sub_grid][first_index]
-            candidate.gene[random_sub_grid][first_index] = candidate.gene[random_sub_grid][second_index]
-            candidate.gene[random_sub_grid][second_index] = tmp
+            first_index, second_index = rng.choice(possible_swaps, size=2)
+            candidate.swap(random_sub_grid, first_index, second_index, tracker)
         
         return success
 
+    def mutate_batch(self, genes, free_cells, rows, rng):
+        """  Mutate the given chromosomes in place, one swap per chromosome.
+
+        Parameters:
+            - genes (array): Chromosomes of the population, shape (P, 9, 9)
+            - free_cells (FreeCells): Free cells of the Sudoku puzzle
+            - rows (array): Indexes of the chromosomes to mutate
+            - rng (Generator): Random number generator
+        """
+        free_cells.swap(genes, rows, rng.integers(0, DIGIT_NUMBER, size=len(rows)), rng)
+
 class MultiSwapMutation:
     def __init__(self):
         self.weights = [0.625, 0.304, 0.066, 0.005, 0.0001]
 
-    def mutate(self, candidate, given):
+    def mutate(self, candidate, free_cells, tracker=None, rng=None):
         """  Mutate a candidate gene. Performs 1 to 5 swap mutations to the candidate gene
         
         Parameters:
             - candidate (Candidate): The candidate to mutate
-            - given (array): Helper array that determines all fixed values in the statring Sudoku puzzle
+            - free_cells (FreeCells): Free cells of the Sudoku puzzle
+            - tracker (array) (optional=None): When given, the fitness of an evaluated candidate is updated incrementally
+            - rng (Generator) (optional=None): Random number generator
         """
+        rng = make_rng(rng)
         # Randomly select 1 to 5 swap actions to perform
-        num_swap = random.choices(list(range(1, 6)), weights=self.weights, k=1)[0]
+        weight = np.array(self.weights) / np.sum(self.weights)
+        num_swap = rng.choice(len(weight), p=weight) + 1
         success = False
 
-        for _ in range(num_swap):
-            random_sub_grid = random.randint(0, DIGIT_NUMBER - 1)
-            possible_swaps = []
-            # Get all unknown cells index
-            for grid_element_index in range(DIGIT_NUMBER):
-                if given[random_sub_grid][grid_element_index] == 0:
-                    possible_swaps.append(grid_element_index)
+        for random_sub_grid in rng.integers(0, DIGIT_NUMBER, size=num_swap):
+            possible_swaps = free_cells.cells(random_sub_grid)
 
             # Select two indexes and swap their values
             if len(possible_swaps) > 1:
                 success = True
-                random.shuffle(possible_swaps)
-                first_index, second_index = random.choices(possible_swaps, k=2)
-                tmp = candidate.gene[random_sub_grid][first_index]
-                candidate.gene[random_sub_grid][first_index] = candidate.gene[random_sub_grid][second_index]
-                candidate.gene[random_sub_grid][second_index] = tmp
+                first_index, second_index = rng.choice(possible_swaps, size=2)
+                candidate.swap(random_sub_grid, first_index, second_index, tracker)
         
         return success
 
+    def mutate_batch(self, genes, free_cells, rows, rng):
+        """  Mutate the given chromosomes in place with 1 to 5 swaps each.
+
+        Parameters:
+            - genes (array): Chromosomes of the population, shape (P, 9, 9)
+            - free_cells (FreeCells): Free cells of the Sudoku puzzle
+            - rows (array): Indexes of the chromosomes to mutate
+            - rng (Generator): Random number generator
+        """
+        weight = np.array(self.weights) / np.sum(self.weights)
+        num_swap = rng.choice(len(weight), size=len(rows), p=weight) + 1
+
+        # Swaps of the same chromosome may overlap, so they are applied in rounds:
+        # round k performs the k-th swap of every chromosome that needs one
+        for k in range(len(weight)):
+            rows = rows[num_swap > k]
+            num_swap = num_swap[num_swap > k]
+            if len(rows) == 0:
+                break
+            free_cells.swap(genes, rows, rng.integers(0, DIGIT_NUMBER, size=len(rows)), rng)
+
 class AllSwapMutation:
-    def mutate(self, candidate, given):
+    def mutate(self, candidate, free_cells, tracker=None, rng=None):
         """  Mutate a candidate gene. Performs swap mutations to each sub-block in 
         the gene with a rate of 16%.
         
         Parameters:
             - candidate (Candidate): The candidate to mutate
-            - given (array): Helper array that determines all fixed values in the statring Sudoku puzzle
+            - free_cells (FreeCells): Free cells of the Sudoku puzzle
+            - tracker (array) (optional=None): When given, the fitness of an evaluated candidate is updated incrementally
+            - rng (Generator) (optional=None): Random number generator
         """
+        rng = make_rng(rng)
+        selected = rng.random(DIGIT_NUMBER) < 0.16
         for sub_grid in range(DIGIT_NUMBER):
-            if random.random() < 0.16:
-                possible_swaps = []
-                for grid_element_index in range(DIGIT_NUMBER):
-                    if given[sub_grid][grid_element_index] == 0:
-                        possible_swaps.append(grid_element_index)
+            if selected[sub_grid]:
+                possible_swaps = free_cells.cells(sub_grid)
                 if len(possible_swaps) > 1:
-                    random.shuffle(possible_swaps)
-                    first_index, second_index = random.choices(possible_swaps, k=2)
-                    tmp = candidate.gene[sub_grid][first_index]
-                    candidate.gene[sub_grid][first_index] = candidate.gene[sub_grid][second_index]
-                    candidate.gene[sub_grid][second_index] = tmp
+                    first_index, second_index = rng.choice(possible_swaps, size=2)
+                    candidate.swap(sub_grid, first_index, second_index, tracker)
         
         return True
 
+    def mutate_batch(self, genes, free_cells, rows, rng):
+        """  Mutate the given chromosomes in place, each sub-block is swapped with a rate of 16%.
+
+        Parameters:
+            - genes (array): Chromosomes of the population, shape (P, 9, 9)
+            - free_cells (FreeCells): Free cells of the Sudoku puzzle
+            - rows (array): Indexes of the chromosomes to mutate
+            - rng (Generator): Random number generator
+        """
+        # Different sub-grids never overlap, so all swaps are applied at once
+        selected, sub_grids = np.nonzero(rng.random((len(rows), DIGIT_NUMBER)) < 0.16)
+        free_cells.swap(genes, rows[selected], sub_grids, rng)
+
 class RandomResetting:
-    def mutate(self, candidate, given):
+    def mutate(self, candidate, free_cells, tracker=None, rng=None):
         """  Mutate a candidate gene. Selects a sub-block and sets randomly values to
         all cells contain unknown value in the statring Sudoku puzzle
         
         Parameters:
             - candidate (Candidate): The candidate to mutate
-            - given (array): Helper array that determines all fixed values in the statring Sudoku puzzle
+            - free_cells (FreeCells): Free cells of the Sudoku puzzle
+            - tracker (array) (optional=None): Unused, the fitness has to be recomputed after a reset
+            - rng (Generator) (optional=None): Random number generator
         """
-        random_sub_grid = random.randint(0, DIGIT_NUMBER - 1)
-        possible_values = list(range(1, DIGIT_NUMBER + 1))
-        for grid_element_index in range(DIGIT_NUMBER):
-            if given[random_sub_grid][grid_element_index] != 0:
-                possible_values.remove(given[random_sub_grid][grid_element_index])
-
-        random.shuffle(possible_values)
-        for grid_element_index in range(DIGIT_NUMBER):
-            if given[random_sub_grid][grid_element_index] == 0:
-                candidate.gene[random_sub_grid][grid_element_index] = possible_values.pop()
+        rng = make_rng(rng)
+        random_sub_grid = rng.integers(DIGIT_NUMBER)
+        possible_values = free_cells.missing[random_sub_grid].copy()
+
+        # The free cells take the shuffled missing digits from the last one
+        rng.shuffle(possible_values)
+        candidate.gene[random_sub_grid][free_cells.cells(random_sub_grid)] = possible_values[::-1]
+
+        # The digit counts can not follow a reset, the fitness has to be recomputed
+        candidate.row_counts = None
+        candidate.col_counts = None
         
-        return True
\ No newline at end of file
+        return True
+
+    def mutate_batch(self, genes, free_cells, rows, rng):
+        """  Mutate the given chromosomes in place by shuffling the free cells of one random sub-block.
+
+        Parameters:
+            - genes (array): Chromosomes of the population, shape (P, 9, 9)
+            - free_cells (FreeCells): Free cells of the Sudoku puzzle
+            - rows (array): Indexes of the chromosomes to mutate
+            - rng (Generator): Random number generator
+        """
+        sub_grids = rng.integers(0, DIGIT_NUMBER, size=len(rows))
+        cells = free_cells.indexes[sub_grids]
+        free = np.arange(DIGIT_NUMBER) < free_cells.count[sub_grids][:, None]
+
+        # Padding cells get the largest keys so that they stay behind the free cells
+        keys = rng.random(cells.shape)
+        keys[~free] = 2
+        source = np.take_along_axis(cells, keys.argsort(axis=1), axis=1)
+
+        rows = np.broadcast_to(rows[:, None], cells.shape)[free]
+        sub_grids = np.broadcast_to(sub_grids[:, None], cells.shape)[free]
+        genes[rows, sub_grids, cells[free]] = genes[rows, sub_grids, source[free]]
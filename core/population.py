@@ -1,11 +1,31 @@
-import random
-from math import sqrt
 import numpy as np
 
 from .candidate import Candidate
-from .selection import RankingSelection, Tournament, TopSelection
+from .checkpoint import pack_candidates, unpack_candidates
+from .diversity import hamming_diversity
+from .fitness import PopulationFitness
+from .mutation import FreeCells, MultiSwapMutation
+from .rng import make_rng
+from .selection import RankingSelection, Tournament, TopSelection, fitness_order
 from .crossover import *
-from .settings import BLOCK_NUMBER, DIGIT_NUMBER, POPULATION_SIZE, ELITE_NUMBER, MUTATION_RATE, CROSSOVER_RATE
+from .stats import CROSSOVER, EVALUATION, LOCAL_SEARCH, MUTATION, SELECTION, SORTING, SolveStats
+from .settings import BLOCK_NUMBER, DEDUPLICATION_ROUNDS, DIGIT_NUMBER, POPULATION_SIZE, ELITE_NUMBER, MUTATION_RATE, CROSSOVER_RATE
+
+# Random odd weights of the 64-bit words of a chromosome, see gene_hashes
+HASH_WEIGHTS = np.random.default_rng(DIGIT_NUMBER).integers(1, 2 ** 63, size=11, dtype=np.uint64) | np.uint64(1)
+
+def gene_hashes(genes):
+    """
+    Returns a 64-bit hash of the bytes of every chromosome. Equal genes have equal hashes,
+    different genes almost never do.
+
+    Parameters:
+        - genes (array): Chromosomes, shape (P, 9, 9) of uint8
+    """
+    # The 81 bytes of a chromosome are padded to 11 words of 8 bytes
+    words = np.zeros((len(genes), 88), dtype=np.uint8)
+    words[:, :DIGIT_NUMBER * DIGIT_NUMBER] = genes.reshape(len(genes), -1)
+    return (words.view(np.uint64) * HASH_WEIGHTS).sum(axis=1)
 
 class Population:
     """ A set of candidate solutions to the Sudoku puzzle. These candidates are also known as
@@ -15,9 +35,20 @@ class Population:
         self.population_size = POPULATION_SIZE
         self.elitism = ELITE_NUMBER
         self.mutation_rate = MUTATION_RATE
+        # Number of mutations applied to a mutated child
+        self.mutation_strength = 1
         self.crossover_rate = CROSSOVER_RATE
         self.select_method = TopSelection()
         self.crossover_method = HalfCrossover()
+        self.stats = SolveStats()
+        self.rng = make_rng()
+        self.free_cells = None
+
+    def get_free_cells(self, given):
+        """ Returns the free cells of the given chromosome, computed once per puzzle. """
+        if self.free_cells is None or self.free_cells.given is not given:
+            self.free_cells = FreeCells(given)
+        return self.free_cells
     
     def generate_initial_candidates(self, number, given, tracker):
         """
@@ -45,7 +76,7 @@ class Population:
                         shuffled_sub_grid.remove(given[i][j])
 
                 # Shuffle the list so that possible values can be filled in randomly
-                random.shuffle(shuffled_sub_grid)
+                self.rng.shuffle(shuffled_sub_grid)
                 for j in range(DIGIT_NUMBER):
                     # Fill possible value to unknown cell in the sub grid
                     if given[i][j] == 0:
@@ -56,27 +87,79 @@ class Population:
         # Evaluate fitness for the population
         self.evaluate(tracker)
 
-    def local_search(self, coef, given, tracker):
-        new_population = []
-        for candidate in self.candidates:
-            new_population.extend(candidate.local_search(coef, given))
-        
-        list(map(lambda x: x.update_fitness(tracker), new_population))
-        
-        new_population.sort(key = lambda x: -x.fitness)
-        top_num = 10
-        top_fit = new_population[:top_num]
-        new_population = new_population[top_num:]
-        # random.shuffle(new_population)
-        self.candidates = top_fit + random.choices(new_population, k=self.population_size - top_num)
-    
+    def hill_climb(self, given, tracker, number, budget, best_improvement=False):
+        """
+        Memetic step: improves the "number" fittest candidates with a bounded swap hill climb, see
+        Candidate.hill_climb, then sorts the population again. Returns the gain of the best fitness.
+
+        Parameters:
+            - given (array): The given chromosome of the Sudoku problem
+            - tracker (array): Helper array to help evaluate candidates' fitness
+            - number (int): Number of candidates to improve
+            - budget (int): Maximum number of scored swaps per candidate
+            - best_improvement (bool) (optional=False): Best improvement instead of first improvement climb
+        """
+        free_cells = self.get_free_cells(given)
+        start = self.best().fitness
+        with self.stats.timer(LOCAL_SEARCH):
+            for candidate in self.candidates[:number]:
+                candidate.hill_climb(free_cells, tracker, budget, best_improvement, self.rng)
+        self.sort()
+        return self.best().fitness - start
+
     def sort(self):
         """ Sort the population based on fitness. """
-        self.candidates.sort(key = lambda x: -x.fitness)
+        with self.stats.timer(SORTING):
+            order = fitness_order(np.array([c.fitness for c in self.candidates], dtype=int))
+            self.candidates = [self.candidates[i] for i in order]
+
+    def best(self):
+        """ Returns the fittest candidate of the population. """
+        return self.candidates[0]
+
+    def worst(self):
+        """ Returns the least fit candidate of the population. """
+        return self.candidates[-1]
+
+    def top(self, number):
+        """ Returns the "number" fittest candidates of the population. """
+        return self.candidates[:number]
+
+    def diversity(self, given):
+        """ Returns the mean Hamming distance of the candidates to the best one, see hamming_diversity. """
+        return hamming_diversity(np.array([c.gene for c in self.candidates]), given)
+
+    def get_state(self):
+        """ Returns the genes, fitness and fitness matrices of the population as arrays. """
+        return pack_candidates(self.candidates)
+
+    def set_state(self, genes, fitness, fitness_matrix):
+        """
+        Restores a population saved with get_state.
+
+        Parameters:
+            - genes (array): Chromosomes of the population, shape (P, 9, 9)
+            - fitness (array): Fitness of every chromosome
+            - fitness_matrix (array): Fitness matrix of every chromosome
+        """
+        self.candidates = unpack_candidates(genes, fitness, fitness_matrix)
+
+    def load_candidates(self, candidates, tracker):
+        """
+        Replaces the population with already evaluated candidates.
+
+        Parameters:
+            - candidates (list): Candidates of the new population
+            - tracker (array): Helper array to help evaluate candidates' fitness
+        """
+        self.candidates = list(candidates)
+        self.sort()
     
     def evaluate(self, tracker):
         """ Evaluate fitness of every candidate/chromosome in the population. """
-        list(map(lambda x: x.update_fitness(tracker), self.candidates))
+        with self.stats.timer(EVALUATION):
+            list(map(lambda x: x.update_fitness(tracker), self.candidates))
+        self.stats.count_evaluations(len(self.candidates))
         self.sort()
 
     def next_gen(self, given, tracker):
@@ -93,29 +176,350 @@ class Population:
         # Extract top candidate from population. These elite candidates will 
         # go to the next generation without any change
         for i in range(num_elite):
-            elite = Candidate()
-            elite.gene = np.copy(self.candidates[i].gene)
-            elites.append(elite)
+            elites.append(Candidate(np.copy(self.candidates[i].gene)))
 
-        select_candidates = self.select_method.select_candidates(self.candidates, self.population_size - num_elite)
+        # An odd number of children gets one more pair of parents, its extra child is dropped
+        number = self.population_size - num_elite
+        with self.stats.timer(SELECTION):
+            select_candidates = self.select_method.select_candidates(self.candidates, number + number % 2, self.rng)
 
         new_population = []
-        for _ in range(0, self.population_size - num_elite, 2):
-            # Select 2 parents
-            parents = [select_candidates.pop(), select_candidates.pop()]
-            # parents = self.select_method.select_candidates(self.candidates, 2)
+        with self.stats.timer(CROSSOVER):
+            for _ in range(0, number, 2):
+                # Select 2 parents
+                parents = [select_candidates.pop(), select_candidates.pop()]
+                # parents = self.select_method.select_candidates(self.candidates, 2)
 
-            # Crossover them to generate new child for next generation with a crossover rate
-            child1, child2 = self.crossover_method.crossover(parents[0], parents[1], self.crossover_rate)
+                # Crossover them to generate new child for next generation with a crossover rate
+                child1, child2 = self.crossover_method.crossover(parents[0], parents[1], self.crossover_rate, self.rng)
 
-            # Add child to the next genration population
-            new_population.append(child1)
-            new_population.append(child2)
+                # Add child to the next genration population
+                new_population.append(child1)
+                new_population.append(child2)
+        self.stats.count_allocations(*[child.gene for child in new_population])
         
-        self.candidates = new_population
+        self.candidates = new_population[:number]
         # Mutate candidates in the next generation with a mutation rate
-        list(map(lambda x: x.mutate(self.mutation_rate, given), self.candidates))
+        with self.stats.timer(MUTATION):
+            free_cells = self.get_free_cells(given)
+            for k in np.flatnonzero(self.rng.random(len(self.candidates)) < self.mutation_rate):
+                candidate = self.candidates[k]
+                for _ in range(self.mutation_strength):
+                    candidate.mutate_method.mutate(candidate, free_cells, None, self.rng)
         self.candidates.extend(elites)
 
         # Evaluate fitness for the next generation
-        self.evaluate(tracker)
\ No newline at end of file
+        self.evaluate(tracker)
+
+class ArrayPopulation(Population):
+    """ A population whose chromosomes are stored in a single (P, 9, 9) array so that
+    the whole population is evaluated in one batched pass instead of candidate by candidate.
+    Generations are written alternately into two gene buffers, so a generation step allocates
+    no new chromosome array once the buffers are large enough. """
+    def __init__(self):
+        super().__init__()
+        self.genes = np.zeros((0, DIGIT_NUMBER, DIGIT_NUMBER), dtype=np.uint8)
+        self.buffers = [None, None]
+        self.fitness = np.zeros(0, dtype=int)
+        self.fitness_matrix = np.zeros((0, 2, BLOCK_NUMBER), dtype=int)
+        self.fitness_method = PopulationFitness()
+        self.mutate_method = MultiSwapMutation()
+        # Replace duplicated children and reuse known fitness values
+        self.deduplicate = False
+        # Hash of every chromosome, kept by the deduplicating generation step, None when unknown
+        self.hashes = None
+
+    def spare_buffer(self, size):
+        """
+        Returns a gene buffer of at least "size" chromosomes that does not hold the current genes.
+        The buffer is only reallocated when it is too small.
+
+        Parameters:
+            - size (int): Number of chromosomes the buffer must hold
+        """
+        current = self.genes if self.genes.base is None else self.genes.base
+        k = 1 if self.buffers[0] is current else 0
+        if self.buffers[k] is None or len(self.buffers[k]) < size:
+            self.buffers[k] = np.empty((size, DIGIT_NUMBER, DIGIT_NUMBER), dtype=np.uint8)
+            self.stats.count_allocations(self.buffers[k])
+        return self.buffers[k]
+
+    def generate_initial_candidates(self, number, given, tracker):
+        """
+        Generates an initial population of size "number".
+
+        Parameters:
+            - number (int): Number of candidates to generate
+            - given (array): The given chromosome of the Sudoku problem
+            - tracker (array): Helper array to help evaluate candidates' fitness
+        """
+
+        free_cells = self.get_free_cells(given)
+        self.genes = np.empty((number, DIGIT_NUMBER, DIGIT_NUMBER), dtype=np.uint8)
+        self.genes[:] = given
+        for i in range(DIGIT_NUMBER):
+            cells = free_cells.indexes[i, :free_cells.count[i]]
+            missing_values = np.setdiff1d(np.arange(1, DIGIT_NUMBER + 1), given[i])
+
+            # Fill the unknown cells of the sub grid with a random permutation of the missing values
+            order = self.rng.random((number, len(cells))).argsort(axis=1)
+            self.genes[:, i, cells] = missing_values[order]
+
+        # Evaluate fitness for the population
+        self.evaluate(tracker)
+
+    def candidate(self, index):
+        """ Returns a Candidate sharing the gene of the index-th chromosome. """
+        return Candidate(self.genes[index], self.fitness[index], self.fitness_matrix[index])
+
+    def best(self):
+        """ Returns a copy of the fittest candidate of the population. """
+        return self.top(1)[0]
+
+    def worst(self):
+        """ Returns a copy of the least fit candidate of the population. """
+        candidate = self.candidate(-1)
+        candidate.gene = np.copy(candidate.gene)
+        return candidate
+
+    def top(self, number):
+        """ Returns copies of the "number" fittest candidates of the population. """
+        candidates = [self.candidate(i) for i in range(min(number, len(self.genes)))]
+        for candidate in candidates:
+            candidate.gene = np.copy(candidate.gene)
+            candidate.fitness_matrix = np.copy(candidate.fitness_matrix)
+        return candidates
+
+    def load_candidates(self, candidates, tracker):
+        """
+        Replaces the population with the given candidates.
+
+        Parameters:
+            - candidates (list): Candidates of the new population
+            - tracker (array): Helper array to help evaluate candidates' fitness
+        """
+        self.genes = np.array([c.gene for c in candidates], dtype=np.uint8)
+        self.evaluate(tracker)
+
+    def diversity(self, given):
+        """ Returns the mean Hamming distance of the chromosomes to the best one, see hamming_diversity. """
+        return hamming_diversity(self.genes, given)
+
+    def get_state(self):
+        """ Returns the genes, fitness and fitness matrices of the population as arrays. """
+        return self.genes, self.fitness, self.fitness_matrix
+
+    def set_state(self, genes, fitness, fitness_matrix):
+        """
+        Restores a population saved with get_state.
+
+        Parameters:
+            - genes (array): Chromosomes of the population, shape (P, 9, 9)
+            - fitness (array): Fitness of every chromosome
+            - fitness_matrix (array): Fitness matrix of every chromosome
+        """
+        self.genes = genes.astype(np.uint8)
+        self.fitness = fitness.astype(int)
+        self.fitness_matrix = fitness_matrix.astype(int)
+        self.hashes = None
+
+    def hill_climb(self, given, tracker, number, budget, best_improvement=False):
+        """
+        Memetic step: improves the "number" fittest chromosomes in place with a bounded swap hill climb,
+        see Candidate.hill_climb, then sorts the population again. Returns the gain of the best fitness.
+        See Population.hill_climb for the parameters.
+        """
+        free_cells = self.get_free_cells(given)
+        start = self.fitness[0]
+        with self.stats.timer(LOCAL_SEARCH):
+            for i in range(min(number, len(self.genes))):
+                # The candidate shares the gene of the chromosome, so the swaps are applied in place
+                candidate = self.candidate(i)
+                candidate.hill_climb(free_cells, tracker, budget, best_improvement, self.rng)
+                self.fitness[i] = candidate.fitness
+                self.fitness_matrix[i] = candidate.fitness_matrix
+        self.hashes = None
+        self.sort()
+        return int(self.fitness[0] - start)
+
+    def replace_worst(self, genes, tracker):
+        """
+        Replaces the least fit chromosomes with the given ones, e.g. migrants from another population.
+
+        Parameters:
+            - genes (array): Chromosomes to insert, shape (n, 9, 9)
+            - tracker (array): Helper array to help evaluate candidates' fitness
+        """
+        number = min(len(genes), len(self.genes))
+        if number > 0:
+            self.genes[len(self.genes) - number:] = genes[:number]
+            self.evaluate(tracker)
+
+    def sort(self):
+        """ Sort the population based on fitness. """
+        with self.stats.timer(SORTING):
+            order = fitness_order(self.fitness)
+            number = len(self.genes)
+            self.genes = np.take(self.genes, order, axis=0, out=self.spare_buffer(number)[:number])
+            self.fitness = self.fitness[order]
+            self.fitness_matrix = self.fitness_matrix[order]
+            if self.hashes is not None:
+                self.hashes = self.hashes[order]
+        self.stats.count_allocations(self.fitness, self.fitness_matrix)
+
+    def evaluate(self, tracker):
+        """ Evaluate fitness of every chromosome in the population at once. """
+        self.score(tracker)
+        self.sort()
+
+    def score(self, tracker):
+        """ Computes the fitness of every chromosome, without sorting the population. """
+        with self.stats.timer(EVALUATION):
+            self.fitness, self.fitness_matrix = self.fitness_method.cal_fitness(self.genes, tracker)
+        self.hashes = None
+        self.stats.count_evaluations(len(self.genes))
+        self.stats.count_allocations(self.fitness, self.fitness_matrix)
+
+    def remove_duplicates(self, number, free_cells, elite_hashes):
+        """
+        Swaps two free cells of every child that duplicates an elite or an earlier child, up to
+        DEDUPLICATION_ROUNDS times, so that the generation spends its evaluations on distinct genes.
+        Returns the hash of every chromosome and the number of duplicates found.
+
+        Parameters:
+            - number (int): Number of children, the first chromosomes of the population
+            - free_cells (FreeCells): Free cells of the Sudoku puzzle
+            - elite_hashes (array): Hash of every elite, the last chromosomes of the population
+        """
+        # Only the children are new, the elites keep the hashes of the previous generation
+        hashes = np.concatenate((gene_hashes(self.genes[:number]), elite_hashes))
+        firsts, seconds = free_cells.pairs
+        if len(firsts) == 0:
+            return hashes, 0
+        cells = self.genes.reshape(len(self.genes), -1)
+        # Elites are kept as they are, so they come first
+        order = np.roll(np.arange(len(self.genes)), len(self.genes) - number)
+        found = None
+        for _ in range(DEDUPLICATION_ROUNDS + 1):
+            _, first, inverse = np.unique(hashes[order], return_index=True, return_inverse=True)
+            rows = order[(first[inverse] != np.arange(len(order))) & (order < number)]
+            if found is None:
+                found = len(rows)
+            if len(rows) == 0:
+                break
+            # Two free cells of a sub-grid always hold different digits, so every swap yields a new gene
+            pairs = self.rng.integers(0, len(firsts), size=len(rows))
+            first, second = firsts[pairs], seconds[pairs]
+            cells[rows, first], cells[rows, second] = cells[rows, second], cells[rows, first]
+            hashes[rows] = gene_hashes(self.genes[rows])
+        return hashes, found
+
+    def score_distinct(self, tracker, hashes, previous):
+        """
+        Computes the fitness of every chromosome, reusing the fitness of the genes of the previous
+        generation and evaluating every other distinct gene once, without sorting the population.
+
+        Parameters:
+            - tracker (array): Helper array to help evaluate candidates' fitness
+            - hashes (array): Hash of every chromosome, see remove_duplicates
+            - previous (tuple): Genes, fitness, fitness matrices and hashes of the previous generation
+        """
+        previous_genes, previous_fitness, previous_matrix, previous_hashes = previous
+        size = len(previous_genes)
+        with self.stats.timer(EVALUATION):
+            _, first, inverse = np.unique(np.concatenate((previous_hashes, hashes)), return_index=True, return_inverse=True)
+            # First chromosome with the same hash, in the previous generation when the gene is known
+            source = first[inverse[size:]]
+            rows = np.arange(len(self.genes))
+            reused = np.flatnonzero(source < size)
+            copies = np.flatnonzero((source >= size) & (source != rows + size))
+
+            # Hashes can collide, a gene only reuses the fitness of an identical gene
+            reused = reused[(self.genes[reused] == previous_genes[source[reused]]).all(axis=(1, 2))]
+            copies = copies[(self.genes[copies] == self.genes[source[copies] - size]).all(axis=(1, 2))]
+            evaluated = np.ones(len(rows), dtype=bool)
+            evaluated[reused] = False
+            evaluated[copies] = False
+            evaluated = np.flatnonzero(evaluated)
+
+            self.fitness = np.empty(len(rows), dtype=int)
+            self.fitness_matrix = np.empty((len(rows), 2, BLOCK_NUMBER), dtype=int)
+            self.fitness[reused] = previous_fitness[source[reused]]
+            self.fitness_matrix[reused] = previous_matrix[source[reused]]
+            if len(evaluated):
+                self.fitness[evaluated], self.fitness_matrix[evaluated] = self.fitness_method.cal_fitness(self.genes[evaluated], tracker)
+            self.fitness[copies] = self.fitness[source[copies] - size]
+            self.fitness_matrix[copies] = self.fitness_matrix[source[copies] - size]
+        self.hashes = hashes
+        self.stats.count_evaluations(len(evaluated))
+        self.stats.count_allocations(self.fitness, self.fitness_matrix)
+
+    def reward_operators(self, parent_fitness, mutated):
+        """
+        Rewards the adaptive crossover and mutation operators of the last generation step with the
+        fitness improvement of every child over the fitter of its parents. The population must be
+        scored but not sorted yet, the children are its first chromosomes.
+
+        Parameters:
+            - parent_fitness (array): Fitness of the fitter parent of every pair
+            - mutated (array): Indexes of the mutated children
+        """
+        pairs = len(parent_fitness)
+        number = len(self.fitness) - self.elitism
+        improvement = np.zeros(2 * pairs)
+        improvement[:number] = np.maximum(self.fitness[:number] - parent_fitness[np.arange(number) % pairs], 0)
+
+        crossover_credit = getattr(self.crossover_method, "credit", None)
+        if crossover_credit is not None:
+            # A pair is rewarded with its better child
+            crossover_credit.reward(np.maximum(improvement[:pairs], improvement[pairs:]))
+        mutation_credit = getattr(self.mutate_method, "credit", None)
+        if mutation_credit is not None:
+            # Every mutation round recorded one operator per mutated child, each is rewarded with the child
+            mutation_credit.reward(np.tile(improvement[mutated], self.mutation_strength))
+
+    def next_gen(self, given, tracker):
+        """ 
+        Find the next generation of the population".
+
+        Parameters:
+            - given (array): The given chromosome of the Sudoku problem, helps in mutation process of candidates
+            - tracker (array): Helper array to help evaluate candidates' fitness
+        """
+        num_elite = self.elitism
+        number = self.population_size - num_elite
+        pairs = (number + 1) // 2
+
+        # Parents are selected by index, straight from the fitness vector
+        with self.stats.timer(SELECTION):
+            parents = self.select_method.select_indexes(self.fitness, 2 * pairs, self.rng)
+        parent_fitness = np.maximum(self.fitness[parents[0::2]], self.fitness[parents[1::2]])
+        previous = (self.genes, self.fitness, self.fitness_matrix)
+
+        # Children and elites are written into the spare buffer, an odd child is overwritten by the elites
+        next_genes = self.spare_buffer(2 * pairs + num_elite)
+
+        # Crossover every pair of selected parents at once to generate the next generation
+        with self.stats.timer(CROSSOVER):
+            self.crossover_method.crossover_batch(self.genes, self.fitness_matrix, parents[0::2], parents[1::2],
+                self.crossover_rate, self.rng, out=next_genes[:2 * pairs])
+        next_genes[number:number + num_elite] = self.genes[:num_elite]
+
+        # Mutate candidates in the next generation with a mutation rate
+        with self.stats.timer(MUTATION):
+            mutated = np.flatnonzero(self.rng.random(number) < self.mutation_rate)
+            for _ in range(self.mutation_strength):
+                self.mutate_method.mutate_batch(next_genes[:number], self.get_free_cells(given), mutated, self.rng)
+
+        self.genes = next_genes[:number + num_elite]
+
+        # Evaluate fitness for the next generation
+        if self.deduplicate:
+            previous_hashes = gene_hashes(previous[0]) if self.hashes is None else self.hashes
+            hashes, duplicates = self.remove_duplicates(number, self.get_free_cells(given), previous_hashes[:num_elite])
+            self.stats.count_duplicates(duplicates)
+            self.score_distinct(tracker, hashes, previous + (previous_hashes,))
+        else:
+            self.score(tracker)
+        self.reward_operators(parent_fitness, mutated)
+        self.sort()
@@ -0,0 +1,132 @@
+import multiprocessing
+import queue
+
+from .island import evolve_island
+from .rng import make_rng
+from .settings import PORTFOLIO_KEEP, PORTFOLIO_LAG, PORTFOLIO_PATIENCE, PORTFOLIO_REPORT_INTERVAL, PORTFOLIO_WARMUP
+
+""" Racing portfolio. Which selection, crossover and mutation work best depends on the puzzle, so several
+differently configured populations are raced on the same puzzle and the ones that clearly lag are stopped. """
+
+class Portfolio:
+    """ Races several differently configured populations on the same puzzle, one worker process each.
+    Every run streams its best fitness. Once a run has passed the warmup, it is stopped when its best
+    fitness is lag or more below the best fitness of the leading run and has not improved for patience
+    generations, so the remaining runs get the cores. A slow run that keeps improving is not stopped,
+    the early fitness of a configuration is a poor predictor of its final fitness.
+    The first run to reach the goal stops the others. A run is an island that never migrates, see evolve_island. """
+
+    def __init__(self, runs, report_interval=PORTFOLIO_REPORT_INTERVAL, warmup=PORTFOLIO_WARMUP, lag=PORTFOLIO_LAG,
+            patience=PORTFOLIO_PATIENCE, keep=PORTFOLIO_KEEP):
+        """
+        Parameters:
+            - runs (list): Island configurations of the runs, one worker process each
+            - report_interval (int) (optional=PORTFOLIO_REPORT_INTERVAL): Number of generations between two reports of a run
+            - warmup (int) (optional=PORTFOLIO_WARMUP): Number of generations of a run before it can be stopped
+            - lag (int) (optional=PORTFOLIO_LAG): Fitness gap to the leading run at which a run is stopped
+            - patience (int) (optional=PORTFOLIO_PATIENCE): Number of generations without improvement of a lagging run
+              before it is stopped
+            - keep (int) (optional=PORTFOLIO_KEEP): Number of runs that are never stopped for lagging
+        """
+        self.runs = runs
+        self.report_interval = report_interval
+        self.warmup = warmup
+        self.lag = lag
+        self.patience = patience
+        self.keep = max(keep, 1)
+        # (run, generation, fitness) of every stopped run
+        self.stopped = []
+
+    def laggards(self, reports, running):
+        """
+        Returns the runs to stop, the least fit first.
+
+        Parameters:
+            - reports (dict): Latest (generation, fitness, generation of the last improvement) reported by every run
+            - running (set): Runs that are still running
+        """
+        fitness = [reports[index][1] for index in running if index in reports]
+        if not fitness:
+            return []
+        leader = max(fitness)
+        lagging = [index for index in running if index in reports and reports[index][0] >= self.warmup
+            and leader - reports[index][1] >= self.lag and reports[index][0] - reports[index][2] >= self.patience]
+        lagging.sort(key=lambda index: reports[index][1])
+        return lagging[:max(len(running) - self.keep, 0)]
+
+    def solve(self, given, tracker, max_generation, on_progress=None, on_stop=None, should_stop=None, rng=None):
+        """
+        Races the runs and returns the best result as a tuple (gene, fitness, generation, run).
+
+        Parameters:
+            - given (array): The given chromosome of the Sudoku problem
+            - tracker (array): Bitmask tracker of the puzzle
+            - max_generation (int): Maximum number of generations of every run
+            - on_progress (function) (optional=None): Called with (run, generation, fitness, gene) on every report
+            - on_stop (function) (optional=None): Called with (run, generation, fitness) when a lagging run is stopped
+            - should_stop (function) (optional=None): Polled regularly, the search is cancelled when it returns True
+            - rng (Generator) (optional=None): Random number generator drawing the seeds of the runs
+        """
+        rng = make_rng(rng)
+        context = multiprocessing.get_context("spawn")
+        events = context.Queue()
+        # Every run has its own stop event, so a lagging run can be stopped without stopping the others
+        stops = [context.Event() for _ in self.runs]
+        seeds = rng.integers(0, 2 ** 31 - 1, size=len(self.runs))
+        reporting = (self.report_interval, 0, "ring")
+
+        workers = [
+            context.Process(
+                target=evolve_island,
+                args=(i, run, given, tracker, max_generation, reporting, [], events, stops[i], int(seeds[i])),
+                daemon=True)
+            for i, run in enumerate(self.runs)
+        ]
+        for worker in workers:
+            worker.start()
+
+        self.stopped = []
+        running = set(range(len(workers)))
+        reports = {}
+        best = None
+        try:
+            while running:
+                if should_stop is not None and should_stop():
+                    break
+                try:
+                    kind, index, generation, fitness, gene = events.get(timeout=0.1)
+                except queue.Empty:
+                    if not any(worker.is_alive() for worker in workers):
+                        break
+                    continue
+                # A stopped run can still deliver a solution it found before it was stopped
+                if index not in running and kind != "solved":
+                    continue
+
+                improved = generation if index not in reports or fitness > reports[index][1] else reports[index][2]
+                reports[index] = (generation, fitness, improved)
+                if best is None or fitness > best[1]:
+                    best = (gene, fitness, generation, index)
+                if on_progress is not None:
+                    on_progress(index, generation, fitness, gene)
+                if kind == "solved":
+                    break
+                if kind == "done":
+                    running.discard(index)
+                    continue
+
+                for laggard in self.laggards(reports, running):
+                    stops[laggard].set()
+                    running.discard(laggard)
+                    self.stopped.append((laggard,) + reports[laggard][:2])
+                    if on_stop is not None:
+                        on_stop(laggard, *reports[laggard][:2])
+        finally:
+            for stop in stops:
+                stop.set()
+            for worker in workers:
+                worker.join(timeout=1)
+                if worker.is_alive():
+                    worker.terminate()
+
+        return best
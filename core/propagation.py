@@ -0,0 +1,192 @@
+import numpy as np
+from .topology import CELL_NUMBER, COLUMN_OF, COLUMNS, PEERS, ROW_OF, ROWS, SUB_GRID_OF, SUB_GRIDS, UNITS
+from .tracker import FULL_DOMAIN, LOWEST_DIGIT, POPCOUNT, value_bits
+from .settings import DIGIT_NUMBER
+
+NAKED_SINGLE = "naked single"
+HIDDEN_SINGLE = "hidden single"
+NAKED_PAIR = "naked pair"
+HIDDEN_PAIR = "hidden pair"
+POINTING = "pointing"
+CLAIMING = "claiming"
+
+DIGIT_BITS = np.left_shift(1, np.arange(1, DIGIT_NUMBER + 1))
+
+class PropagationReport:
+    """ Summary of a constraint propagation run. """
+
+    def __init__(self):
+        # Number of times each rule fixed a cell or removed candidates
+        self.rules = {rule: 0 for rule in (NAKED_SINGLE, HIDDEN_SINGLE, NAKED_PAIR, HIDDEN_PAIR, POINTING, CLAIMING)}
+        self.fixed = 0
+        self.contradiction = False
+
+    def fired(self):
+        """ Returns the rules that fired at least once with their counts. """
+        return {rule: count for rule, count in self.rules.items() if count > 0}
+
+    def __str__(self):
+        if self.contradiction:
+            return "Contradiction found during propagation"
+        rules = ", ".join("%s: %d" % (rule, count) for rule, count in self.fired().items())
+        return "Propagation fixed %d cells%s" % (self.fixed, " (%s)" % rules if rules else "")
+
+class Propagator:
+    """ Constraint propagation over the pencil marks of a chromosome. Cells are filled with
+    naked and hidden singles and candidates are removed with naked pairs, hidden pairs
+    and pointing/claiming (locked candidates) until nothing changes. """
+
+    def __init__(self, given):
+        """
+        Parameters:
+            - given (array): The given chromosome of the Sudoku problem
+        """
+        self.given = given
+        self.values = given.reshape(CELL_NUMBER).copy()
+        self.domains = np.full(CELL_NUMBER, FULL_DOMAIN, dtype=np.uint16)
+        self.report = PropagationReport()
+
+    def tracker(self):
+        """ Returns the bitmask tracker, free cells keep their candidates and filled cells their value. """
+        tracker = np.where(self.values != 0, value_bits(self.values), self.domains)
+        return tracker.astype(np.uint16).reshape(self.given.shape)
+
+    def run(self):
+        """ Propagates until a fixed point or a contradiction is reached and returns the report. """
+        rules = [self.naked_singles, self.hidden_singles, self.naked_pairs, self.hidden_pairs, self.locked_candidates]
+        while True:
+            self.update_domains()
+            if self.contradiction():
+                self.report.contradiction = True
+                break
+
+            # Restart from the cheapest rule as soon as one makes progress
+            if not any(rule() for rule in rules):
+                break
+
+        return self.report
+
+    def update_domains(self):
+        """ Removes the values of the filled peers from the candidates of every free cell. """
+        taken = np.bitwise_or.reduce(value_bits(self.values)[PEERS], axis=1)
+        self.domains &= ~taken
+        self.domains[self.values != 0] = 0
+
+    def contradiction(self):
+        empty = self.values == 0
+        if (empty & (self.domains == 0)).any():
+            return True
+
+        # A filled value taken by a peer
+        bits = value_bits(self.values)
+        if (~empty & ((np.bitwise_or.reduce(bits[PEERS], axis=1) & bits) != 0)).any():
+            return True
+
+        # A digit that can no longer be placed in a unit
+        placed = np.bitwise_or.reduce(bits[UNITS], axis=1)
+        possible = np.bitwise_or.reduce(self.domains[UNITS], axis=1)
+        return ((placed | possible) != FULL_DOMAIN).any()
+
+    def assign(self, cells, values, rule):
+        self.values[cells] = values
+        self.report.rules[rule] += len(cells)
+        self.report.fixed += len(cells)
+
+    def eliminate(self, cells, mask, rule):
+        """ Removes the digits of mask from the candidates of cells, returns whether anything changed. """
+        cells = cells[(self.domains[cells] & mask) != 0]
+        if len(cells) == 0:
+            return False
+        self.domains[cells] &= ~np.uint16(mask)
+        self.report.rules[rule] += 1
+        return True
+
+    def naked_singles(self):
+        cells = np.flatnonzero((self.values == 0) & (POPCOUNT[self.domains] == 1))
+        if len(cells) == 0:
+            return False
+        self.assign(cells, LOWEST_DIGIT[self.domains[cells]], NAKED_SINGLE)
+        return True
+
+    def hidden_singles(self):
+        # has[u, k, d]: digit d + 1 is a candidate of the k-th cell of unit u
+        has = (self.domains[UNITS][:, :, None] & DIGIT_BITS) != 0
+        units, digits = np.nonzero(has.sum(axis=1) == 1)
+        if len(units) == 0:
+            return False
+
+        # A cell can be a hidden single of several units, keep it once
+        cells = UNITS[units, has[units, :, digits].argmax(axis=1)]
+        cells, first = np.unique(cells, return_index=True)
+        self.assign(cells, digits[first] + 1, HIDDEN_SINGLE)
+        return True
+
+    def naked_pairs(self):
+        changed = False
+        for unit in UNITS:
+            domains = self.domains[unit]
+            pairs = domains[POPCOUNT[domains] == 2]
+            masks, counts = np.unique(pairs, return_counts=True)
+            for mask in masks[counts == 2]:
+                # Two cells of the unit share the same two candidates, no other cell can take them
+                changed |= self.eliminate(unit[domains != mask], int(mask), NAKED_PAIR)
+        return changed
+
+    def hidden_pairs(self):
+        changed = False
+        for unit in UNITS:
+            has = (self.domains[unit][:, None] & DIGIT_BITS) != 0
+            twice = np.flatnonzero(has.sum(axis=0) == 2)
+            for a in range(len(twice)):
+                for b in range(a + 1, len(twice)):
+                    d1, d2 = twice[a], twice[b]
+                    if not (has[:, d1] == has[:, d2]).all():
+                        continue
+                    # Two digits only fit in the same two cells, these cells can not take anything else
+                    cells = unit[has[:, d1]]
+                    mask = int(DIGIT_BITS[d1] | DIGIT_BITS[d2])
+                    changed |= self.eliminate(cells, FULL_DOMAIN & ~mask, HIDDEN_PAIR)
+        return changed
+
+    def locked_candidates(self):
+        changed = False
+        for digit_bit in DIGIT_BITS:
+            digit_bit = int(digit_bit)
+            candidates = (self.domains & digit_bit) != 0
+
+            # Pointing: the digit of a sub-grid lies on a single row or column
+            for sub_grid in SUB_GRIDS:
+                cells = sub_grid[candidates[sub_grid]]
+                if len(cells) < 2:
+                    continue
+                for line_of, lines in ((ROW_OF, ROWS), (COLUMN_OF, COLUMNS)):
+                    if (line_of[cells] == line_of[cells[0]]).all():
+                        line = lines[line_of[cells[0]]]
+                        others = line[SUB_GRID_OF[line] != SUB_GRID_OF[cells[0]]]
+                        changed |= self.eliminate(others, digit_bit, POINTING)
+
+            # Claiming: the digit of a row or column lies in a single sub-grid
+            for line_of, lines in ((ROW_OF, ROWS), (COLUMN_OF, COLUMNS)):
+                for line in lines:
+                    cells = line[candidates[line]]
+                    if len(cells) < 2 or not (SUB_GRID_OF[cells] == SUB_GRID_OF[cells[0]]).all():
+                        continue
+                    sub_grid = SUB_GRIDS[SUB_GRID_OF[cells[0]]]
+                    others = sub_grid[line_of[sub_grid] != line_of[cells[0]]]
+                    changed |= self.eliminate(others, digit_bit, CLAIMING)
+        return changed
+
+def propagate(given):
+    """
+    Fills the given chromosome in place as far as constraint propagation goes.
+
+    Parameters:
+        - given (array): The given chromosome of the Sudoku problem
+
+    Return:
+        Tuple of the bitmask tracker and the PropagationReport
+    """
+    propagator = Propagator(given)
+    report = propagator.run()
+    given[:] = propagator.values.reshape(given.shape)
+    return propagator.tracker(), report
@@ -0,0 +1,63 @@
+from os import listdir, path as osPath
+import numpy as np
+
+from .settings import DIGIT_NUMBER
+
+EMPTY_CELLS = "0.-_"
+
+def parse_puzzles(text, name="puzzle"):
+    """
+    A generator function that yields the (name, values) of every puzzle of a text.
+    Puzzles are written as 81 cells, either as a 9 x 9 grid of digits separated by spaces
+    or as lines of 81 characters. Empty cells are written as 0, ".", "-" or "_".
+    Lines starting with "#" are comments and label the next puzzle.
+
+    Parameters:
+        - text (str): Content of a puzzle file
+        - name (str) (optional="puzzle"): Name prefix of the puzzles
+    """
+    cells = []
+    label = None
+    count = 0
+    for line in text.splitlines():
+        line = line.strip()
+        if line.startswith("#"):
+            label = line.lstrip("#").strip()
+            continue
+
+        tokens = line.split()
+        if len(tokens) == 1 and len(tokens[0]) > 1:
+            tokens = list(tokens[0])
+        for token in tokens:
+            cells.append(0 if token in EMPTY_CELLS else int(token))
+
+        while len(cells) >= DIGIT_NUMBER * DIGIT_NUMBER:
+            values = np.array(cells[:DIGIT_NUMBER * DIGIT_NUMBER], dtype=int).reshape(DIGIT_NUMBER, DIGIT_NUMBER)
+            cells = cells[DIGIT_NUMBER * DIGIT_NUMBER:]
+            puzzle_name = name if count == 0 else "%s#%d" % (name, count)
+            if label:
+                puzzle_name += " (%s)" % label
+            count += 1
+            label = None
+            yield puzzle_name, values
+
+    if cells:
+        raise ValueError("%s: %d trailing cells do not form a puzzle" % (name, len(cells)))
+
+def read_puzzles(puzzle_path):
+    """
+    A generator function that yields the (name, values) of every puzzle of a file,
+    or of every file of a directory.
+
+    Parameters:
+        - puzzle_path (str): Path of a puzzle file or of a directory of puzzle files
+    """
+    if osPath.isdir(puzzle_path):
+        paths = [osPath.join(puzzle_path, name) for name in sorted(listdir(puzzle_path))]
+        paths = [p for p in paths if osPath.isfile(p)]
+    else:
+        paths = [puzzle_path]
+
+    for file_path in paths:
+        with open(file_path, "r") as f:
+            yield from parse_puzzles(f.read(), osPath.basename(file_path))
@@ -0,0 +1,17 @@
+import numpy as np
+
+""" Random number generation. Every random draw of a solve comes from a single numpy Generator
+created from the seed of the solve and passed down to the population and its operators,
+so that a seeded solve can be reproduced. """
+
+def make_rng(seed=None):
+    """
+    Returns a numpy random Generator.
+
+    Parameters:
+        - seed (int) (optional=None): Seed of the generator, None seeds it from the operating system.
+            An existing Generator is returned unchanged.
+    """
+    if isinstance(seed, np.random.Generator):
+        return seed
+    return np.random.default_rng(seed)
@@ -1,63 +1,115 @@
-import random
+from abc import ABC, abstractmethod
+import numpy as np
+from .rng import make_rng
 
-class RankingSelection:
-    def select_candidates(self, candidates, number):
+def fitness_order(fitness):
+    """
+    Returns the indexes of the candidates by decreasing fitness, candidates of equal fitness keep their order.
+    The fitness values are small integers, so they are ordered as 16-bit keys, which NumPy sorts in linear
+    time with a radix sort instead of a comparison sort.
+
+    Parameters:
+        - fitness (array): Fitness of every candidate
+    """
+    if len(fitness) == 0:
+        return np.zeros(0, dtype=int)
+    return np.argsort((fitness.max() - fitness).astype(np.uint16), kind="stable")
+
+def top_indexes(fitness, number):
+    """
+    Returns the indexes of the "number" fittest candidates in population order, without sorting the population.
+    The lowest selected fitness is found with a linear time partition, and the candidates of that fitness
+    are taken in population order, so on a sorted population these are the first indexes.
+
+    Parameters:
+        - fitness (array): Fitness of every candidate
+        - number (int): Number of candidates to select
+    """
+    number = min(number, len(fitness))
+    if number <= 0:
+        return np.zeros(0, dtype=int)
+    threshold = np.partition(fitness, len(fitness) - number)[len(fitness) - number]
+    selected = fitness > threshold
+    selected[np.flatnonzero(fitness == threshold)[:number - np.count_nonzero(selected)]] = True
+    return np.flatnonzero(selected)
+
+class Selection(ABC):
+    """ Base class of the selection operators. Selection works on the fitness vector of a population
+    and returns the indexes of the selected candidates, so a population stored as arrays never has to
+    build candidate objects to select parents. The fitness vector does not have to be sorted: no
+    operator sorts the population, ties are broken by population order. """
+
+    def select_candidates(self, candidates, number, rng=None):
         """ Select a number of candidates from given candidates list.
-        Fitness level is used to associate a probability of selection with each candidate.
-        
+
         Parameters:
             - candidates (list): given candidates list to select
             - number (int): number of candidates to select
+            - rng (Generator) (optional=None): Random number generator
         """
-        fitness_weight = [c.fitness for c in candidates]
-        selected_candidates = random.choices(candidates, weights=fitness_weight, k=number)
+        fitness = np.array([c.fitness for c in candidates])
+        return [candidates[i] for i in self.select_indexes(fitness, number, make_rng(rng))]
 
-        return selected_candidates
+    @abstractmethod
+    def select_indexes(self, fitness, number, rng):
+        """ Returns the indexes of "number" selected candidates.
 
-class Tournament:
-    def __init__(self, size=2, selection_rate=0.8):
-        self.size = size
-        self.selection_rate = selection_rate
-
-    def select_candidates(self, candidates, number):
-        """ Select a number of candidates from given candidates list.
-        Involves running several "tournaments" among a few individuals (or chromosomes) chosen at random from the population.
-        
         Parameters:
-            - candidates (list): given candidates list to select
+            - fitness (array): Fitness of every candidate
             - number (int): number of candidates to select
+            - rng (Generator): Random number generator
         """
-        selected_candidates = []
-        for _ in range(0, number):
-            competitors = random.choices(candidates, k=self.size)
-            selected_candidates.append(self.compete(competitors))
 
-        return selected_candidates
+class RankingSelection(Selection):
+    def select_indexes(self, fitness, number, rng):
+        """ Fitness level is used to associate a probability of selection with each candidate.
+        See Selection.select_indexes for the parameters. """
+        fitness_weight = fitness.astype(float)
+        return rng.choice(len(fitness), size=number, p=fitness_weight / fitness_weight.sum())
 
-    def compete(self, competitors):
-        competitors.sort(key=lambda x: -x.fitness)
-        q = 1 - self.selection_rate
-        cum_rate = q
+class Tournament(Selection):
+    def __init__(self, size=2, selection_rate=0.8):
+        self.size = size
+        self.selection_rate = selection_rate
 
-        r = random.random()
-        for i in range(0, len(competitors) - 1):
-            if r < 1 - cum_rate:
-                return competitors[i]
-            else:
-                cum_rate = cum_rate * q
-        return competitors[-1]
+    def select_indexes(self, fitness, number, rng):
+        """ Involves running several "tournaments" among a few individuals (or chromosomes) chosen at random from the population.
+        See Selection.select_indexes for the parameters. """
+        # All the tournaments are drawn at once, one row of competitors per tournament
+        competitors = rng.integers(0, len(fitness), size=(number, self.size))
+        scores = fitness[competitors]
 
-class TopSelection:
-    def __init__(self, selection_rate=0.2):
-        self.selection_rate = selection_rate
+        # The rank of a competitor in its tournament is the number of fitter competitors, plus the number of
+        # equally fit competitors drawn before it, so the competitors are ranked without sorting them
+        wanted = self.compete(rng.random(number))
+        winners = np.zeros(number, dtype=int)
+        for j in range(self.size):
+            rank = np.zeros(number, dtype=int)
+            for k in range(self.size):
+                if k < j:
+                    rank += scores[:, k] >= scores[:, j]
+                elif k > j:
+                    rank += scores[:, k] > scores[:, j]
+            winners[rank == wanted] = j
+        return competitors[np.arange(number), winners]
+
+    def compete(self, r):
+        """ Returns the rank of the winner of every tournament. The best competitor wins with
+        the selection rate, otherwise the next one wins with the selection rate, and so on.
 
-    def select_candidates(self, candidates, number):
-        """ Randomly select a number of candidates from top portion of given candidates list.
-        
         Parameters:
-            - candidates (list): given candidates list to select
-            - number (int): number of candidates to select
+            - r (array): One uniform random number per tournament
         """
-        top_index = int(self.selection_rate * len(candidates))
+        q = 1 - self.selection_rate
+        thresholds = 1 - q ** np.arange(1, self.size)
+        return (r[:, None] >= thresholds).sum(axis=1)
+
+class TopSelection(Selection):
+    def __init__(self, selection_rate=0.2):
+        self.selection_rate = selection_rate
 
-        return random.choices(candidates[:top_index], k=number)
\ No newline at end of file
+    def select_indexes(self, fitness, number, rng):
+        """ Randomly select a number of candidates from top portion of the population.
+        See Selection.select_indexes for the parameters. """
+        top = top_indexes(fitness, int(self.selection_rate * len(fitness)))
+        return top[rng.integers(0, len(top), size=number)]
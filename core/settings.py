@@ -1,4 +1,3 @@
-from tkinter.constants import DISABLED
 from numpy import sqrt
 
 """ Genetic Algorithm Settings """
@@ -11,6 +10,49 @@ MUTATION_RATE = 1
 CROSSOVER_RATE = 1
 MAX_STALE_COUNT = 30
 GOAL = 162
+VECTORIZED_POPULATION = True  # Store the population as one gene array and evaluate it in batch.
+FINISHER_DISTANCE = 10  # Run the exact search finisher when the best fitness is this close to the goal (0 disables it).
+FINISHER_NODE_LIMIT = 5000  # Maximum number of search nodes of the exact search finisher.
+FINISHER_STALE = 10  # Number of generations without improvement after which the exact search finisher is tried.
+ISLAND_NUMBER = 1  # Number of populations evolved in separate processes (1 disables the island model).
+MIGRATION_INTERVAL = 10  # Number of generations between two migrations.
+MIGRATION_SIZE = 20  # Number of top candidates sent to another island at each migration.
+MIGRATION_TOPOLOGY = "ring"  # "ring" sends migrants to the next island, "random" to a random other island.
+PORTFOLIO_SIZE = 1  # Number of differently configured populations raced in separate processes (1 disables the portfolio).
+PORTFOLIO_REPORT_INTERVAL = 5  # Number of generations between two progress reports of a portfolio run.
+PORTFOLIO_WARMUP = 30  # Number of generations of a portfolio run before it can be stopped for lagging.
+PORTFOLIO_LAG = 6  # Fitness gap to the leading portfolio run at which a run is stopped.
+PORTFOLIO_PATIENCE = 20  # Number of generations without improvement of a lagging portfolio run before it is stopped.
+PORTFOLIO_KEEP = 1  # Number of portfolio runs that are never stopped for lagging.
+ADAPTIVE_OPERATORS = False  # Choose crossover and mutation operators from pools whose weights adapt to the offspring they produce.
+ADAPTIVE_LEARNING_RATE = 0.3  # Weight of the latest generation in the quality of an adaptive operator.
+ADAPTIVE_MIN_PROBABILITY = 0.05  # Lowest selection probability of an adaptive operator.
+DIVERSITY_CONTROL = False  # Adapt the mutation strength and the population size to the diversity of the population.
+DIVERSITY_LOW = 0.1  # Mean Hamming distance to the best candidate (share of free cells) under which the population is disrupted.
+DIVERSITY_HIGH = 0.3  # Diversity over which the mutation goes back to its base strength.
+MIN_POPULATION_RATIO = 0.3  # Smallest population size under diversity control, relative to POPULATION_SIZE.
+POPULATION_SHRINK = 0.9  # Factor of the population size after an improving generation under diversity control.
+POPULATION_GROWTH = 1.5  # Factor of the population size after a collapse of the diversity.
+MAX_MUTATION_STRENGTH = 4  # Largest number of mutations applied to a child under diversity control.
+DEDUPLICATE = False  # Replace the children that duplicate another chromosome and reuse the fitness of known genes.
+DEDUPLICATION_ROUNDS = 3  # Number of extra swaps tried on a duplicated child before it is kept as it is.
+LOCAL_SEARCH = None  # When the fittest candidates get a swap hill climb: None, "generation" (every generation) or "stale" (before a re-seed).
+LOCAL_SEARCH_TOP = 5  # Number of fittest candidates improved by the hill climb.
+LOCAL_SEARCH_BUDGET = 2000  # Maximum number of swaps scored by the hill climb of one candidate.
+LOCAL_SEARCH_BEST_IMPROVEMENT = False  # Apply the best swap at each step of the hill climb instead of the first improving one.
+LOCAL_SEARCH_CHUNK = 32  # Number of swaps scored at once by the first improvement hill climb.
+ENGINE = "ga"  # Search engine of a solve: "ga" (genetic algorithm) or "annealing" (simulated annealing).
+ANNEALING_CHAINS = 200  # Number of simulated annealing chains run as one batch.
+ANNEALING_SWEEP = 100  # Number of steps of every chain in one generation of the annealing engine.
+ANNEALING_COOLING = "geometric"  # Cooling schedule of the chains: "geometric", "linear" or "logarithmic".
+ANNEALING_COOLING_STEPS = 20000  # Number of steps to cool a chain from its start temperature to the minimum temperature.
+ANNEALING_MIN_TEMPERATURE = 0.1  # Lowest temperature of a chain.
+ANNEALING_REHEAT = 0.5  # Start temperature of a reheated chain, relative to the initial temperature.
+ANNEALING_REHEAT_STALE = 5000  # Number of steps without improvement of its best fitness before a chain is reheated.
+CHECKPOINT_INTERVAL = 50  # Number of generations between two checkpoints of a solve with a checkpoint file.
+BENCHMARK_SEEDS = 10  # Number of seeded runs of every puzzle in the benchmark.
+BENCHMARK_TOLERANCE = 0.2  # Relative slowdown of a difficulty flagged as a regression by the benchmark.
+BENCHMARK_TIME_SLACK = 0.01  # Slowdowns below this number of seconds are never flagged, they are timer noise.
 
 """ UI Setting """
 BOARD_SIZE = 600
@@ -25,6 +67,9 @@ DUPLICATE_DIGIT_GIVEN_BG = "orange"
 SOLUTION_DIGIT_BG = "spring green"
 SOLUTION_DIGIT_GIVEN_BG = "green yellow"
 TRANSPARENT_DIGIT_BG = ""
+RENDER_FPS = 10  # Number of times per second the board is redrawn while solving.
+SNAPSHOT_QUEUE_SIZE = 4  # Number of progress snapshots kept for the UI, the oldest ones are dropped.
+ENGINE_NAMES = {"ga": "Genetic algorithm", "annealing": "Annealing"}  # Engines of the engine button, in switching order.
 
 # UI Option
 class RenderOption:
@@ -45,6 +90,9 @@ class WriteButtonOption:
 class ClearButtonOption:
     NORMAL = 0
     DISABLED = 1
+class EngineButtonOption:
+    NORMAL = 0
+    DISABLED = 1
 class SolveButtonOption:
     SOLVE = 0
     CANCEL = 1
@@ -0,0 +1,715 @@
+import copy
+import os
+import threading
+import time
+import numpy as np
+
+from .annealing import Annealing
+from .candidate import Candidate
+from .checkpoint import load_checkpoint, pack_candidates, restore_rng, save_checkpoint, unpack_candidates
+from .diversity import DiversityControl
+from .crossover import ChoiceCrossover, Crossover, HalfCrossover, RandomCrossover, RowColCrossover, TwoPointCrossover, UniformCrossover
+from .finisher import ExactFinisher
+from .helper import get_chromosome, parse_chromosome
+from .island import IslandModel, default_islands
+from .mutation import AllSwapMutation, MultiSwapMutation, RandomMutation, RandomResetting, SwapMutation
+from .population import ArrayPopulation, Population
+from .portfolio import Portfolio
+from .propagation import propagate
+from .rng import make_rng
+from .stats import FINISHER, RENDERING, SolveStats
+from .settings import ADAPTIVE_OPERATORS, CHECKPOINT_INTERVAL, CROSSOVER_RATE, DEDUPLICATE, DIGIT_NUMBER, DIVERSITY_CONTROL, ELITE_NUMBER, FINISHER_DISTANCE, FINISHER_NODE_LIMIT, FINISHER_STALE, GOAL, ISLAND_NUMBER, MAX_GENERATION
+from .settings import LOCAL_SEARCH, LOCAL_SEARCH_BEST_IMPROVEMENT, LOCAL_SEARCH_BUDGET, LOCAL_SEARCH_TOP
+from .settings import ANNEALING_CHAINS, ANNEALING_COOLING, ANNEALING_COOLING_STEPS, ANNEALING_MIN_TEMPERATURE, ANNEALING_REHEAT
+from .settings import ANNEALING_REHEAT_STALE, ANNEALING_SWEEP, ENGINE
+from .settings import MAX_STALE_COUNT, MIGRATION_INTERVAL, MIGRATION_SIZE, MIGRATION_TOPOLOGY, MUTATION_RATE, POPULATION_SIZE, VECTORIZED_POPULATION
+from .settings import PORTFOLIO_KEEP, PORTFOLIO_LAG, PORTFOLIO_PATIENCE, PORTFOLIO_SIZE, PORTFOLIO_WARMUP
+
+""" Self-contained solver API. A Solver only depends on its grid and its config, so several
+solves can run in the same process and no user interface is imported. """
+
+# Status of a SolveResult
+SOLVED = "solved"
+UNSOLVABLE = "unsolvable"
+NOT_FOUND = "not found"
+CANCELLED = "cancelled"
+
+class SolverConfig:
+    """ Parameters of a solve, every parameter defaults to its value in the settings. The island model and
+    the portfolio reject the parameters listed in Solver.island_settings, the per candidate population the ones
+    listed in Solver.check_population, and the annealing engine ignores the population parameters. """
+
+    def __init__(self, population_size=POPULATION_SIZE, max_generation=MAX_GENERATION, max_stale_count=MAX_STALE_COUNT,
+            mutation_rate=MUTATION_RATE, crossover_rate=CROSSOVER_RATE, elite_number=ELITE_NUMBER,
+            vectorized=VECTORIZED_POPULATION, finisher_distance=FINISHER_DISTANCE, finisher_node_limit=FINISHER_NODE_LIMIT,
+            finisher_stale=FINISHER_STALE, island_number=ISLAND_NUMBER, migration_interval=MIGRATION_INTERVAL, migration_size=MIGRATION_SIZE,
+            migration_topology=MIGRATION_TOPOLOGY, portfolio_size=PORTFOLIO_SIZE, portfolio_warmup=PORTFOLIO_WARMUP,
+            portfolio_lag=PORTFOLIO_LAG, portfolio_patience=PORTFOLIO_PATIENCE, portfolio_keep=PORTFOLIO_KEEP,
+            portfolio_members=None, adaptive_operators=ADAPTIVE_OPERATORS, diversity_control=DIVERSITY_CONTROL,
+            deduplicate=DEDUPLICATE, local_search=LOCAL_SEARCH,
+            local_search_top=LOCAL_SEARCH_TOP, local_search_budget=LOCAL_SEARCH_BUDGET,
+            local_search_best=LOCAL_SEARCH_BEST_IMPROVEMENT, engine=ENGINE, annealing_chains=ANNEALING_CHAINS,
+            annealing_sweep=ANNEALING_SWEEP, annealing_cooling=ANNEALING_COOLING, annealing_cooling_steps=ANNEALING_COOLING_STEPS,
+            annealing_min_temperature=ANNEALING_MIN_TEMPERATURE, annealing_reheat=ANNEALING_REHEAT,
+            annealing_reheat_stale=ANNEALING_REHEAT_STALE, time_limit=None, seed=None, checkpoint_path=None,
+            checkpoint_interval=CHECKPOINT_INTERVAL, resume=False, verbose=False, stats=False, trace=None):
+        """
+        Parameters:
+            - population_size (int): Number of candidates of the population
+            - max_generation (int): Maximum number of generations
+            - max_stale_count (int): Number of generations without improvement before the population is re-seeded
+            - mutation_rate (float): Probability of mutating a child
+            - crossover_rate (float): Probability of crossing over a pair of parents
+            - elite_number (int): Number of candidates kept unchanged between generations
+            - vectorized (bool): Store the population as one gene array and evaluate it in batch
+            - finisher_distance (int): Run the exact search finisher when the best fitness is this close to the goal
+            - finisher_node_limit (int): Maximum number of search nodes of the exact search finisher
+            - finisher_stale (int): Number of generations without improvement after which the finisher is tried
+            - island_number (int): Number of populations evolved in separate processes, 1 disables the island model
+            - migration_interval (int): Number of generations between two migrations
+            - migration_size (int): Number of top candidates sent at each migration
+            - migration_topology (str): "ring" or "random"
+            - portfolio_size (int): Number of populations raced in separate processes, 1 disables the portfolio, see Portfolio
+            - portfolio_warmup (int): Number of generations of a portfolio run before it can be stopped for lagging
+            - portfolio_lag (int): Fitness gap to the leading portfolio run at which a run is stopped
+            - portfolio_patience (int): Number of generations without improvement of a lagging portfolio run before it is stopped
+            - portfolio_keep (int): Number of portfolio runs that are never stopped for lagging
+            - portfolio_members (list) (optional=None): Parameters of every portfolio run that replace the ones of the config
+            - adaptive_operators (bool): Draw the crossover and mutation of every child from adaptive operator pools
+            - diversity_control (bool): Adapt the mutation strength and the population size to the diversity, see DiversityControl
+            - deduplicate (bool): Replace duplicated children and reuse the fitness of known genes
+            - local_search (str): When the fittest candidates get a swap hill climb, None, "generation" or "stale"
+            - local_search_top (int): Number of fittest candidates improved by the hill climb
+            - local_search_budget (int): Maximum number of swaps scored by the hill climb of one candidate
+            - local_search_best (bool): Best improvement instead of first improvement hill climb
+            - engine (str): Search engine, "ga" for the genetic algorithm or "annealing" for simulated annealing
+            - annealing_chains (int): Number of simulated annealing chains
+            - annealing_sweep (int): Number of steps of every chain in one generation of the annealing engine
+            - annealing_cooling (str): Cooling schedule, "geometric", "linear" or "logarithmic"
+            - annealing_cooling_steps (int): Number of steps to cool a chain down to the minimum temperature
+            - annealing_min_temperature (float): Lowest temperature of a chain
+            - annealing_reheat (float): Start temperature of a reheated chain, relative to the initial temperature
+            - annealing_reheat_stale (int): Number of steps without improvement before a chain is reheated
+            - time_limit (float) (optional=None): Time budget of the solve in seconds
+            - seed (int) (optional=None): Seed of the random number generator, a seeded solve is reproducible
+            - checkpoint_path (str) (optional=None): File where the search state is saved
+            - checkpoint_interval (int) (optional=CHECKPOINT_INTERVAL): Number of generations between two checkpoints
+            - resume (bool) (optional=False): Resume from the checkpoint file when it exists
+            - verbose (bool) (optional=False): Print the propagation report and the stats of the solve
+            - stats (bool) (optional=False): Collect per-phase timings and counters, see SolveStats
+            - trace (file) (optional=None): Stream receiving one JSON record per generation, enables the stats
+        """
+        self.population_size = population_size
+        self.max_generation = max_generation
+        self.max_stale_count = max_stale_count
+        self.mutation_rate = mutation_rate
+        self.crossover_rate = crossover_rate
+        self.elite_number = elite_number
+        self.vectorized = vectorized
+        self.finisher_distance = finisher_distance
+        self.finisher_node_limit = finisher_node_limit
+        self.finisher_stale = finisher_stale
+        self.island_number = island_number
+        self.migration_interval = migration_interval
+        self.migration_size = migration_size
+        self.migration_topology = migration_topology
+        self.portfolio_size = portfolio_size
+        self.portfolio_warmup = portfolio_warmup
+        self.portfolio_lag = portfolio_lag
+        self.portfolio_patience = portfolio_patience
+        self.portfolio_keep = portfolio_keep
+        self.portfolio_members = portfolio_members
+        self.adaptive_operators = adaptive_operators
+        self.diversity_control = diversity_control
+        self.deduplicate = deduplicate
+        self.local_search = local_search
+        self.local_search_top = local_search_top
+        self.local_search_budget = local_search_budget
+        self.local_search_best = local_search_best
+        self.engine = engine
+        self.annealing_chains = annealing_chains
+        self.annealing_sweep = annealing_sweep
+        self.annealing_cooling = annealing_cooling
+        self.annealing_cooling_steps = annealing_cooling_steps
+        self.annealing_min_temperature = annealing_min_temperature
+        self.annealing_reheat = annealing_reheat
+        self.annealing_reheat_stale = annealing_reheat_stale
+        self.time_limit = time_limit
+        self.seed = seed
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_interval = checkpoint_interval
+        self.resume = resume
+        self.verbose = verbose
+        self.stats = stats
+        self.trace = trace
+
+    def copy(self, **changes):
+        """
+        Returns a copy of the config with some parameters replaced.
+
+        Parameters:
+            - changes (dict): New value of every replaced parameter, e.g. seed=3
+        """
+        config = copy.copy(self)
+        for name, value in changes.items():
+            if not hasattr(config, name):
+                raise TypeError("Unknown solver parameter %r" % name)
+            setattr(config, name, value)
+        return config
+
+class Progress:
+    """ Snapshot of a running solve, passed to the progress callback. """
+
+    def __init__(self, generation, best_fitness, worst_fitness, reseed_count, solution, island=None, message=None):
+        """
+        Parameters:
+            - generation (int): Current generation
+            - best_fitness (int): Fitness of the best candidate
+            - worst_fitness (int): Fitness of the worst candidate, None in the island model
+            - reseed_count (int): Number of re-seeds so far
+            - solution (array): Best grid found so far
+            - island (int) (optional=None): Island reporting the progress in the island model, or run in the portfolio
+            - message (str) (optional=None): Event of the solve, e.g. a re-seed
+        """
+        self.generation = generation
+        self.best_fitness = best_fitness
+        self.worst_fitness = worst_fitness
+        self.reseed_count = reseed_count
+        self.solution = solution
+        self.island = island
+        self.message = message
+
+class SolveResult:
+    """ Outcome of a solve. """
+
+    def __init__(self, status, solution, fitness, generations, reseeds, time, propagation, stats, island=None, operators=None):
+        """
+        Parameters:
+            - status (str): SOLVED, UNSOLVABLE, NOT_FOUND or CANCELLED
+            - solution (array): Best grid found
+            - fitness (int): Fitness of the best grid
+            - generations (int): Number of generations run
+            - reseeds (int): Number of re-seeds of the population
+            - time (float): Duration of the solve in seconds
+            - propagation (PropagationReport): Report of the constraint propagation
+            - stats (SolveStats): Timings and counters of the solve
+            - island (int) (optional=None): Island that found the best grid in the island model
+            - operators (dict) (optional=None): Statistics of the adaptive crossover and mutation operators
+        """
+        self.status = status
+        self.solution = solution
+        self.fitness = fitness
+        self.generations = generations
+        self.reseeds = reseeds
+        self.time = time
+        self.propagation = propagation
+        self.stats = stats
+        self.island = island
+        self.operators = operators
+
+    @property
+    def solved(self):
+        return self.status == SOLVED
+
+class Solver:
+    """ Solves one Sudoku puzzle with the genetic algorithm. """
+
+    def __init__(self, grid, config=None):
+        """
+        Parameters:
+            - grid (array): The puzzle, 0 for unknown cells
+            - config (SolverConfig) (optional=None): Parameters of the solve, the settings by default
+        """
+        self.grid = np.array(grid, dtype=int).reshape(DIGIT_NUMBER, DIGIT_NUMBER)
+        self.config = config or SolverConfig()
+        self.stop_event = threading.Event()
+        self.given = None
+        self.track_grid = None
+        self.propagation = None
+        self.population = None
+        self.finisher = ExactFinisher(self.config.finisher_node_limit)
+        self.reseed_count = 0
+        self.generation = 0
+        self.start_time = None
+        self.stats = SolveStats()
+        self.rng = None
+        self.crossover_method = None
+        self.mutate_method = None
+        self.diversity_control = None
+
+        # Search state of the genetic algorithm, saved in checkpoints
+        self.stale = 0
+        self.cum_elites = []
+        self.tried_gene = None
+
+    def cancel(self):
+        """
+        Stops a running solve, the solve returns a CANCELLED result. Can be called from any thread.
+        """
+        self.stop_event.set()
+
+    def cancelled(self):
+        return self.stop_event.is_set()
+
+    def log(self, *args, **kwargs):
+        """
+        Prints the progress of the solver when it runs in verbose mode.
+        """
+        if self.config.verbose:
+            print(*args, **kwargs)
+
+    def timed_out(self):
+        """
+        Returns whether the time budget of the solve is spent.
+        """
+        return self.config.time_limit is not None and time.perf_counter() - self.start_time > self.config.time_limit
+
+    def check_population(self):
+        """
+        Raises a ValueError naming the parameters of the config that the per candidate population does not support.
+        """
+        config = self.config
+        if config.vectorized:
+            return
+        unsupported = [name for name, used in (
+            ("adaptive_operators", config.adaptive_operators),
+            ("deduplicate", config.deduplicate),
+        ) if used]
+        if unsupported:
+            raise ValueError("The per candidate population does not support %s" % ", ".join(unsupported))
+
+    def new_population(self):
+        """
+        Returns an empty population configured from the config.
+        """
+        population = ArrayPopulation() if self.config.vectorized else Population()
+        population.population_size = self.config.population_size
+        population.elitism = self.config.elite_number
+        population.mutation_rate = self.config.mutation_rate
+        population.crossover_rate = self.config.crossover_rate
+        if self.config.vectorized:
+            population.deduplicate = self.config.deduplicate
+        population.stats = self.stats
+        population.rng = self.rng
+        if self.crossover_method is not None:
+            population.crossover_method = self.crossover_method
+            population.mutate_method = self.mutate_method
+        return population
+
+    def new_operators(self):
+        """
+        Creates the adaptive crossover and mutation pools of a solve. They are shared by the populations
+        of every re-seed, so what they learnt survives the re-seeds. The offspring are rewarded by the
+        vectorized population, the per candidate population, the island model and the portfolio reject them.
+        """
+        config = self.config
+        if not config.adaptive_operators:
+            self.crossover_method = None
+            self.mutate_method = None
+            return
+        self.crossover_method = RandomCrossover([HalfCrossover(), Crossover(), RowColCrossover(), UniformCrossover(),
+            TwoPointCrossover(), ChoiceCrossover()], adaptive=True)
+        self.mutate_method = RandomMutation([MultiSwapMutation(), SwapMutation(), AllSwapMutation(), RandomResetting()],
+            adaptive=True)
+
+    def operator_summary(self):
+        """
+        Returns the statistics of the adaptive operators, None when they are disabled.
+        """
+        if self.crossover_method is None:
+            return None
+        return {"crossover": self.crossover_method.summary(), "mutation": self.mutate_method.summary()}
+
+    def hill_climb(self):
+        """ Improves the fittest candidates of the population with a swap hill climb, returns the gain of the best fitness. """
+        config = self.config
+        return self.population.hill_climb(self.given, self.track_grid, config.local_search_top, config.local_search_budget,
+            config.local_search_best)
+
+    def fill_predetermined(self):
+        """
+        Fills some predetermined cells of the Sudoku grid using constraint propagation
+        (naked and hidden singles, naked and hidden pairs, pointing and claiming).
+        The possible values of every cell are kept in track_grid as a bitmask.
+
+        Returns: The PropagationReport, telling which rules fired and whether the puzzle is unsolvable.
+        """
+        self.track_grid, self.propagation = propagate(self.given)
+        return self.propagation
+
+    def try_finish(self, candidate):
+        """
+        Completes a candidate close to the goal with the exact search finisher. The finisher is only tried
+        once per plateau, when the best fitness has not improved for finisher_stale generations, and never
+        on a candidate it already failed to complete.
+
+        Parameters:
+            - candidate (Candidate): The best candidate of the population
+
+        Returns: A solved Candidate or None.
+        """
+        config = self.config
+        if candidate.fitness == GOAL or GOAL - candidate.fitness > config.finisher_distance or self.stale != config.finisher_stale:
+            return None
+        if self.tried_gene is not None and np.array_equal(self.tried_gene, candidate.gene):
+            return None
+        self.tried_gene = candidate.gene
+
+        deadline = None
+        if config.time_limit is not None:
+            deadline = self.start_time + config.time_limit
+        with self.stats.timer(FINISHER):
+            solution = self.finisher.finish(candidate.gene, self.given, self.track_grid, deadline)
+        if solution is None:
+            return None
+
+        solved = Candidate(solution)
+        solved.update_fitness(self.track_grid)
+        return solved
+
+    def save_checkpoint(self, next_generation):
+        """
+        Saves the search state, the solve resumes from next_generation.
+        """
+        genes, fitness, fitness_matrix = self.population.get_state()
+        elite_genes, elite_fitness, elite_matrix = pack_candidates(self.cum_elites)
+        tried_gene = np.zeros((0, DIGIT_NUMBER, DIGIT_NUMBER), dtype=np.uint8) if self.tried_gene is None else self.tried_gene[None]
+        arrays = {
+            "grid": self.grid,
+            "generation": next_generation,
+            "reseed_count": self.reseed_count,
+            "stale": self.stale,
+            "tried_gene": tried_gene,
+            "genes": genes,
+            "fitness": fitness,
+            "fitness_matrix": fitness_matrix,
+            "elite_genes": elite_genes,
+            "elite_fitness": elite_fitness,
+            "elite_matrix": elite_matrix,
+            "population_size": self.population.population_size,
+            "mutation_rate": self.population.mutation_rate,
+            "mutation_strength": self.population.mutation_strength,
+        }
+        if self.crossover_method is not None:
+            arrays["crossover_credit"] = self.crossover_method.credit.get_state()
+            arrays["mutation_credit"] = self.mutate_method.credit.get_state()
+        save_checkpoint(self.config.checkpoint_path, arrays, self.rng)
+
+    def load_checkpoint(self):
+        """
+        Restores the search state from the checkpoint file and returns the generation to resume from.
+        Returns None and leaves the state untouched when the checkpoint belongs to another puzzle
+        or has spent the generation budget, the solve then starts a new search.
+        """
+        path = self.config.checkpoint_path
+        state = load_checkpoint(path)
+        if not np.array_equal(state["grid"], self.grid):
+            self.log("The checkpoint %s belongs to another puzzle, starting a new search" % path)
+            return None
+        if int(state["generation"]) >= self.config.max_generation:
+            self.log("The checkpoint %s has spent the generation budget, starting a new search" % path)
+            return None
+        restore_rng(state, self.rng)
+
+        self.reseed_count = int(state["reseed_count"])
+        self.stale = int(state["stale"])
+        self.tried_gene = state["tried_gene"][0] if len(state["tried_gene"]) else None
+        self.population.set_state(state["genes"], state["fitness"], state["fitness_matrix"])
+        self.cum_elites = unpack_candidates(state["elite_genes"], state["elite_fitness"], state["elite_matrix"])
+        if "population_size" in state:
+            self.population.population_size = int(state["population_size"])
+            self.population.mutation_rate = float(state["mutation_rate"])
+            self.population.mutation_strength = int(state["mutation_strength"])
+        if self.crossover_method is not None and "crossover_credit" in state:
+            self.crossover_method.credit.set_state(state["crossover_credit"])
+            self.mutate_method.credit.set_state(state["mutation_credit"])
+        return int(state["generation"])
+
+    def remove_checkpoint(self):
+        """
+        Removes the checkpoint of a finished search.
+        """
+        if self.config.checkpoint_path is not None and os.path.exists(self.config.checkpoint_path):
+            os.remove(self.config.checkpoint_path)
+
+    def result(self, status, gene, fitness, island=None):
+        if self.stats.enabled:
+            self.log(self.stats)
+        operators = self.operator_summary()
+        if operators is not None:
+            for kind, summary in operators.items():
+                self.log(kind, *["%s p=%.3f uses=%d" % (s["operator"], s["probability"], s["uses"]) for s in summary], sep="\n    ")
+        return SolveResult(status, parse_chromosome(gene), int(fitness), self.generation, self.reseed_count,
+            time.perf_counter() - self.start_time, self.propagation, self.stats, island, operators)
+
+    def island_settings(self, model):
+        """
+        Returns the parameters of the config shared by the populations of the worker processes, see Island.
+        Raises a ValueError naming the parameters of the config that the worker processes do not support.
+
+        Parameters:
+            - model (str): Name of the multi-process model, used in the error message
+        """
+        config = self.config
+        unsupported = [name for name, used in (
+            ("vectorized=False", not config.vectorized),
+            ("adaptive_operators", config.adaptive_operators),
+            ("diversity_control", config.diversity_control),
+            ("local_search", config.local_search is not None),
+            ("checkpoint_path", config.checkpoint_path is not None),
+        ) if used]
+        if unsupported:
+            raise ValueError("The %s does not support %s" % (model, ", ".join(unsupported)))
+        return dict(population_size=config.population_size, elite_number=config.elite_number,
+            mutation_rate=config.mutation_rate, crossover_rate=config.crossover_rate, max_stale_count=config.max_stale_count,
+            finisher_distance=config.finisher_distance, finisher_node_limit=config.finisher_node_limit,
+            finisher_stale=config.finisher_stale,
+            deduplicate=config.deduplicate)
+
+    def solve_islands(self, on_progress):
+        """
+        Solves the Sudoku puzzle with the island model, one population per worker process.
+        """
+        config = self.config
+        islands = default_islands(config.island_number, **self.island_settings("island model"))
+        model = IslandModel(islands, config.migration_interval, config.migration_size, config.migration_topology)
+
+        def island_progress(island, generation, fitness, gene):
+            self.log("Island %d, generation %d, best score: %d" % (island, generation, fitness))
+            if on_progress is not None:
+                on_progress(Progress(generation, fitness, None, self.reseed_count, parse_chromosome(gene), island))
+
+        def should_stop():
+            return self.cancelled() or self.timed_out()
+
+        best = model.solve(self.given, self.track_grid, config.max_generation, island_progress, should_stop, self.rng)
+        if best is None:
+            return self.result(CANCELLED if self.cancelled() else NOT_FOUND, self.given, 0)
+
+        gene, fitness, generation, island = best
+        self.generation = generation
+        if fitness == GOAL:
+            return self.result(SOLVED, gene, fitness, island)
+        return self.result(CANCELLED if self.cancelled() else NOT_FOUND, gene, fitness, island)
+
+    def solve_portfolio(self, on_progress):
+        """
+        Solves the Sudoku puzzle with a racing portfolio of differently configured populations, one per worker process.
+        """
+        config = self.config
+        runs = default_islands(config.portfolio_size, config.portfolio_members, **self.island_settings("portfolio"))
+        portfolio = Portfolio(runs, warmup=config.portfolio_warmup, lag=config.portfolio_lag,
+            patience=config.portfolio_patience, keep=config.portfolio_keep)
+
+        def run_progress(run, generation, fitness, gene):
+            self.log("Run %d, generation %d, best score: %d" % (run, generation, fitness))
+            if on_progress is not None:
+                on_progress(Progress(generation, fitness, None, self.reseed_count, parse_chromosome(gene), run))
+
+        def run_stopped(run, generation, fitness):
+            message = "Run %d lags behind at generation %d with fitness %d and is stopped" % (run, generation, fitness)
+            self.log(message)
+            if on_progress is not None:
+                on_progress(Progress(generation, fitness, None, self.reseed_count, None, run, message=message))
+
+        def should_stop():
+            return self.cancelled() or self.timed_out()
+
+        best = portfolio.solve(self.given, self.track_grid, config.max_generation, run_progress, run_stopped, should_stop, self.rng)
+        if best is None:
+            return self.result(CANCELLED if self.cancelled() else NOT_FOUND, self.given, 0)
+
+        gene, fitness, generation, run = best
+        self.generation = generation
+        if fitness == GOAL:
+            return self.result(SOLVED, gene, fitness, run)
+        return self.result(CANCELLED if self.cancelled() else NOT_FOUND, gene, fitness, run)
+
+    def solve_annealing(self, on_progress):
+        """
+        Solves the Sudoku puzzle with the simulated annealing engine. A generation is a sweep of annealing_sweep
+        steps of every chain, and the reseed count of the progress and of the result counts the reheated chains.
+        """
+        config = self.config
+        annealing = Annealing(config.annealing_chains, config.annealing_cooling, config.annealing_cooling_steps,
+            min_temperature=config.annealing_min_temperature, reheat=config.annealing_reheat,
+            reheat_stale=config.annealing_reheat_stale)
+        annealing.stats = self.stats
+        annealing.rng = self.rng
+        annealing.start(self.given, self.track_grid)
+        self.tried_gene = None
+        self.stale = 0
+        best = annealing.best()
+
+        for i in range(config.max_generation):
+            if self.cancelled():
+                return self.result(CANCELLED, best.gene, best.fitness)
+            if self.timed_out():
+                break
+            self.generation = i
+            self.reseed_count = annealing.reheats
+
+            # Finish a best state that is close to the goal with an exact search
+            previous = best.fitness
+            best = annealing.best()
+            self.stale = self.stale + 1 if i > 0 and best.fitness <= previous else 0
+            solved = self.try_finish(best)
+            if solved is not None:
+                self.log("Solved by the exact search finisher in %d nodes" % self.finisher.nodes)
+                best = solved
+
+            worst_fitness = annealing.worst()
+            if best.fitness == GOAL:
+                return self.result(SOLVED, best.gene, best.fitness)
+            if on_progress is not None:
+                with self.stats.timer(RENDERING):
+                    on_progress(Progress(i, best.fitness, worst_fitness, self.reseed_count, parse_chromosome(best.gene)))
+
+            annealing.run(config.annealing_sweep)
+            self.stats.end_generation(i, best.fitness, worst_fitness, temperature=round(annealing.temperature(), 4))
+
+        # The last sweep may have reached the goal
+        best = annealing.best()
+        if best.fitness == GOAL:
+            return self.result(SOLVED, best.gene, best.fitness)
+        return self.result(NOT_FOUND, best.gene, best.fitness)
+
+    def solve(self, on_progress=None):
+        """
+        Solves the Sudoku puzzle using genetic algorithm and returns a SolveResult.
+
+        Parameters:
+            - on_progress (function) (optional=None): Called with a Progress every generation
+        """
+        config = self.config
+        self.start_time = time.perf_counter()
+        self.generation = 0
+        self.reseed_count = 0
+        self.stats = SolveStats(config.stats, config.trace)
+        self.rng = make_rng(config.seed)
+        self.new_operators()
+        self.given = get_chromosome(self.grid)
+
+        # Fill all predetermined value for the puzzle
+        report = self.fill_predetermined()
+        self.log(report)
+        if report.contradiction:
+            self.remove_checkpoint()
+            return self.result(UNSOLVABLE, self.given, 0)
+        self.log(*self.given, sep="\n")
+
+        if config.engine == "annealing":
+            return self.solve_annealing(on_progress)
+        if config.portfolio_size > 1:
+            return self.solve_portfolio(on_progress)
+        if config.island_number > 1:
+            return self.solve_islands(on_progress)
+
+        self.check_population()
+        self.population = self.new_population()
+        self.diversity_control = None
+        if config.diversity_control:
+            self.diversity_control = DiversityControl(config.population_size, config.mutation_rate, config.elite_number)
+        self.stale = 0
+        self.cum_elites = []
+        self.tried_gene = None
+        checkpoint = config.checkpoint_path
+        start = None
+        if checkpoint is not None and config.resume and os.path.exists(checkpoint):
+            # Resume the search where the checkpoint stopped
+            start = self.load_checkpoint()
+            if start is not None:
+                self.log("Resumed from %s at generation %d" % (checkpoint, start))
+        if start is None:
+            # Generate initial candidates
+            self.population.generate_initial_candidates(config.population_size, self.given, self.track_grid)
+            start = 0
+        prev_best_fitness = 0
+        best = self.population.best()
+
+        for i in range(start, config.max_generation):
+            if checkpoint is not None and i > start and (i - start) % config.checkpoint_interval == 0:
+                self.save_checkpoint(i)
+            if self.cancelled():
+                if checkpoint is not None:
+                    self.save_checkpoint(i)
+                return self.result(CANCELLED, best.gene, best.fitness)
+            if self.timed_out():
+                if checkpoint is not None:
+                    self.save_checkpoint(i)
+                break
+            self.generation = i
+
+            # Update the best candidate for each generation
+            best = self.population.best()
+
+            # Finish a best candidate that is close to the goal with an exact search
+            solved = self.try_finish(best)
+            if solved is not None:
+                self.log("Solved by the exact search finisher in %d nodes" % self.finisher.nodes)
+                best = solved
+
+            prev_best_fitness = best.fitness
+            worst_fitness = self.population.worst().fitness
+
+            # Check for a solution
+            if prev_best_fitness == GOAL:
+                self.remove_checkpoint()
+                return self.result(SOLVED, best.gene, best.fitness)
+            if on_progress is not None:
+                with self.stats.timer(RENDERING):
+                    on_progress(Progress(i, prev_best_fitness, worst_fitness, self.reseed_count, parse_chromosome(best.gene)))
+
+            # Go to next generation if the current population doesn't have solution
+            self.population.next_gen(self.given, self.track_grid)
+            if config.local_search == "generation":
+                self.hill_climb()
+
+            # Check for stale population
+            if self.population.best().fitness != prev_best_fitness:
+                self.stale = 0
+            else:
+                self.stale += 1
+
+            # Give a stale population a last chance with a hill climb of its fittest candidates before re-seeding it
+            if config.local_search == "stale" and self.stale > config.max_stale_count:
+                if self.hill_climb() > 0 and self.population.best().fitness > prev_best_fitness:
+                    self.stale = 0
+
+            # Adapt the mutation and the population size to the diversity of the new generation
+            values = {}
+            if self.diversity_control is not None:
+                values["diversity"] = round(self.diversity_control.update(self.population, self.given, self.stale == 0), 4)
+                values["population_size"] = self.population.population_size
+                values["mutation_strength"] = self.population.mutation_strength
+
+            # Re-seed the population if max_stale_count generations have passed with the fittest value not improving.
+            if self.stale > config.max_stale_count:
+                self.reseed_count += 1
+                if on_progress is not None:
+                    with self.stats.timer(RENDERING):
+                        on_progress(Progress(i, prev_best_fitness, worst_fitness, self.reseed_count, parse_chromosome(best.gene),
+                            message="The population has gone stale. Restarting..."))
+
+                # Store the top few solutions (candiddates) from each stale population
+                # When enough top solutions accumulate, a new population is created from these best solutions
+                # and used as an initial population when the GA is restarted.
+                if len(self.cum_elites) < config.population_size:
+                    num_elite = int(config.population_size * 0.1)
+                    self.cum_elites.extend(self.population.top(num_elite))
+                    self.population.generate_initial_candidates(config.population_size, self.given, self.track_grid)
+                else:
+                    self.log("Activate cumulative method")
+                    self.population.load_candidates(self.cum_elites, self.track_grid)
+                    self.cum_elites = []
+                self.stale = 0
+                if self.diversity_control is not None:
+                    self.diversity_control.reset(self.population)
+
+            self.stats.end_generation(i, prev_best_fitness, worst_fitness, **values)
+        else:
+            # The generation budget is spent, a resumed solve with a larger budget continues from here
+            if checkpoint is not None:
+                self.save_checkpoint(config.max_generation)
+
+        return self.result(NOT_FOUND, best.gene, best.fitness)
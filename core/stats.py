@@ -0,0 +1,149 @@
+import json
+import time
+
+""" Instrumentation of a solve: time spent in each phase of a generation and counters
+of fitness evaluations and array allocations. """
+
+SELECTION = "selection"
+CROSSOVER = "crossover"
+MUTATION = "mutation"
+EVALUATION = "evaluation"
+SORTING = "sorting"
+LOCAL_SEARCH = "local_search"
+ANNEALING = "annealing"
+FINISHER = "finisher"
+RENDERING = "rendering"
+PHASES = (SELECTION, CROSSOVER, MUTATION, EVALUATION, SORTING, LOCAL_SEARCH, ANNEALING, FINISHER, RENDERING)
+
+class NullTimer:
+    """ Timer of a disabled SolveStats, does nothing. """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+NULL_TIMER = NullTimer()
+
+class PhaseTimer:
+    """ Adds the time spent in a with block to a phase of a SolveStats. """
+
+    def __init__(self, stats, phase):
+        self.stats = stats
+        self.phase = phase
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        self.stats.generation_times[self.phase] += time.perf_counter() - self.start
+        return False
+
+class SolveStats:
+    """ Per-phase timings and counters of a solve. When it is disabled, timers are shared
+    no-op objects and counters are not updated, so the instrumentation costs almost nothing. """
+
+    def __init__(self, enabled=False, trace=None):
+        """
+        Parameters:
+            - enabled (bool) (optional=False): Collect timings and counters
+            - trace (file) (optional=None): Stream receiving one JSON record per generation, enables the stats
+        """
+        self.enabled = enabled or trace is not None
+        self.trace = trace
+        self.times = dict.fromkeys(PHASES, 0.0)
+        self.generation_times = dict.fromkeys(PHASES, 0.0)
+        self.evaluations = 0
+        self.duplicates = 0
+        self.allocations = 0
+        self.allocated_bytes = 0
+        self.generations = 0
+        self.generation_evaluations = 0
+        self.generation_duplicates = 0
+        self.generation_allocations = 0
+
+    def timer(self, phase):
+        """
+        Returns a context manager timing the phase.
+
+        Parameters:
+            - phase (str): One of PHASES
+        """
+        if not self.enabled:
+            return NULL_TIMER
+        return PhaseTimer(self, phase)
+
+    def count_evaluations(self, number):
+        """ Counts "number" fitness evaluations. """
+        if self.enabled:
+            self.generation_evaluations += number
+
+    def count_duplicates(self, number):
+        """ Counts "number" duplicated children. """
+        if self.enabled:
+            self.generation_duplicates += number
+
+    def count_allocations(self, *arrays):
+        """ Counts newly allocated arrays and their size. """
+        if self.enabled:
+            self.generation_allocations += len(arrays)
+            self.allocated_bytes += sum(array.nbytes for array in arrays)
+
+    def end_generation(self, generation, best_fitness, worst_fitness, **values):
+        """
+        Adds the timings and counters of the generation to the totals and writes its trace record.
+
+        Parameters:
+            - generation (int): Index of the generation
+            - best_fitness (int): Fitness of the best candidate
+            - worst_fitness (int): Fitness of the worst candidate
+            - values (dict): Other values of the generation added to its trace record, e.g. the diversity
+        """
+        if not self.enabled:
+            return
+
+        if self.trace is not None:
+            record = {
+                "generation": int(generation),
+                "best": int(best_fitness),
+                "worst": int(worst_fitness),
+                "evaluations": self.generation_evaluations,
+                "duplicates": self.generation_duplicates,
+                "allocations": self.generation_allocations,
+            }
+            record.update(values)
+            record.update((phase, round(seconds, 6)) for phase, seconds in self.generation_times.items())
+            self.trace.write(json.dumps(record) + "\n")
+
+        for phase, seconds in self.generation_times.items():
+            self.times[phase] += seconds
+            self.generation_times[phase] = 0.0
+        self.evaluations += self.generation_evaluations
+        self.duplicates += self.generation_duplicates
+        self.allocations += self.generation_allocations
+        self.generation_evaluations = 0
+        self.generation_duplicates = 0
+        self.generation_allocations = 0
+        self.generations += 1
+
+    def summary(self):
+        """ Returns the totals as a dictionary. """
+        summary = {
+            "generations": self.generations,
+            "evaluations": self.evaluations + self.generation_evaluations,
+            "duplicates": self.duplicates + self.generation_duplicates,
+            "allocations": self.allocations + self.generation_allocations,
+            "allocated_bytes": self.allocated_bytes,
+        }
+        summary.update((phase, round(self.times[phase] + self.generation_times[phase], 6)) for phase in PHASES)
+        return summary
+
+    def __str__(self):
+        summary = self.summary()
+        total = sum(summary[phase] for phase in PHASES) or 1
+        phases = ", ".join("%s %.3fs (%d%%)" % (phase, summary[phase], 100 * summary[phase] / total) for phase in PHASES)
+        return "%d generations, %d evaluations, %d allocations: %s" % (
+            summary["generations"], summary["evaluations"], summary["allocations"], phases)
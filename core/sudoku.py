@@ -1,149 +1,92 @@
-import random
-from math import sqrt
-import numpy as np
+import queue
 
-from .helper import *
-from .candidate import Candidate
-from .population import Population
-from .settings import BLOCK_NUMBER, DIGIT_NUMBER, GOAL, POPULATION_SIZE, MAX_GENERATION, MAX_STALE_COUNT, RenderOption
+from .solver import CANCELLED, UNSOLVABLE, Solver, SolverConfig
+from .settings import ENGINE, RenderOption, SNAPSHOT_QUEUE_SIZE
 from .given import given
 
 class Sudoku:
-    def __init__(self, render):
-        self.render = render
-        self.reseed_count = 0
-        self.exitFlag = False
-        self.given = get_chromosome(given.values)
-        self.track_grid = None
-        self.population = Population()
-    
-    def fill_predetermined(self):
+    """ Runs a Solver on the puzzle of the user interface. The progress is published as snapshots
+    (text, render option, best grid, best fitness) to a bounded queue that the UI polls from
+    its own thread, so the solver never waits for the UI. A Sudoku is used for one solve.
+    With a checkpoint path, the search state is saved regularly and when the solve is cancelled,
+    and the next solve of the puzzle resumes from it. The engine selects the genetic algorithm ("ga")
+    or simulated annealing ("annealing"). """
+
+    def __init__(self, seed=None, checkpoint_path=None, engine=ENGINE):
+        config = SolverConfig(seed=seed, checkpoint_path=checkpoint_path, resume=True, verbose=True, stats=True, engine=engine)
+        self.engine = engine
+        self.solver = Solver(given.values, config)
+        self.snapshots = queue.Queue(maxsize=SNAPSHOT_QUEUE_SIZE)
+
+    def cancel(self):
         """
-        Fills some predetermined cells of the Sudoku grid using a pencil marking method.
+        Stops the running solve.
         """
-        self.track_grid = copy_grid(self.given, lambda i, j: set(range(1, DIGIT_NUMBER + 1)))
-
-        def pencil_mark(i, j):
-            """
-            Marks the value of grid[i][j] element in it's row, column and sub-grid.
-
-            Parameters:
-                - i (int): Sub-grid's index.
-                - j (int): Sub-grid's element index.
-
-            Returns: The more completed version of the grid.
-            """
-
-            # remove from same sub-grid cells
-            for a, b in same_sub_grid_indexes(i, j, itself=False):
-                self.track_grid[a][b].discard(self.given[i][j])
-
-            # remove from same row cells
-            for a, b in same_row_indexes(i, j, itself=False):
-                self.track_grid[a][b].discard(self.given[i][j])
-
-            # remove from same column cells
-            for a, b in same_column_indexes(i, j, itself=False):
-                self.track_grid[a][b].discard(self.given[i][j])
-
-        for i in range(DIGIT_NUMBER):
-            for j in range(DIGIT_NUMBER):
-                if self.given[i][j] != 0:
-                    pencil_mark(i, j)
+        self.solver.cancel()
 
+    def publish(self, text, option=RenderOption.NORMAL, solution=None, fitness=None):
+        """
+        Adds a snapshot to the queue, dropping the oldest one when the queue is full.
+        """
+        snapshot = (text, option, solution, fitness)
         while True:
-            anything_changed = False
-
-            for i in range(DIGIT_NUMBER):
-                for j in range(DIGIT_NUMBER):
-                    if self.given[i][j] != 0:
-                        continue
-
-                    elif len(self.track_grid[i][j]) == 0:
-                        renderTxt = 'The puzzle is unsolvable'
-                        self.render(renderTxt, RenderOption.NOT_FOUND)
-                    elif len(self.track_grid[i][j]) == 1:
-                        self.given[i][j] = list(self.track_grid[i][j])[0]
-                        pencil_mark(i, j)
-
-                        anything_changed = True
+            try:
+                self.snapshots.put_nowait(snapshot)
+                return
+            except queue.Full:
+                try:
+                    self.snapshots.get_nowait()
+                except queue.Empty:
+                    pass
 
-            if not anything_changed:
-                break
+    def latest(self):
+        """
+        Returns the most recent snapshot and discards the older ones, None when there is no new snapshot.
+        """
+        snapshot = None
+        while True:
+            try:
+                snapshot = self.snapshots.get_nowait()
+            except queue.Empty:
+                return snapshot
+
+    def restartName(self):
+        # The annealing engine reheats its chains where the genetic algorithm re-seeds its population.
+        return "Reheat" if self.engine == "annealing" else "Reseed"
+
+    def on_progress(self, progress):
+        if progress.message is not None:
+            self.publish(progress.message, RenderOption.ONLY_TEXT)
+            return
+
+        renderTxt = ""
+        if progress.island is not None:
+            renderTxt += "Island %d\n" % progress.island
+        renderTxt += "Generation %d\n" % progress.generation
+        renderTxt += "Best fitness: %d\n" % progress.best_fitness
+        if progress.worst_fitness is not None:
+            renderTxt += "Worst fitness: %d\n" % progress.worst_fitness
+            renderTxt += "%s count: %d\n" % (self.restartName(), progress.reseed_count)
+        self.publish(renderTxt, RenderOption.NORMAL, progress.solution, progress.best_fitness)
 
     def solve(self):
         """
         Solves the Sudoku puzzle using genetic algorithm.
         """
-
-        # Fill all predetermined value for the puzzle
-        self.fill_predetermined()
-        print(*self.given, sep="\n")
-
-        # Generate initial candidates
-        self.population.generate_initial_candidates(POPULATION_SIZE, self.given, self.track_grid)
-        prev_best_fitness = 0
-        stale = 0
-        cum_elites = []
-        self.reseed_count = 0
-
-        # For up to 2000 generations...
-        for i in range(MAX_GENERATION):
-            if self.exitFlag:
-                return
-
-            # Update the best candidate for each generation
-            given.bestCandidate = self.population.candidates[0]
-            given.bestCandidate.gene = parse_chromosome(self.population.candidates[0].gene)
-            prev_best_fitness = self.population.candidates[0].fitness
-
-            if i % 1 == 0:
-                print("Generation %d" % i)
-                print("Best score: %d" % prev_best_fitness)
-                print("Worst score: %d" % self.population.candidates[-1].fitness)
-
-            renderTxt = "Generation %d\n" % i
-            renderTxt += "Best fitness: %d\n" % prev_best_fitness
-            renderTxt += "Worst fitness: %d\n" % self.population.candidates[-1].fitness
-            renderTxt += "Reseed count: %d\n" % self.reseed_count
-
-            # Check for a solution
-            if prev_best_fitness == GOAL:
-                self.render(renderTxt, RenderOption.FOUNDED)
-                return
-            else:
-                self.render(renderTxt)
-
-            # Go to next generation if the current population doesn't have solution
-            self.population.next_gen(self.given, self.track_grid)
-
-            # Check for stale population
-            if self.population.candidates[0].fitness != prev_best_fitness:
-                stale = 0
-            else:
-                stale += 1
-
-            # Re-seed the population if 30 generations have passed with the fittest value not improving.
-            if stale > MAX_STALE_COUNT:
-                # print("The population has gone stale. Searching in local space...")
-                # self.population.local_search(3, self.given, self.track_grid)
-                self.reseed_count += 1
-                renderTxt = "The population has gone stale. Restarting..."
-                self.render(renderTxt, RenderOption.ONLY_TEXT)
-                
-                # Store the top few solutions (candiddates) from each stale population
-                # When enough top solutions accumulate, a new population is created from these best solutions
-                # and used as an initial population when the GA is restarted.
-                if len(cum_elites) < POPULATION_SIZE:
-                    num_elite = int(POPULATION_SIZE * 0.1)
-                    cum_elites.extend(self.population.candidates[:num_elite])
-                    self.population.generate_initial_candidates(POPULATION_SIZE, self.given, self.track_grid)
-                else:
-                    print("Activate cumulative method")
-                    self.population.candidates = cum_elites
-                    cum_elites = []
-                stale = 0
-
-        renderTxt = "No solution found."
-        self.render(renderTxt, RenderOption.NOT_FOUND)
-        return None
\ No newline at end of file
+        result = self.solver.solve(self.on_progress)
+        if result.status == CANCELLED:
+            return
+        if result.status == UNSOLVABLE:
+            self.publish("The puzzle is unsolvable", RenderOption.NOT_FOUND)
+            return
+
+        if result.solved:
+            renderTxt = ""
+            if result.island is not None:
+                renderTxt += "Island %d found a solution\n" % result.island
+            renderTxt += "Generation %d\n" % result.generations
+            renderTxt += "Best fitness: %d\n" % result.fitness
+            renderTxt += "%s count: %d\n" % (self.restartName(), result.reseeds)
+            self.publish(renderTxt, RenderOption.FOUNDED, result.solution, result.fitness)
+        else:
+            self.publish("No solution found.", RenderOption.NOT_FOUND, result.solution, result.fitness)
@@ -0,0 +1,73 @@
+import numpy as np
+from .settings import BLOCK_NUMBER, DIGIT_NUMBER
+
+""" Sudoku topology lookup tables, built once at import.
+
+Cells are addressed by their flat chromosome index i * 9 + j, where i is the
+sub-grid index and j the element index inside the sub-grid. """
+
+CELL_NUMBER = DIGIT_NUMBER * DIGIT_NUMBER
+
+# Chromosome coordinates of every cell
+SUB_GRID_OF = np.arange(CELL_NUMBER) // DIGIT_NUMBER
+ELEMENT_OF = np.arange(CELL_NUMBER) % DIGIT_NUMBER
+
+# Grid coordinates of every cell
+ROW_OF = (SUB_GRID_OF // BLOCK_NUMBER) * BLOCK_NUMBER + ELEMENT_OF // BLOCK_NUMBER
+COLUMN_OF = (SUB_GRID_OF % BLOCK_NUMBER) * BLOCK_NUMBER + ELEMENT_OF % BLOCK_NUMBER
+
+# GRID_TO_CHROMOSOME[k] is the grid index (row * 9 + column) of chromosome cell k and
+# CHROMOSOME_TO_GRID[g] the chromosome index of grid cell g, so that
+# chromosome.flat == grid.flat[GRID_TO_CHROMOSOME] and grid.flat == chromosome.flat[CHROMOSOME_TO_GRID]
+GRID_TO_CHROMOSOME = ROW_OF * DIGIT_NUMBER + COLUMN_OF
+CHROMOSOME_TO_GRID = np.argsort(GRID_TO_CHROMOSOME)
+
+# Cells of every unit, rows and columns are ordered the way they are read on the grid
+ROWS = CHROMOSOME_TO_GRID.reshape(DIGIT_NUMBER, DIGIT_NUMBER)
+COLUMNS = ROWS.T.copy()
+SUB_GRIDS = np.arange(CELL_NUMBER).reshape(DIGIT_NUMBER, DIGIT_NUMBER)
+UNITS = np.concatenate((ROWS, COLUMNS, SUB_GRIDS))
+
+def _peers():
+    peers = np.empty((CELL_NUMBER, 2 * (DIGIT_NUMBER - 1) + (BLOCK_NUMBER - 1) ** 2), dtype=int)
+    for k in range(CELL_NUMBER):
+        same = (ROW_OF == ROW_OF[k]) | (COLUMN_OF == COLUMN_OF[k]) | (SUB_GRID_OF == SUB_GRID_OF[k])
+        same[k] = False
+        peers[k] = np.flatnonzero(same)
+    return peers
+
+# The 20 cells sharing a row, a column or a sub-grid with every cell
+PEERS = _peers()
+
+def to_grid(chromosome):
+    """
+    Returns the grid layout of one or many chromosomes, shape (..., 9, 9).
+
+    Parameters:
+        - chromosome (array): Chromosome(s), shape (..., 9, 9)
+    """
+    shape = chromosome.shape
+    return chromosome.reshape(shape[:-2] + (CELL_NUMBER,))[..., CHROMOSOME_TO_GRID].reshape(shape)
+
+def to_chromosome(grid):
+    """
+    Returns the chromosome layout of one or many grids, shape (..., 9, 9).
+
+    Parameters:
+        - grid (array): Sudoku grid(s), shape (..., 9, 9)
+    """
+    grid = np.asarray(grid)
+    shape = grid.shape
+    return grid.reshape(shape[:-2] + (CELL_NUMBER,))[..., GRID_TO_CHROMOSOME].reshape(shape)
+
+def grid_view(chromosome):
+    """
+    Returns a zero-copy view of one or many chromosomes in grid order, shape (..., 3, 3, 3, 3).
+    Element [a, b, c, d] is the cell at row a * 3 + b and column c * 3 + d, so a grid row
+    is reduced over the two last axes and a grid column over the axes -4 and -3.
+
+    Parameters:
+        - chromosome (array): Chromosome(s), shape (..., 9, 9)
+    """
+    shape = chromosome.shape[:-2] + (BLOCK_NUMBER,) * 4
+    return chromosome.reshape(shape).swapaxes(-3, -2)
@@ -0,0 +1,42 @@
+import numpy as np
+from .settings import DIGIT_NUMBER
+
+""" Pencil-mark tracker stored as bitmasks, bit v of a cell is set when digit v is still possible. """
+
+# Mask of a cell where every digit is possible
+FULL_DOMAIN = sum(1 << value for value in range(1, DIGIT_NUMBER + 1))
+
+# Number of set bits of every mask
+POPCOUNT = np.array([bin(mask).count("1") for mask in range(1 << (DIGIT_NUMBER + 1))], dtype=int)
+
+# Lowest digit of every mask, the digit of a mask with a single bit set
+LOWEST_DIGIT = np.array([(mask & -mask).bit_length() - 1 for mask in range(1 << (DIGIT_NUMBER + 1))], dtype=int)
+
+def value_bits(values):
+    """
+    Returns the bit of every value, empty cells (zeros) get no bit.
+
+    Parameters:
+        - values (array): Digits of the cells
+    """
+    values = np.asarray(values)
+    return np.where(values != 0, np.left_shift(1, values.astype(int)), 0).astype(np.uint16)
+
+def allowed(tracker, genes):
+    """
+    Returns whether the value of every cell is still possible for it according to the tracker.
+
+    Parameters:
+        - tracker (array): Bitmask tracker of the puzzle, shape (9, 9)
+        - genes (array): One or many chromosomes, shape (..., 9, 9)
+    """
+    return ((tracker >> genes.astype(np.uint16)) & 1) == 1
+
+def digits(mask):
+    """
+    Returns the list of digits of a mask.
+
+    Parameters:
+        - mask (int): Bitmask of digits
+    """
+    return [value for value in range(1, DIGIT_NUMBER + 1) if mask >> value & 1]
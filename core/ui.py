@@ -1,6 +1,6 @@
 from tkinter import Tk, Canvas, Frame, Button, Label, filedialog
 
-from .settings import ClearButtonOption, DIGIT_NUMBER, BLOCK_NUMBER, BOARD_SIZE, DIGIT_SIZE, DIGIT_SPACE, DUPLICATE_DIGIT_BG, DUPLICATE_DIGIT_GIVEN_BG, FONT_FAMILY, OpenButtonOption, SOLUTION_DIGIT_BG, SOLUTION_DIGIT_GIVEN_BG, SolveButtonOption, TRANSPARENT_DIGIT_BG, WriteButtonOption
+from .settings import ClearButtonOption, DIGIT_NUMBER, ENGINE, ENGINE_NAMES, EngineButtonOption, BLOCK_NUMBER, BOARD_SIZE, DIGIT_SIZE, DIGIT_SPACE, DUPLICATE_DIGIT_BG, DUPLICATE_DIGIT_GIVEN_BG, FONT_FAMILY, OpenButtonOption, SOLUTION_DIGIT_BG, SOLUTION_DIGIT_GIVEN_BG, SolveButtonOption, TRANSPARENT_DIGIT_BG, WriteButtonOption
 from .settings import GIVEN_DIGIT_COLOR, NORMAL_DIGIT_COLOR, TEXT_SIZE
 from .given import given
 
@@ -14,12 +14,14 @@ class Ui:
         self.boardItems = []
         self.boardItemBgs = []
         self.solveButton = None
+        self.engineButton = None
         self.createWidgets()
 
         self.openCmd = None
         self.writeCmd = None
         self.clearCmd = None
         self.solveCmd = None
+        self.engineCmd = None
         self.pressCmd = None
         self.clickCmd = None
 
@@ -54,9 +56,13 @@ class Ui:
         self.solveButton = Button(self.sizebar, width=20, font=(FONT_FAMILY,TEXT_SIZE),
                 text="Solve", state="disabled")
         self.solveButton.grid(row=3, column=0, padx=5, pady=10)
+        # Create button to switch the search engine
+        self.engineButton = Button(self.sizebar, width=20, font=(FONT_FAMILY,TEXT_SIZE),
+                text=ENGINE_NAMES[ENGINE])
+        self.engineButton.grid(row=4, column=0, padx=5, pady=10)
         # Create statistic of sudoku
         self.statistic = Label(self.sizebar, font=(FONT_FAMILY,TEXT_SIZE), wraplength=300)
-        self.statistic.grid(row=4, column=0, pady=10)
+        self.statistic.grid(row=5, column=0, pady=10)
 
         self.initializeBoard()
 
@@ -199,17 +205,28 @@ class Ui:
             self.solveButton["state"] = "normal"
             self.openButtonSwitch(OpenButtonOption.DISABLED)
             self.clearButtonSwitch(ClearButtonOption.DISABLED)
+            self.engineButtonSwitch(EngineButtonOption.DISABLED)
         elif option == SolveButtonOption.READY:
             self.solveButton["text"] = "Solve"
             self.solveButton["state"] = "normal"
             self.openButtonSwitch(OpenButtonOption.NORMAL)
             self.clearButtonSwitch(ClearButtonOption.NORMAL)
+            self.engineButtonSwitch(EngineButtonOption.NORMAL)
         elif option == SolveButtonOption.NORMAL:
             self.solveButton["state"] = "normal"
         elif option == SolveButtonOption.DISABLED:
             self.solveButton["state"] = "disabled"
         self.solveButton.update()
 
+    def engineButtonSwitch(self, option, engine=None):
+        if engine is not None:
+            self.engineButton["text"] = ENGINE_NAMES[engine]
+        if option == EngineButtonOption.NORMAL:
+            self.engineButton["state"] = "normal"
+        elif option == EngineButtonOption.DISABLED:
+            self.engineButton["state"] = "disabled"
+        self.engineButton.update()
+
     def showStatistic(self, txt):
         self.statistic["text"] = txt
 
@@ -224,6 +241,7 @@ class Ui:
         self.writeButton["command"] = self.writeCmd
         self.clearButton["command"] = self.clearCmd
         self.solveButton["command"] = self.solveCmd
+        self.engineButton["command"] = self.engineCmd
         self.window.bind('<Key>', self.pressCmd)
         self.board.bind('<Button-1>', self.clickCmd)
 
@@ -1,7 +1,68 @@
 import sys
-from core import App
+from argparse import ArgumentParser
 
 def main(argv):
+    parser = ArgumentParser(description="Solve Sudoku puzzles using a genetic algorithm.")
+    parser.add_argument("--batch", metavar="PATH",
+            help="solve every puzzle of a file or directory without user interface")
+    parser.add_argument("--benchmark", metavar="PATH",
+            help="benchmark the solver on every puzzle of a file or directory with fixed seeds")
+    parser.add_argument("--seeds", type=int, default=None,
+            help="number of seeded runs of every puzzle in benchmark mode")
+    parser.add_argument("--baseline", metavar="FILE", default=None,
+            help="compare the benchmark with a saved baseline and flag regressions")
+    parser.add_argument("--save-baseline", metavar="FILE", default=None,
+            help="save the benchmark results as a baseline")
+    parser.add_argument("--workers", type=int, default=None,
+            help="number of worker processes in batch and benchmark mode (default: number of cores)")
+    parser.add_argument("--max-generation", type=int, default=None,
+            help="generation budget of every puzzle in batch and benchmark mode")
+    parser.add_argument("--time-limit", type=float, default=None,
+            help="time budget in seconds of every puzzle in batch and benchmark mode")
+    parser.add_argument("--stats", action="store_true",
+            help="add per-phase timings and evaluation counters to every batch record")
+    parser.add_argument("--adaptive", action="store_true",
+            help="choose crossover and mutation operators adaptively in batch and benchmark mode")
+    parser.add_argument("--diversity", action="store_true",
+            help="adapt the mutation and the population size to the diversity in batch and benchmark mode")
+    parser.add_argument("--deduplicate", action="store_true",
+            help="replace duplicated children and reuse known fitness values in batch and benchmark mode")
+    parser.add_argument("--engine", choices=["ga", "annealing"], default=None,
+            help="search engine in batch and benchmark mode: genetic algorithm (default) or simulated annealing")
+    parser.add_argument("--output", metavar="FILE", default=None,
+            help="write the batch results to FILE instead of stdout")
+    args = parser.parse_args(argv)
+
+    if args.batch is not None or args.benchmark is not None:
+        from core.solver import SolverConfig
+
+        options = {"time_limit": args.time_limit, "stats": args.stats, "adaptive_operators": args.adaptive,
+                "diversity_control": args.diversity, "deduplicate": args.deduplicate}
+        if args.max_generation is not None:
+            options["max_generation"] = args.max_generation
+        if args.engine is not None:
+            options["engine"] = args.engine
+        config = SolverConfig(**options)
+
+    if args.batch is not None:
+        from core.batch import run_batch
+
+        if args.output is None:
+            run_batch(args.batch, config, workers=args.workers)
+        else:
+            with open(args.output, "w") as output:
+                run_batch(args.batch, config, output, args.workers)
+        return
+
+    if args.benchmark is not None:
+        from core.benchmark import benchmark
+        from core.settings import BENCHMARK_SEEDS
+
+        regressions = benchmark(args.benchmark, config, args.seeds or BENCHMARK_SEEDS, args.workers,
+                args.baseline, args.save_baseline)
+        sys.exit(1 if regressions else 0)
+
+    from core import App
     app = App()
     app.run()
 
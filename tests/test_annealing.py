@@ -0,0 +1,58 @@
+from os import path as osPath
+import numpy as np
+import pytest
+
+from core.annealing import COOLING_SCHEDULES, Annealing
+from core.helper import get_chromosome
+from core.propagation import propagate
+from core.puzzles import read_puzzles
+from core.settings import GOAL
+
+PUZZLES = dict(read_puzzles(osPath.join(osPath.dirname(__file__), "..", "exmaple_sudokus")))
+HARD = PUZZLES["puzzle_11_star.txt"]
+
+def started_annealing(**parameters):
+    """ Returns seeded annealing chains started on the hard puzzle. """
+    given = get_chromosome(HARD)
+    tracker, report = propagate(given)
+    annealing = Annealing(**parameters)
+    annealing.rng = np.random.default_rng(0)
+    annealing.start(given, tracker)
+    return annealing
+
+@pytest.mark.parametrize("cooling", sorted(COOLING_SCHEDULES))
+def test_schedules_cool_from_the_start_to_the_minimum_temperature(cooling):
+    schedule = COOLING_SCHEDULES[cooling]()
+    start = np.array([2.0, 4.0])
+    temperatures = [schedule.temperature(start, 0.1, np.array([step, step]), 10) for step in range(15)]
+    assert np.allclose(temperatures[0], start)
+    assert all((later <= earlier).all() for earlier, later in zip(temperatures, temperatures[1:]))
+    assert np.allclose(temperatures[10:], 0.1)
+
+def test_stale_chains_are_reheated_to_a_fraction_of_the_initial_temperature():
+    annealing = started_annealing(chains=8, cooling_steps=10, start_temperature=2.0, min_temperature=0.01,
+        reheat=0.5, reheat_stale=30)
+    annealing.run(30)
+    best_genes = annealing.best_genes.copy()
+
+    # No chain can beat the goal, so every chain goes stale at the next step
+    annealing.best_fitness[:] = GOAL
+    annealing.stale[:] = annealing.reheat_stale
+    reheats = annealing.reheats
+    annealing.step()
+    assert annealing.reheats == reheats + annealing.chains
+    assert annealing.reheated.all()
+    assert (annealing.clock == 0).all() and (annealing.stale == 0).all()
+    # Reheating restarts the cooling but keeps the best state of every chain
+    assert np.array_equal(annealing.best_genes, best_genes)
+
+    annealing.step()
+    assert np.allclose(annealing.temperatures, 2.0 * 0.5)
+    annealing.run(10)
+    assert np.allclose(annealing.temperatures, 0.01)
+
+def test_chains_are_not_reheated_before_they_go_stale():
+    annealing = started_annealing(chains=8, start_temperature=2.0, reheat_stale=10 ** 6)
+    annealing.run(50)
+    assert annealing.reheats == 0
+    assert not annealing.reheated.any()
@@ -0,0 +1,71 @@
+from os import path as osPath
+import subprocess
+import sys
+import numpy as np
+import pytest
+
+from core.puzzles import read_puzzles
+from core.solver import NOT_FOUND, Solver, SolverConfig
+
+PUZZLES = dict(read_puzzles(osPath.join(osPath.dirname(__file__), "..", "exmaple_sudokus")))
+HARD = PUZZLES["puzzle_11_star.txt"]
+
+def config(seed=4, **parameters):
+    """ A small seeded search that re-seeds often and is not finished by the exact search. """
+    return SolverConfig(seed=seed, finisher_distance=0, max_stale_count=2, population_size=100, **parameters)
+
+def same_result(first, second):
+    return (first.status == second.status and first.fitness == second.fitness and first.generations == second.generations
+        and first.reseeds == second.reseeds and np.array_equal(first.solution, second.solution))
+
+@pytest.mark.parametrize("parameters", [
+    {"vectorized": True},
+    {"vectorized": False},
+    {"adaptive_operators": True, "diversity_control": True, "deduplicate": True},
+    {"local_search": "generation"},
+    {"engine": "annealing", "annealing_chains": 32},
+], ids=["vectorized", "per candidate", "adaptive", "local search", "annealing"])
+def test_seeded_solves_are_reproducible(parameters):
+    first = Solver(HARD, config(max_generation=40, **parameters)).solve()
+    second = Solver(HARD, config(max_generation=40, **parameters)).solve()
+    assert same_result(first, second)
+
+@pytest.mark.parametrize("vectorized", [True, False], ids=["vectorized", "per candidate"])
+def test_resumed_solve_matches_uninterrupted_solve(tmp_path, vectorized):
+    checkpoint = str(tmp_path / "run.npz")
+    full = Solver(HARD, config(max_generation=120, vectorized=vectorized)).solve()
+
+    Solver(HARD, config(max_generation=57, vectorized=vectorized, checkpoint_path=checkpoint)).solve()
+    # The generator state comes from the checkpoint, a fresh search with another seed would differ
+    resumed = Solver(HARD, config(seed=5, max_generation=120, vectorized=vectorized, checkpoint_path=checkpoint, resume=True)).solve()
+    assert full.reseeds > 0
+    assert same_result(full, resumed)
+
+def test_spent_checkpoint_starts_a_new_search(tmp_path):
+    checkpoint = str(tmp_path / "run.npz")
+    first = Solver(HARD, config(max_generation=20, checkpoint_path=checkpoint, resume=True)).solve()
+    second = Solver(HARD, config(max_generation=20, checkpoint_path=checkpoint, resume=True)).solve()
+    assert first.status == second.status == NOT_FOUND
+    assert second.generations == first.generations > 0
+
+def test_checkpoint_of_another_puzzle_is_ignored(tmp_path):
+    checkpoint = str(tmp_path / "run.npz")
+    Solver(HARD, config(max_generation=20, checkpoint_path=checkpoint)).solve()
+    other = PUZZLES["puzzle_very_hard_2.txt"]
+    fresh = Solver(other, config(max_generation=30)).solve()
+    resumed = Solver(other, config(max_generation=30, checkpoint_path=checkpoint, resume=True)).solve()
+    assert same_result(fresh, resumed)
+
+def test_checkpoint_resumes_in_another_process(tmp_path):
+    checkpoint = str(tmp_path / "run.npz")
+    full = Solver(HARD, config(max_generation=80)).solve()
+
+    # The first half runs in a separate interpreter, the checkpoint is all that is left of it
+    script = ("from core.puzzles import read_puzzles\n"
+        "from core.solver import Solver, SolverConfig\n"
+        "grid = dict(read_puzzles(%r))['puzzle_11_star.txt']\n"
+        "Solver(grid, SolverConfig(seed=4, finisher_distance=0, max_stale_count=2, population_size=100,"
+        " max_generation=33, checkpoint_path=%r)).solve()\n") % (osPath.join(osPath.dirname(__file__), "..", "exmaple_sudokus"), checkpoint)
+    subprocess.run([sys.executable, "-c", script], cwd=osPath.join(osPath.dirname(__file__), ".."), check=True)
+    resumed = Solver(HARD, config(seed=5, max_generation=80, checkpoint_path=checkpoint, resume=True)).solve()
+    assert same_result(full, resumed)
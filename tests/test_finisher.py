@@ -0,0 +1,44 @@
+from os import path as osPath
+import time
+import numpy as np
+
+from core.finisher import DEADLINE_INTERVAL, ExactFinisher
+from core.helper import get_chromosome
+from core.propagation import propagate
+from core.puzzles import read_puzzles
+
+PUZZLES = dict(read_puzzles(osPath.join(osPath.dirname(__file__), "..", "exmaple_sudokus")))
+
+def puzzle(name):
+    given = get_chromosome(PUZZLES[name])
+    tracker, report = propagate(given)
+    return given, tracker
+
+def test_finisher_repairs_a_nearly_solved_candidate():
+    given, tracker = puzzle("puzzle_11_star.txt")
+    solution = ExactFinisher(10 ** 6).finish(np.zeros_like(given), given, tracker)
+    assert solution is not None
+
+    # Swap two free cells of a sub-grid, the finisher puts them back
+    gene = solution.copy()
+    sub_grid = next(i for i in range(len(given)) if (given[i] == 0).sum() > 1)
+    first, second = np.flatnonzero(given[sub_grid] == 0)[:2]
+    gene[sub_grid, [first, second]] = gene[sub_grid, [second, first]]
+    finisher = ExactFinisher()
+    assert np.array_equal(finisher.finish(gene, given, tracker), solution)
+    assert finisher.nodes < 100
+
+def test_finisher_stops_at_the_deadline():
+    given, tracker = puzzle("puzzle_11_star.txt")
+    finisher = ExactFinisher(10 ** 6)
+    start = time.perf_counter()
+    assert finisher.finish(np.zeros_like(given), given, tracker, deadline=start - 1) is None
+    # The deadline is checked every DEADLINE_INTERVAL nodes of each of the two passes
+    assert time.perf_counter() - start < 0.1
+
+def test_finisher_respects_the_node_limit():
+    given, tracker = puzzle("puzzle_11_star.txt")
+    finisher = ExactFinisher(DEADLINE_INTERVAL)
+    assert finisher.finish(np.zeros_like(given), given, tracker) is None
+    # The node that exceeds the limit is counted once by each pass
+    assert finisher.nodes <= DEADLINE_INTERVAL + 2
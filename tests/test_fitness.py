@@ -0,0 +1,62 @@
+from os import path as osPath
+import numpy as np
+import pytest
+
+from core.candidate import Candidate
+from core.fitness import PerfectFitness, PopulationFitness
+from core.helper import get_chromosome, parse_chromosome
+from core.population import ArrayPopulation
+from core.propagation import propagate
+from core.puzzles import read_puzzles
+from core.settings import BLOCK_NUMBER, DIGIT_NUMBER, GOAL
+from core.tracker import digits
+
+PUZZLES = list(read_puzzles(osPath.join(osPath.dirname(__file__), "..", "exmaple_sudokus")))
+
+def baseline_fitness(gene, tracker):
+    """ Fitness as the baseline computed it, cell by cell with sets: the number of different digits of every
+    grid row and column, minus every invalid cell once for its row and once for its column. Also returns the
+    fitness matrix, the different digits of every row and column of sub-grids. """
+    grid = parse_chromosome(gene)
+    domains = parse_chromosome(tracker)
+    fitness_matrix = np.zeros((2, BLOCK_NUMBER), dtype=int)
+    invalid = 0
+    for i in range(DIGIT_NUMBER):
+        fitness_matrix[0][i // BLOCK_NUMBER] += len(set(grid[i]))
+        fitness_matrix[1][i // BLOCK_NUMBER] += len(set(grid[:, i]))
+        for j in range(DIGIT_NUMBER):
+            if grid[i][j] not in digits(int(domains[i][j])):
+                invalid += 1
+    return fitness_matrix.sum() - 2 * invalid, fitness_matrix
+
+def random_genes(given, tracker, rng):
+    """ Returns initial candidates of the puzzle and chromosomes of random digits, which break the givens. """
+    population = ArrayPopulation()
+    population.rng = rng
+    population.generate_initial_candidates(20, given, tracker)
+    noise = rng.integers(1, DIGIT_NUMBER + 1, size=(10, DIGIT_NUMBER, DIGIT_NUMBER)).astype(np.uint8)
+    return np.concatenate([population.genes, noise])
+
+@pytest.mark.parametrize("name, values", PUZZLES, ids=[name for name, _ in PUZZLES])
+def test_fitness_matches_baseline(name, values):
+    given = get_chromosome(values)
+    tracker, report = propagate(given)
+    genes = random_genes(given, tracker, np.random.default_rng(0))
+    expected = [baseline_fitness(gene, tracker) for gene in genes]
+
+    for gene, (fitness, fitness_matrix) in zip(genes, expected):
+        candidate = Candidate(gene.copy())
+        assert PerfectFitness().cal_fitness(candidate, tracker) == fitness
+        assert np.array_equal(candidate.fitness_matrix, fitness_matrix)
+
+    fitness, fitness_matrix = PopulationFitness().cal_fitness(genes, tracker)
+    assert list(fitness) == [value for value, _ in expected]
+    assert np.array_equal(fitness_matrix, [matrix for _, matrix in expected])
+
+def test_solution_reaches_goal():
+    name, values = PUZZLES[0]
+    given = get_chromosome(values)
+    tracker, report = propagate(given)
+    # Propagation solves the easy puzzle, its chromosome is a solution
+    assert (given != 0).all()
+    assert PerfectFitness().cal_fitness(Candidate(given.copy()), tracker) == GOAL
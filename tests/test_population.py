@@ -0,0 +1,116 @@
+from os import path as osPath
+import numpy as np
+import pytest
+
+from core.candidate import Candidate
+from core.fitness import PerfectFitness, PopulationFitness
+from core.helper import get_chromosome
+from core.mutation import RandomMutation, SwapMutation
+from core.population import ArrayPopulation, gene_hashes
+from core.propagation import propagate
+from core.puzzles import read_puzzles
+from core.solver import Solver, SolverConfig
+from core.stats import SolveStats
+
+PUZZLES = dict(read_puzzles(osPath.join(osPath.dirname(__file__), "..", "exmaple_sudokus")))
+HARD = PUZZLES["puzzle_11_star.txt"]
+
+class NoMutation:
+    """ Mutation operator that leaves the chromosomes unchanged, so its offspring never improve. """
+    def mutate_batch(self, genes, free_cells, rows, rng):
+        pass
+
+def new_population(size=200, seed=0, **attributes):
+    """ Returns a seeded vectorized population of the hard puzzle, its given chromosome and its tracker. """
+    given = get_chromosome(HARD)
+    tracker, report = propagate(given)
+    population = ArrayPopulation()
+    population.rng = np.random.default_rng(seed)
+    population.population_size = size
+    for name, value in attributes.items():
+        setattr(population, name, value)
+    population.generate_initial_candidates(size, given, tracker)
+    return population, given, tracker
+
+def test_vectorized_generations_keep_valid_sorted_and_exact_chromosomes():
+    population, given, tracker = new_population(elitism=2)
+    best = population.fitness[0]
+    for _ in range(20):
+        population.next_gen(given, tracker)
+        genes = population.genes
+        assert genes.dtype == np.uint8 and len(genes) == 200
+        # The givens stay in place and every sub-grid holds each digit once
+        assert (genes[:, given != 0] == given[given != 0]).all()
+        assert (np.sort(genes, axis=2) == np.arange(1, 10)).all()
+        assert (np.diff(population.fitness) <= 0).all()
+        # The elites are kept, so the best fitness never drops
+        assert population.fitness[0] >= best
+        best = population.fitness[0]
+    for index in (0, 100, 199):
+        assert PerfectFitness().cal_fitness(Candidate(genes[index].copy()), tracker) == population.fitness[index]
+
+def test_deduplicated_generations_keep_exact_fitness_and_hashes():
+    # Many elites and a low mutation rate produce duplicates every generation
+    population, given, tracker = new_population(deduplicate=True, elitism=50, mutation_rate=0.05, stats=SolveStats(True))
+    for _ in range(30):
+        population.next_gen(given, tracker)
+        fitness, fitness_matrix = PopulationFitness().cal_fitness(population.genes, tracker)
+        assert np.array_equal(population.fitness, fitness)
+        assert np.array_equal(population.fitness_matrix, fitness_matrix)
+        assert np.array_equal(population.hashes, gene_hashes(population.genes))
+    assert population.stats.generation_duplicates > 0
+
+def test_per_candidate_population_rejects_deduplicate():
+    with pytest.raises(ValueError, match="deduplicate"):
+        Solver(HARD, SolverConfig(vectorized=False, deduplicate=True, max_generation=1)).solve()
+
+def test_adaptive_rewards_go_to_the_operator_of_each_child():
+    # Without crossover a child is a copy of a parent, so only a real mutation can improve it
+    mutate_method = RandomMutation([NoMutation(), SwapMutation()], adaptive=True)
+    population, given, tracker = new_population(crossover_rate=0, mutation_rate=0.5, mutate_method=mutate_method)
+    for _ in range(20):
+        population.next_gen(given, tracker)
+    credit = mutate_method.credit
+    assert credit.uses[0] > 0 and credit.rewards[0] == 0 and credit.successes[0] == 0
+    assert credit.successes[1] > 0
+
+    # A child mutated in several rounds has one recorded choice per round, each gets the reward of the child
+    uses = credit.uses.sum()
+    population.mutation_strength = 3
+    population.next_gen(given, tracker)
+    assert credit.choices is None
+    assert (credit.uses.sum() - uses) % 3 == 0
+
+def test_per_candidate_population_rejects_adaptive_operators():
+    with pytest.raises(ValueError, match="adaptive_operators"):
+        Solver(HARD, SolverConfig(vectorized=False, adaptive_operators=True, max_generation=1)).solve()
+
+@pytest.mark.parametrize("best_improvement", [False, True], ids=["first improvement", "best improvement"])
+def test_hill_climb_improves_within_its_budget(monkeypatch, best_improvement):
+    population, given, tracker = new_population(size=10)
+    free_cells = population.get_free_cells(given)
+    scored = []
+    swap_deltas = PerfectFitness.swap_deltas
+    def counted_swap_deltas(self, candidate, firsts, seconds, tracker):
+        scored.append(len(firsts))
+        return swap_deltas(self, candidate, firsts, seconds, tracker)
+    monkeypatch.setattr(PerfectFitness, "swap_deltas", counted_swap_deltas)
+
+    # A budget much smaller than the neighbourhood still finds improving swaps of a random candidate
+    budget = len(free_cells.pairs[0]) // 4
+    candidate = population.candidate(len(population.genes) - 1)
+    candidate.gene = candidate.gene.copy()
+    start = candidate.fitness
+    gain = candidate.hill_climb(free_cells, tracker, budget, best_improvement, population.rng, chunk=8)
+    assert 0 < sum(scored) <= budget
+    assert gain > 0 and candidate.fitness == start + gain
+    assert candidate.fitness == PerfectFitness().cal_fitness(candidate.copy(), tracker)
+
+def test_hill_climb_stops_at_a_local_optimum():
+    population, given, tracker = new_population(size=10)
+    free_cells = population.get_free_cells(given)
+    candidate = population.candidate(0)
+    candidate.gene = candidate.gene.copy()
+    candidate.hill_climb(free_cells, tracker, 10 ** 6, rng=population.rng)
+    firsts, seconds = free_cells.pairs
+    assert (PerfectFitness().swap_deltas(candidate, firsts, seconds, tracker) <= 0).all()
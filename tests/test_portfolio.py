@@ -0,0 +1,39 @@
+from os import path as osPath
+import multiprocessing
+import threading
+import time
+
+from core.portfolio import Portfolio
+from core.puzzles import read_puzzles
+from core.solver import CANCELLED, Solver, SolverConfig
+
+PUZZLES = dict(read_puzzles(osPath.join(osPath.dirname(__file__), "..", "exmaple_sudokus")))
+HARD = PUZZLES["puzzle_11_star.txt"]
+
+def test_lagging_runs_are_stopped_after_warmup_and_patience():
+    portfolio = Portfolio([None] * 4, warmup=10, lag=5, patience=3, keep=1)
+    # (generation, fitness, generation of the last improvement) of every run
+    reports = {0: (20, 150, 20), 1: (20, 140, 10), 2: (20, 144, 19), 3: (8, 120, 0)}
+    # Run 2 still improves and run 3 is still warming up
+    assert portfolio.laggards(reports, {0, 1, 2, 3}) == [1]
+    reports[2] = (30, 144, 19)
+    assert portfolio.laggards(reports, {0, 1, 2, 3}) == [1, 2]
+    assert portfolio.laggards(reports, {0, 1}) == [1]
+    # The kept runs are never stopped, the least fit laggards go first
+    portfolio.keep = 3
+    assert portfolio.laggards(reports, {0, 1, 2, 3}) == [1]
+
+def test_cancelled_portfolio_stops_its_workers():
+    # The time limit only ends the test if the cancellation is lost
+    solver = Solver(HARD, SolverConfig(portfolio_size=2, max_generation=10 ** 6, finisher_distance=0, seed=0, time_limit=30))
+    timer = threading.Timer(2.0, solver.cancel)
+    start = time.perf_counter()
+    timer.start()
+    try:
+        result = solver.solve()
+    finally:
+        timer.cancel()
+    assert result.status == CANCELLED
+    # Cancellation is polled every 0.1 s and the workers get one second to stop before they are terminated
+    assert time.perf_counter() - start < 10
+    assert not multiprocessing.active_children()
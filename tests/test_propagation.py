@@ -0,0 +1,67 @@
+from os import path as osPath
+import numpy as np
+import pytest
+
+from core.helper import get_chromosome, parse_chromosome
+from core.propagation import propagate
+from core.puzzles import read_puzzles
+from core.settings import DIGIT_NUMBER
+from core.solver import UNSOLVABLE, Solver, SolverConfig
+
+PUZZLES = list(read_puzzles(osPath.join(osPath.dirname(__file__), "..", "exmaple_sudokus")))
+
+def backtrack(grid):
+    """ Plain backtracking solver, independent of the propagation rules. Fills the grid in place
+    and returns whether it found a solution, trying the empty cell with the fewest digits first. """
+    best = None
+    for i in range(DIGIT_NUMBER):
+        for j in range(DIGIT_NUMBER):
+            if grid[i][j] != 0:
+                continue
+            block = grid[i // 3 * 3:i // 3 * 3 + 3, j // 3 * 3:j // 3 * 3 + 3]
+            options = set(range(1, DIGIT_NUMBER + 1)) - set(grid[i]) - set(grid[:, j]) - set(block.flat)
+            if best is None or len(options) < len(best[2]):
+                best = (i, j, options)
+    if best is None:
+        return True
+    i, j, options = best
+    for value in options:
+        grid[i][j] = value
+        if backtrack(grid):
+            return True
+    grid[i][j] = 0
+    return False
+
+@pytest.mark.parametrize("name, values", PUZZLES, ids=[name for name, _ in PUZZLES])
+def test_propagation_is_sound(name, values):
+    solution = np.array(values, dtype=int)
+    assert backtrack(solution)
+
+    given = get_chromosome(values)
+    tracker, report = propagate(given)
+    assert not report.contradiction
+
+    # Every cell filled by the propagation holds the digit of the solution
+    grid = parse_chromosome(given)
+    filled = grid != 0
+    assert np.array_equal(grid[filled], solution[filled])
+    # and no rule removed the digit of the solution from a cell
+    domains = parse_chromosome(tracker).astype(int)
+    assert ((domains >> solution) & 1 == 1).all()
+
+def test_duplicate_givens_are_unsolvable():
+    grid = np.zeros((DIGIT_NUMBER, DIGIT_NUMBER), dtype=int)
+    grid[0][0] = grid[0][5] = 4
+    tracker, report = propagate(get_chromosome(grid))
+    assert report.contradiction
+
+def test_contradiction_found_by_propagation():
+    # The last cell of the first row can only hold 9, which its column already holds
+    grid = np.zeros((DIGIT_NUMBER, DIGIT_NUMBER), dtype=int)
+    grid[0][:8] = np.arange(1, 9)
+    grid[4][8] = 9
+    tracker, report = propagate(get_chromosome(grid))
+    assert report.contradiction
+
+    result = Solver(grid, SolverConfig(seed=0, max_generation=5)).solve()
+    assert result.status == UNSOLVABLE